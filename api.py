@@ -0,0 +1,321 @@
+import csv
+import hashlib
+import io
+import json
+from datetime import datetime, timedelta, timezone
+
+from flask import Blueprint, Response, request, jsonify, stream_with_context, current_app
+from sqlalchemy import func
+from sqlalchemy.exc import SQLAlchemyError
+
+from cache import page_cache
+from filters import request_timezone, str_to_datetime
+from models import db, showTable, venueGenreTable, artistGenreTable, Venue, Artist
+from queries import utc_now, genre_names, keyset_page, book_shows, SHOW_PAGE_KEYS, show_listing, shows_between, \
+    requested_range, city_week_shows, month_shows
+
+# ----------------------------------------------------------------------------#
+# API.
+# ----------------------------------------------------------------------------#
+# JSON version of the venues, artists and shows data
+# ?fields=id,name selects the returned fields and the listings are paginated like the pages
+# Responses carry an ETag and Last-Modified computed from the rows versions
+# so conditional requests are answered with 304 before the data is loaded
+
+bp = Blueprint('api', __name__, url_prefix='/api/v1')
+
+API_VENUE_FIELDS = ['id', 'name', 'city', 'state', 'address', 'phone', 'genres', 'image_link',
+                    'facebook_link', 'website', 'seeking_talent', 'seeking_description', 'updated_at']
+API_ARTIST_FIELDS = ['id', 'name', 'city', 'state', 'phone', 'genres', 'image_link',
+                     'facebook_link', 'website', 'seeking_venue', 'seeking_description', 'updated_at']
+API_SHOW_FIELDS = ['artist_id', 'venue_id', 'start_time', 'artist_name', 'artist_image_link',
+                   'venue_name', 'venue_image_link']
+
+def api_error(message, status):
+    return jsonify({'error': message}), status
+
+# Get the fields asked for with ?fields= or all of them, None if a field is unknown
+def api_fields(allowed):
+    if not request.args.get('fields'):
+        return allowed
+    fields = request.args['fields'].split(',')
+    if any(field not in allowed for field in fields):
+        return None
+    return fields
+
+def api_value(field, value):
+    if field == 'genres':
+        return [genre if isinstance(genre, str) else genre.name for genre in value]
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+def api_record(record, fields, genres=None):
+    return {field: api_value(field, genres[record.id] if field == 'genres' and genres is not None
+                             else getattr(record, field)) for field in fields}
+
+# The genres association table of each model and its key column
+API_GENRE_TABLES = {
+    'venues': (venueGenreTable, venueGenreTable.c.venue_id),
+    'artists': (artistGenreTable, artistGenreTable.c.artist_id),
+}
+
+# Build the JSON response, or a 304 when the client already has this version
+# version is anything json serializable that changes when the data changes
+# The last_modified of a collection does not move when one of its rows is deleted, only its version
+# (which has the count) does: with collection, If-Modified-Since alone never answers a 304.
+def api_response(last_modified, version, build, collection=False):
+    etag = hashlib.sha1(json.dumps([request.full_path, version], default=str).encode()).hexdigest()
+    if last_modified is not None:
+        # HTTP dates have no timezone nor microseconds
+        if last_modified.tzinfo is not None:
+            last_modified = last_modified.astimezone(timezone.utc).replace(tzinfo=None)
+        last_modified = last_modified.replace(microsecond=0)
+    if request.if_none_match:
+        not_modified = request.if_none_match.contains(etag)
+    else:
+        if_modified_since = request.if_modified_since
+        not_modified = not collection and last_modified is not None and if_modified_since is not None \
+            and last_modified <= if_modified_since.replace(tzinfo=None)
+    response = Response(status=304) if not_modified else jsonify(build())
+    response.set_etag(etag)
+    if last_modified is not None:
+        response.last_modified = last_modified
+    return response
+
+def api_listing(model, keys, fields):
+    count, last_modified = db.session.query(func.count(), func.max(model.updated_at)).select_from(model).one()
+
+    def build():
+        # The sort keys are always selected so the page cursors can be built
+        columns = keys + [getattr(model, field) for field in fields
+                          if field not in [key.key for key in keys] and field != 'genres']
+        records, pager = keyset_page(db.session.query(*columns), keys)
+        genres = None
+        if 'genres' in fields:
+            # The genres of the whole page are loaded at once
+            genres = genre_names(*API_GENRE_TABLES[model.__tablename__], [record.id for record in records])
+        return {'data': [api_record(record, fields, genres) for record in records],
+                'next': pager['next'], 'prev': pager['prev']}
+    return api_response(last_modified, [count, last_modified], build, collection=True)
+
+def api_detail(model, record_id, fields):
+    record = model.query.get(record_id)
+    if record is None:
+        return api_error('not found', 404)
+    return api_response(record.updated_at, [record.id, record.updated_at],
+                        lambda: {'data': api_record(record, fields)})
+
+@bp.route('/venues')
+def venues():
+    fields = api_fields(API_VENUE_FIELDS)
+    if fields is None:
+        return api_error(f'fields must be in {API_VENUE_FIELDS}', 400)
+    return api_listing(Venue, [Venue.id], fields)
+
+@bp.route('/venues/<int:venue_id>')
+def venue(venue_id):
+    fields = api_fields(API_VENUE_FIELDS)
+    if fields is None:
+        return api_error(f'fields must be in {API_VENUE_FIELDS}', 400)
+    return api_detail(Venue, venue_id, fields)
+
+@bp.route('/artists')
+def artists():
+    fields = api_fields(API_ARTIST_FIELDS)
+    if fields is None:
+        return api_error(f'fields must be in {API_ARTIST_FIELDS}', 400)
+    return api_listing(Artist, [Artist.id], fields)
+
+@bp.route('/artists/<int:artist_id>')
+def artist(artist_id):
+    fields = api_fields(API_ARTIST_FIELDS)
+    if fields is None:
+        return api_error(f'fields must be in {API_ARTIST_FIELDS}', 400)
+    return api_detail(Artist, artist_id, fields)
+
+# Version of the shows data for the ETag and Last-Modified of the shows responses
+# Shows are never updated, they are only added or deleted with their venue
+# but they carry the venues and artists names so their versions are part of the shows version
+def shows_version():
+    count, last_modified, venues_modified, artists_modified = db.session.query(
+        func.count(), func.max(showTable.c.created_at),
+        db.session.query(func.max(Venue.updated_at)).as_scalar(),
+        db.session.query(func.max(Artist.updated_at)).as_scalar()).select_from(showTable).one()
+    last_modified = max(filter(None, [last_modified, venues_modified, artists_modified]), default=None)
+    return last_modified, [count, last_modified]
+
+# A page of the shows of a query, with the ETag of all the shows
+def api_show_listing(query, fields):
+    last_modified, version = shows_version()
+
+    def build():
+        records, pager = keyset_page(query, SHOW_PAGE_KEYS)
+        return {'data': [api_record(record, fields) for record in records],
+                'next': pager['next'], 'prev': pager['prev']}
+    return api_response(last_modified, version, build, collection=True)
+
+# ?from= and ?to= (YYYY-MM-DD, both included) keep the shows of these days in the time zone ?tz=
+@bp.route('/shows')
+def shows():
+    fields = api_fields(API_SHOW_FIELDS)
+    if fields is None:
+        return api_error(f'fields must be in {API_SHOW_FIELDS}', 400)
+    try:
+        start, end = requested_range()
+    except ValueError:
+        return api_error('from and to must be dates like 2020-05-21', 400)
+    return api_show_listing(shows_between(show_listing(), start, end), fields)
+
+@bp.route('/shows/city/<city>')
+def city_shows(city):
+    fields = api_fields(API_SHOW_FIELDS)
+    if fields is None:
+        return api_error(f'fields must be in {API_SHOW_FIELDS}', 400)
+    return api_show_listing(city_week_shows(city, request.args.get('state')), fields)
+
+# The shows of a month grouped by day, in the time zone ?tz=
+def api_calendar(model, entity_column, record_id, year, month):
+    fields = api_fields(API_SHOW_FIELDS)
+    if fields is None:
+        return api_error(f'fields must be in {API_SHOW_FIELDS}', 400)
+    if not 1 <= month <= 12 or not 1900 <= year <= 2999:
+        return api_error('not found', 404)
+    if model.query.get(record_id) is None:
+        return api_error('not found', 404)
+    last_modified, version = shows_version()
+
+    def build():
+        weeks = month_shows(entity_column, record_id, year, month)
+        days = {day.isoformat(): [api_record(show, fields) for show in day_shows]
+                for week in weeks for day, day_shows in week if day.month == month and day_shows}
+        return {'data': {'year': year, 'month': month, 'timezone': request_timezone(), 'days': days}}
+    return api_response(last_modified, version, build, collection=True)
+
+@bp.route('/venues/<int:venue_id>/calendar/<int:year>/<int:month>')
+def venue_calendar(venue_id, year, month):
+    return api_calendar(Venue, showTable.c.venue_id, venue_id, year, month)
+
+@bp.route('/artists/<int:artist_id>/calendar/<int:year>/<int:month>')
+def artist_calendar(artist_id, year, month):
+    return api_calendar(Artist, showTable.c.artist_id, artist_id, year, month)
+
+
+# Book many shows at once, e.g. a whole tour
+# The body is {"shows": [{"artist_id", "venue_id", "start_time"}, ...]}. The valid rows which do not
+# conflict with another show are inserted in one transaction, the answer has the result of each row.
+@bp.route('/shows/bulk', methods=['POST'])
+def bulk_book_shows():
+    body = request.get_json(silent=True)
+    rows = body.get('shows') if isinstance(body, dict) else None
+    if not isinstance(rows, list) or not all(isinstance(row, dict) for row in rows):
+        return api_error('The body must be {"shows": [{"artist_id", "venue_id", "start_time"}, ...]}', 400)
+    if len(rows) > current_app.config['BULK_BOOKING_MAX_ROWS']:
+        return api_error(f"At most {current_app.config['BULK_BOOKING_MAX_ROWS']} shows can be booked at once", 400)
+    try:
+        results = book_shows(rows)
+        db.session.commit()
+    except SQLAlchemyError:
+        db.session.rollback()
+        current_app.logger.exception('Bulk booking failed')
+        return api_error('The shows could not be booked', 500)
+    booked = [result for result in results if result['status'] == 'booked']
+    if booked:
+        page_cache.invalidate('shows', 'venues', *{f"venue:{result['venue_id']}" for result in booked},
+                              *{f"artist:{result['artist_id']}" for result in booked})
+    return jsonify({'booked': len(booked), 'rejected': len(results) - len(booked), 'results': results})
+
+
+#  Export
+#  ----------------------------------------------------------------
+# Dumps of the venues, artists or shows as CSV or JSON lines, with the fields of the API
+# The rows are read with a server side cursor (yield_per) and written as they come, so the memory
+# does not grow with the catalog. since keeps the venues and artists updated (the shows added) since then.
+
+EXPORT_FIELDS = {
+    'venues': API_VENUE_FIELDS,
+    'artists': API_ARTIST_FIELDS,
+    'shows': API_SHOW_FIELDS + ['created_at'],
+}
+EXPORT_FORMATS = {'csv': 'text/csv', 'jsonl': 'application/x-ndjson'}
+
+# Yield the records of an export one at a time, as dictionaries of the EXPORT_FIELDS of the kind
+def export_records(kind, since=None):
+    fields = EXPORT_FIELDS[kind]
+    batch_size = current_app.config['EXPORT_BATCH_SIZE']
+    if kind == 'shows':
+        query = show_listing()
+        if since is not None:
+            query = query.filter(showTable.c.created_at >= since)
+        query = query.order_by(*SHOW_PAGE_KEYS)
+    else:
+        model = Venue if kind == 'venues' else Artist
+        query = db.session.query(*[getattr(model, field) for field in fields if field != 'genres'])
+        if since is not None:
+            query = query.filter(model.updated_at >= since)
+        query = query.order_by(model.id)
+    batch = []
+    for record in query.yield_per(batch_size):
+        batch.append(record)
+        if len(batch) == batch_size:
+            yield from export_batch(kind, batch)
+            batch = []
+    yield from export_batch(kind, batch)
+
+# The genres of a batch are loaded at once
+def export_batch(kind, batch):
+    fields = EXPORT_FIELDS[kind]
+    genres = None
+    if 'genres' in fields:
+        genres = genre_names(*API_GENRE_TABLES[kind], [record.id for record in batch])
+    return [api_record(record, fields, genres) for record in batch]
+
+# CSV cells as `flask import` reads them: genres as 'Jazz,Rock' and the booleans as true or false
+def csv_value(value):
+    if isinstance(value, list):
+        return ','.join(value)
+    if isinstance(value, bool):
+        return 'true' if value else 'false'
+    return '' if value is None else value
+
+# Yield the export file in chunks of about 64KB
+def export_chunks(kind, records, file_format):
+    fields = EXPORT_FIELDS[kind]
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    if file_format == 'csv':
+        writer.writerow(fields)
+    for record in records:
+        if file_format == 'csv':
+            writer.writerow([csv_value(record[field]) for field in fields])
+        else:
+            buffer.write(json.dumps(record) + '\n')
+        if buffer.tell() > 65536:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
+# The since of the next incremental export: the start of this one less EXPORT_OVERLAP_SECONDS
+# updated_at and created_at are set when their transaction starts, a write still running when the
+# export starts commits later with an older time. The rows of the last seconds are exported again.
+def next_export_since():
+    return utc_now() - timedelta(seconds=current_app.config['EXPORT_OVERLAP_SECONDS'])
+
+# GET /api/v1/export/venues.csv, ?since= an ISO timestamp for an incremental export
+# X-Export-Next-Since is the since of the next incremental export
+@bp.route('/export/<any(venues, artists, shows):kind>.<any(csv, jsonl):file_format>')
+def export(kind, file_format):
+    since = None
+    if request.args.get('since'):
+        try:
+            since = str_to_datetime(request.args['since'])
+        except (ValueError, OverflowError):
+            return api_error('since must be a timestamp like 2020-05-21T21:30:00Z', 400)
+    next_since = next_export_since()
+    # The request context is kept while the response is written, the session reads the rows
+    response = Response(stream_with_context(export_chunks(kind, export_records(kind, since), file_format)),
+                        mimetype=EXPORT_FORMATS[file_format])
+    response.headers['Content-Disposition'] = f'attachment; filename={kind}.{file_format}'
+    response.headers['X-Export-Next-Since'] = next_since.isoformat()
+    return response
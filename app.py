@@ -2,636 +2,128 @@
 # Imports
 # ----------------------------------------------------------------------------#
 
-import json
-import dateutil.parser
-import babel
-import datetime
-
-from babel import Locale
-from flask import Flask, render_template, request, Response, flash, redirect, url_for
-from flask_moment import Moment
-from flask_sqlalchemy import SQLAlchemy
-from sqlalchemy.orm import backref
-from sqlalchemy.sql.functions import concat
-from flask_migrate import Migrate
 import logging
+import os
 from logging import Formatter, FileHandler
-from flask_wtf import FlaskForm
-from forms import *
-
-# ----------------------------------------------------------------------------#
-# App Config.
-# ----------------------------------------------------------------------------#
-
-app = Flask(__name__)
-moment = Moment(app)
-app.config.from_object('config')
-db = SQLAlchemy(app)
-
-# connect to a local postgresql database
-migrate = Migrate(app, db)
-
-
-# ----------------------------------------------------------------------------#
-# Models.
-# ----------------------------------------------------------------------------#
-# The relation ship will be Many-to-Many
-# Show Model As Assoiciation Table
-showTable = db.Table('shows',
-db.Column('artist_id', db.Integer, db.ForeignKey('artists.id'), primary_key=True),
-db.Column('venue_id', db.Integer, db.ForeignKey('venues.id'), primary_key=True),
-db.Column('start_time',db.String(120), primary_key=True)
-)
-
-# Venue Model connected with Artist through Show
-class Venue(db.Model):
-    __tablename__ = 'venues'
-
-    id = db.Column(db.Integer, primary_key=True)
-    name = db.Column(db.String)
-    city = db.Column(db.String(120))
-    state = db.Column(db.String(120))
-    address = db.Column(db.String(120))
-    phone = db.Column(db.String(120))
-    genres = db.Column(db.String(120))
-    image_link = db.Column(db.String(500), default="/static/img/venue.png")
-    facebook_link = db.Column(db.String(120))
-    website = db.Column(db.String(120))
-    seeking_talent = db.Column(db.Boolean, default=True)
-    seeking_description = db.Column(db.String(500), default="We are on the lookout for a local artist")
-    # relationShip Part
-    artists = db.relationship("Artist", secondary=showTable, backref=db.backref('venues', lazy=True))
-
-# Artist Model connected with Venue through Show
-class Artist(db.Model):
-    __tablename__ = 'artists'
-
-    id = db.Column(db.Integer, primary_key=True)
-    name = db.Column(db.String)
-    city = db.Column(db.String(120))
-    state = db.Column(db.String(120))
-    phone = db.Column(db.String(120))
-    genres = db.Column(db.String(120))
-    image_link = db.Column(db.String(500), default="/static/img/artist.png")
-    facebook_link = db.Column(db.String(120))
-    website = db.Column(db.String(120))
-    seeking_venue = db.Column(db.Boolean, default=True)
-    seeking_description = db.Column(db.String(500), default="Looking for shows to perform")
 
-# ----------------------------------------------------------------------------#
-# Filters.
-# ----------------------------------------------------------------------------#
-
-# format_datetime function is used with jijna
-def format_datetime(value, format='full'):
-    babel.dates.LC_TIME = Locale.parse('en_US')
-    date = dateutil.parser.parse(value)
-    if format == 'full':
-        format = "EEEE MMMM, d, y 'at' h:mma"
-    elif format == 'medium':
-        format = "EE MM, dd, y h:mma"
-    return babel.dates.format_datetime(date, format, locale='en')
-
-app.jinja_env.filters['datetime'] = format_datetime
+import click
+from flask import Flask, render_template
+from flask_moment import Moment
 
-# Convert string with specific format to datetime
-# used to compare the Show date to know if it is an upcoming or past show
-def str_to_datetime(date):
-    return datetime.strptime(date, '%Y-%m-%d %H:%M:%S')
+import api
+import artists
+import main
+import shows
+import venues
+from assets import Assets
+from cache import make_cache
+from commands import COMMANDS
+from config import CONFIGS
+from filters import format_datetime
+from models import db, include_migrated_object
+from parallel import ParallelQueries
+from pooling import PoolMetrics
+from replicas import ReplicaRouter
+from templating import init_templates, warm_templates
+from tiles import show_tile
 
 # ----------------------------------------------------------------------------#
-# Controllers.
+# App Config.
 # ----------------------------------------------------------------------------#
 
-@app.route('/')
-def index():
-    return render_template('pages/home.html')
-
-
-#  Venues
-#  ----------------------------------------------------------------
-
-# Venues home page: In this page all venues are listed
-@app.route('/venues')
-def venues():
-    data = []
-    upcoming_shows = 0
-    # Get unique cities first to fill the data array in the correct way
-    city_records = Venue.query.distinct(concat(Venue.city, Venue.state)).all()
-    for c_record in city_records:
-        venues_data = []
-        # Get all the venues in each city
-        venue_records = Venue.query.filter(Venue.city.like(c_record.city)) \
-            .filter(Venue.state.like(c_record.state)).all()
-        for v_record in venue_records:
-            # Get upcoming show
-            upcoming_shows = 0
-            shows = db.session.query(showTable)\
-            .join(Venue, Venue.id == showTable.c.venue_id)\
-            .join(Artist, Artist.id == showTable.columns.artist_id)\
-            .filter(Venue.id == v_record.id).all()
-            for show in shows:
-                if str_to_datetime(show.start_time) > datetime.utcnow():
-                    upcoming_shows += 1
-            # Append each venue data to the venues list
-            venues_data.append({'id': v_record.id, 'name': v_record.name, 'num_upcomig_shows': upcoming_shows})
-        # Append each city to the data list
-        data.append({'city': c_record.city, 'state': c_record.state, 'venues': venues_data})
-    return render_template('pages/venues.html', areas=data)
-
-
-# Venues search : This page created to show the results of the search in the navigtion bar
-@app.route('/venues/search', methods=['POST'])
-def search_venues():
-    # Get the result word and retrieve all the matched results from database
-    # Search is case insensitive
-    search_word = request.form['search_term']
-    results = Venue.query.filter(Venue.name.ilike(f'%{search_word}%')).all()
-    data = []
-    for result in results:
-        upcoming_shows = 0
-        # Get upcoming show counts
-        shows = db.session.query(showTable)\
-            .join(Venue, Venue.id == showTable.c.venue_id)\
-            .join(Artist, Artist.id == showTable.columns.artist_id)\
-            .filter(Venue.id == result.id).all()
-        for show in shows:
-            if str_to_datetime(show.start_time) > datetime.utcnow():
-                upcoming_shows += 1
-        # Add the result needed data to the data object
-        data.append({'id': result.id, 'name': result.name, 'num_upcoming_shows': upcoming_shows})
-    # Create the response with the right way to be rendered
-    response = {
-        "count": len(results),
-        "data": data
-    }
-    return render_template('pages/search_venues.html', results=response,
-                           search_term=request.form.get('search_term', ''))
-
-
-# Venue page: This page will show each venue details data and it's show
-@app.route('/venues/<int:venue_id>')
-def show_venue(venue_id):
-    # Use Artist form to show the name input field to search for an artist
-    form = ArtistForm()
-    data = {}
-    # Get the required venue to show its details with its id
-    required_venue = Venue.query.get(venue_id)
-    # Convert genres to list to be rendered in the correct way
-    required_venue.genres = (required_venue.genres.replace('{', '')).replace('}', '').split(',')
-    # Update the data dictionary with the venue details 
-    data.update({
-        'id': required_venue.id,
-        'name': required_venue.name,
-        "genres": required_venue.genres,
-        "address": required_venue.address,
-        "city": required_venue.city,
-        "state": required_venue.state,
-        "phone": required_venue.phone,
-        "website": required_venue.website,
-        "facebook_link": required_venue.facebook_link,
-        "seeking_talent": required_venue.seeking_talent,
-        "seeking_description": required_venue.seeking_description,
-        "image_link": required_venue.image_link
-    })
-    # Get the shows details for this venue by using the relationships between the tables "Models"
-    past_shows = []
-    upcoming_shows = []
-    past_count = 0
-    upcoming_count = 0
-    artists_shows_infos = db.session.query(showTable,Artist.name.label('artist_name'), Artist.image_link.label('artist_image'))\
-            .join(Venue, Venue.id == showTable.columns.venue_id)\
-            .join(Artist, Artist.id == showTable.columns.artist_id)\
-            .filter(Venue.id == required_venue.id).all()
-    for info in artists_shows_infos:
-        # Check if the show was played or will be played in upcoming days
-        if str_to_datetime(info.start_time) > datetime.utcnow():
-            upcoming_count += 1
-            upcoming_shows.append({
-                "artist_id": info.artist_id,
-                "artist_name": info.artist_name,
-                "artist_image_link": info.artist_image,
-                "start_time": info.start_time
-            })
-        else:
-            past_count += 1
-            past_shows.append({
-                "artist_id": info.artist_id,
-                "artist_name": info.artist_name,
-                "artist_image_link": info.artist_image,
-                "start_time": info.start_time
-            })
-    # Update the data dictionary with the shows information
-    data.update({"past_shows": past_shows})
-    data.update({"upcoming_shows": upcoming_shows})
-    data.update({"past_shows_count": past_count})
-    data.update({"upcoming_shows_count": upcoming_count})
-    return render_template('pages/show_venue.html', venue=data, form=form) 
-
-
-#  Create Venue: The next two methods
-#   1- GET method implement venue page
-@app.route('/venues/create', methods=['GET'])
-def create_venue_form():
-    form = VenueForm()
-    return render_template('forms/new_venue.html', form=form)
-
-
-#   2- POST method submit the form entry
-@app.route('/venues/create', methods=['POST'])
-def create_venue_submission():
-    error = False
-    try:
-        # Get the data from the form to save it in the database
-        venue = Venue(
-            name=request.form['name'],
-            city=request.form['city'],
-            state=request.form['state'],
-            address=request.form['address'],
-            phone=request.form['phone'],
-            genres=request.form.getlist('genres'),
-            facebook_link=request.form['facebook_link']
-        )
-        # Add the Venue Object to the db session
-        db.session.add(venue)
-        db.session.commit()
-    except:
-        # Error handling by flash a warning message
-        error = True
-        db.session.rollback()
-        flash(f"An error occurred. Venue {request.form['name']} could not be listed.", 'warning')
-    finally:
-        # Close the session to be used with other processs
-        db.session.close()
-
-    # Flash success message after correct database insertion
-    if not error:
-        flash(f"Venue {request.form['name']} was successfully listed!", 'info')
-    # Return to the home page
-    return render_template('pages/home.html')
-
-
-#  Delete Venue
-#  ----------------------------------------------------------------
-
-@app.route('/venues/<venue_id>', methods=['DELETE'])
-def delete_venue(venue_id):
-    error = False
-    try:
-        # Delete venue by id
-        delete_venue = Venue.query.get(venue_id)
-        db.session.delete(delete_venue)
-        db.session.commit()
-    except:
-        # Error handling 
-        error = True
-        db.session.rollback()
-    finally:
-        # Close the session to be used with other processs
-        db.session.close()
-
-    return render_template('pages/home.html')
-
-
-#  Artists
-#  ----------------------------------------------------------------
-# Artists: In this page all the artists will be listed
-@app.route('/artists')
-def artists():
-    data = []
-    # Get all the artist from db
-    all_artists = Artist.query.all()
-    for artist in all_artists:
-        data.append({'id': artist.id, 'name': artist.name})
-    return render_template('pages/artists.html', artists=data)
-
-# Search artists: Search on artists with partial string search. It is case-insensitive.
-@app.route('/artists/search', methods=['POST'])
-def search_artists():
-    search_word = request.form['search_term']
-    # Get all the results that match the search word from db
-    results = Artist.query.filter(Artist.name.ilike(f'%{search_word}%')).all()
-    data = []
-    for result in results:
-        # Update data list with the matched artists
-        data.append({'id': result.id, 'name': result.name, 'num_upcoming_shows': 0})
-    response = {
-        "count": len(results),
-        "data": data
-    }
-    return render_template('pages/search_artists.html', results=response,
-                           search_term=request.form.get('search_term', ''))
-
-# Artist Page: In this page all the information of the selected Artist is shown
-@app.route('/artists/<int:artist_id>')
-def show_artist(artist_id):
-    data = {}
-    # Get the required artist to show its details with its id
-    required_artist = Artist.query.get(artist_id)
-    # Convert genres to list to be rendered in the correct way
-    required_artist.genres = (required_artist.genres.replace('{', '')).replace('}', '').split(',')
-    # Update the data dictionary with the artist details 
-    data.update({
-        'id': required_artist.id,
-        'name': required_artist.name,
-        "genres": required_artist.genres,
-        "city": required_artist.city,
-        "state": required_artist.state,
-        "phone": required_artist.phone,
-        "website": required_artist.website,
-        "facebook_link": required_artist.facebook_link,
-        "seeking_venue": required_artist.seeking_venue,
-        "seeking_description": required_artist.seeking_description,
-        "image_link": required_artist.image_link
-    })
-    # Get the shows details for this artist by using the relationships between the tables "Models"
-    past_shows = []
-    upcoming_shows = []
-    past_count = 0
-    upcoming_count = 0
-    venues_shows_infos = db.session.query(showTable,Venue.name.label('venue_name'), Venue.image_link.label('venue_image'))\
-            .join(Venue, Venue.id == showTable.columns.venue_id)\
-            .join(Artist, Artist.id == showTable.columns.artist_id)\
-            .filter(Artist.id == required_artist.id).all()
-    for info in venues_shows_infos:
-        # Check if the show was played or will be played in upcoming days
-        if (str_to_datetime(info.start_time) > datetime.utcnow()):
-            upcoming_count += 1
-            upcoming_shows.append({
-                "venue_id": info.venue_id,
-                "venue_name": info.venue_name,
-                "venue_image_link": info.venue_image,
-                "start_time": info.start_time
-            })
-        else:
-            past_count += 1
-            past_shows.append({
-                "venue_id": info.venue_id,
-                "venue_name": info.venue_name,
-                "venue_image_link": info.venue_image,
-                "start_time": info.start_time
-            })
-    # Update the data dictionary with the shows information
-    data.update({"past_shows": past_shows})
-    data.update({"upcoming_shows": upcoming_shows})
-    data.update({"past_shows_count": past_count})
-    data.update({"upcoming_shows_count": upcoming_count})
-
-    return render_template('pages/show_artist.html', artist=data)
-
-
-#  Create Artist
-#  ----------------------------------------------------------------
-#   1- GET method implement artist page
-@app.route('/artists/create', methods=['GET'])
-def create_artist_form():
-    form = ArtistForm()
-    return render_template('forms/new_artist.html', form=form)
-
-#   2- POST method submit the form entry
-@app.route('/artists/create', methods=['POST'])
-def create_artist_submission():
-    error = False
-    try:
-        # Get the data from the form to save it in the database
-        artist = Artist(
-            name=request.form['name'],
-            city=request.form['city'],
-            state=request.form['state'],
-            phone=request.form['phone'],
-            genres=request.form.getlist('genres'),
-            facebook_link=request.form['facebook_link']
+moment = Moment()
+
+# The pages of each part of the site
+# Their views import the forms (WTForms) when they render them, so the workers start without them
+BLUEPRINTS = [main.bp, venues.bp, artists.bp, shows.bp, api.bp]
+
+
+# Build the app with the settings of config: a config class (or object) or a name of config.CONFIGS
+# Without it FYYUR_ENV picks the settings: development (default), testing or production
+# gunicorn runs 'app:create_app()' and `flask` finds create_app by itself (FLASK_APP=app)
+def create_app(config=None):
+    config = config or os.environ.get('FYYUR_ENV', 'development')
+    app = Flask(__name__)
+    app.config.from_object(CONFIGS[config] if isinstance(config, str) else config)
+    # Bytecode cache of the templates, set before anything uses app.jinja_env
+    init_templates(app)
+    db.init_app(app)
+    moment.init_app(app)
+
+    # Flask-Migrate imports alembic and mako, only the `flask` commands (flask db ...) need it
+    # Scripts calling flask_migrate.upgrade() themselves first run Migrate(app, db)
+    if click.get_current_context(silent=True) is not None:
+        from flask_migrate import Migrate
+        Migrate(app, db, include_object=include_migrated_object)
+
+    # Reads from the replica when one is configured, with read-your-writes after a submission
+    ReplicaRouter(app, db)
+
+    # Cache of the rendered read only pages (cache.page_cache)
+    app.extensions['page_cache'] = make_cache(app.config)
+    # and of the show tiles, show_tile() of the templates
+    app.extensions['fragment_cache'] = make_cache(app.config, app.config['FRAGMENT_CACHE_TYPE'],
+                                                  app.config['FRAGMENT_CACHE_MAX_ENTRIES'], default_ttl=0)
+
+    # asset_url() and asset_urls() of the templates, and the hashed bundles of static/dist/
+    Assets(app)
+
+    # Threads reading the independent queries of the detail pages at the same time
+    if app.config['PARALLEL_QUERIES']:
+        ParallelQueries(app)
+
+    # Opt-in per request SQL profiling: Server-Timing header, /debug/profile and slow queries log
+    if app.config['SQL_PROFILING']:
+        from profiling import SQLProfiler
+        SQLProfiler(app)
+
+    # Opt-in connection pool gauges and checkout wait times at /debug/pool
+    if app.config['POOL_METRICS']:
+        PoolMetrics(app, db)
+
+    app.jinja_env.filters['datetime'] = format_datetime
+    app.add_template_global(show_tile)
+    for blueprint in BLUEPRINTS:
+        app.register_blueprint(blueprint)
+    for command in COMMANDS:
+        app.cli.add_command(command)
+
+    app.register_error_handler(404, not_found_error)
+    app.register_error_handler(500, server_error)
+    if not app.debug and not app.testing:
+        file_handler = FileHandler('error.log')
+        file_handler.setFormatter(
+            Formatter('%(asctime)s %(levelname)s: %(message)s [in %(pathname)s:%(lineno)d]')
         )
-        # Add the Artist Object to the db session
-        db.session.add(artist)
-        db.session.commit()
-    except:
-        # Error handling by flash a warning message
-        error = True
-        db.session.rollback()
-        flash(f"An error occurred. Artist {request.form['name']} could not be listed.", 'info')
-    finally:
-        # Close the session to be used with other processs
-        db.session.close()
-
-    # Flash success message after correct database insertion
-    if not error:
-        flash(f"Artist {request.form['name']} was successfully listed!", 'info')
-    # Return to the home page
-    return render_template('pages/home.html')
+        app.logger.setLevel(logging.INFO)
+        file_handler.setLevel(logging.INFO)
+        app.logger.addHandler(file_handler)
+        app.logger.info('errors')
 
+    # With gunicorn --preload the workers are forked with the templates already compiled
+    if app.config['WARM_TEMPLATES']:
+        warm_templates(app)
+    return app
 
-#  Update
-#  ----------------------------------------------------------------
-@app.route('/artists/<int:artist_id>/edit', methods=['GET'])
-def edit_artist(artist_id):
-    form = ArtistForm()
-    # Get the required artist to show its details with its id
-    required_artist = Artist.query.get(artist_id)
-    # Convert genres to list to be rendered in the correct way
-    required_artist.genres = (required_artist.genres.replace('{', '')).replace('}', '').split(',')
-    artist = {
-        "id": required_artist.id,
-        "name": required_artist.name,
-        "genres": required_artist.genres,
-        "city": required_artist.city,
-        "state": required_artist.state,
-        "phone": required_artist.phone,
-        "website": required_artist.website,
-        "facebook_link": required_artist.facebook_link,
-        "seeking_venue": required_artist.seeking_venue,
-        "seeking_description":required_artist.seeking_description,
-        "image_link": required_artist.image_link
-    }
-    return render_template('forms/edit_artist.html', form=form, artist=artist)
 
-# Edit Artist
-@app.route('/artists/<int:artist_id>/edit', methods=['POST'])
-def edit_artist_submission(artist_id):
-    error = False
-    update_artist = Artist.query.get(artist_id)
-    try:
-        # Update artist information from the from entry
-        update_artist.name = request.form['name']
-        update_artist.genres = request.form.getlist('genres')
-        update_artist.city = request.form['city']
-        update_artist.state = request.form['state']
-        update_artist.phone = request.form['phone']
-        update_artist.facebook_link = request.form['facebook_link']
-        db.session.commit()
-    except:
-        # Error handling by flash a warning message
-        error = True
-        db.session.rollback()
-        flash(f"An error occurred. Artist {request.form['name']} could not be updated.", 'info')
-    finally:
-        # Close the session to be used with other processs
-        db.session.close()
-
-    # Flash success message after correct database insertion
-    if not error:
-        flash(f"Artist {request.form['name']} was successfully updated!", 'info')
-
-    return redirect(url_for('show_artist', artist_id=artist_id))
-
-
-@app.route('/venues/<int:venue_id>/edit', methods=['GET'])
-def edit_venue(venue_id):
-    form = VenueForm()
-    # Get the required artist to show its details with its id
-    required_venue = Venue.query.get(venue_id)
-    # Convert genres to list to be rendered in the correct way
-    required_venue.genres = (required_venue.genres.replace('{', '')).replace('}', '').split(',')
-    venue = {
-        "id": required_venue.id,
-        "name": required_venue.name,
-        "genres": required_venue.genres,
-        "address": required_venue.address,
-        "city": required_venue.city,
-        "state": required_venue.state,
-        "phone": required_venue.phone,
-        "website": required_venue.website,
-        "facebook_link": required_venue.facebook_link,
-        "seeking_talent": required_venue.seeking_talent,
-        "seeking_description":required_venue.seeking_description,
-        "image_link": required_venue.image_link
-    }
-    return render_template('forms/edit_venue.html', form=form, venue=venue)
-
-
-@app.route('/venues/<int:venue_id>/edit', methods=['POST'])
-def edit_venue_submission(venue_id):
-    error = False
-    update_venue = Venue.query.get(venue_id)
-    try:
-        # Update venue information from the from entry
-        update_venue.name = request.form['name']
-        update_venue.genres = request.form.getlist('genres')
-        update_venue.city = request.form['city']
-        update_venue.state = request.form['state']
-        update_venue.address = request.form['address']
-        update_venue.phone = request.form['phone']
-        update_venue.facebook_link = request.form['facebook_link']
-        db.session.commit()
-    except:
-        # Error handling by flash a warning message
-        error = True
-        db.session.rollback()
-        flash(f"An error occurred. Venue {request.form['name']} could not be updated.", 'info')
-    finally:
-        # Close the session to be used with other processs
-        db.session.close()
-
-    # Flash success message after correct database insertion
-    if not error:
-        flash(f"Venue {request.form['name']} was successfully updated!", 'info')
-    return redirect(url_for('show_venue', venue_id=venue_id))
-
-
-#  Shows
-#  ----------------------------------------------------------------
-# Shows Page: In this page all shows will be listed
-@app.route('/shows')
-def shows():
-    data = []
-    # Get all the artist from db
-    all_shows = db.session.query(showTable,Venue.name.label('venue_name'),
-    Artist.name.label('artist_name'),Artist.image_link.label('artist_image'))\
-            .join(Venue, Venue.id == showTable.columns.venue_id)\
-            .join(Artist, Artist.id == showTable.columns.artist_id)\
-            .all()
-    for show_info in all_shows:
-        data.append({"venue_id": show_info.venue_id,
-                     "venue_name": show_info.venue_name,
-                     "artist_id": show_info.artist_id,
-                     "artist_name": show_info.artist_name,
-                     "artist_image_link": show_info.artist_image,
-                     "start_time": show_info.start_time
-                     })
-    return render_template('pages/shows.html', shows=data)
-
-# Create Show: create a show
-@app.route('/shows/create')
-def create_shows():
-    # renders form. do not touch.
-    form = ShowForm()
-    return render_template('forms/new_show.html', form=form)
-
-# Create Show: create a show from venue page.
-@app.route('/shows/<int:venue_id>/create/', methods=['POST'])
-def create_shows_from_venue(venue_id):
-    form = ShowForm()
-    data = {}
-    # Update the data dictionary with the show information from venue page
-    data.update({'venue_id':venue_id})
-    search_word = request.form['name']
-    artist = Artist.query.filter(Artist.name.ilike(f'%{search_word}%')).first()
-    data.update({'artist_id':artist.id})
-    # Flash a message to inform the user to enter only the start_time
-    flash('Please Set the Start_time only as the Venue ID and Artist ID are already filled', 'info')
-    return render_template('forms/book_artist/create.html', form= form, data=data)
-
-# POST method submit the form entry
-@app.route('/shows/create', methods=['POST'])
-def create_show_submission():
-    error = False
-    try:
-         # Get the data from the form to save it in the database
-        insertShow = showTable.insert().values(
-            {"venue_id":request.form['venue_id'], 
-            "artist_id":request.form['artist_id'], 
-            "start_time" : request.form['start_time']}
-            )
-        # Add the Show Object to the db session
-        db.session.execute(insertShow)
-        db.session.commit()
-    except:
-        # Error handling by flash a warning message
-        error = True
-        db.session.rollback()
-        flash(f"An error occurred. Show on {request.form['start_time']} could not be listed.", 'info')
-    finally:
-        # Close the session to be used with other processs
-        db.session.close()
-    
-    # Flash success message after correct database insertion
-    if not error:
-        flash(f"Show on {request.form['start_time']} was successfully listed!", 'info')
-    # Return to the home page
-    return render_template('pages/home.html')
-
-
-@app.errorhandler(404)
 def not_found_error(error):
     return render_template('errors/404.html'), 404
 
 
-@app.errorhandler(500)
 def server_error(error):
     return render_template('errors/500.html'), 500
 
-
-if not app.debug:
-    file_handler = FileHandler('error.log')
-    file_handler.setFormatter(
-        Formatter('%(asctime)s %(levelname)s: %(message)s [in %(pathname)s:%(lineno)d]')
-    )
-    app.logger.setLevel(logging.INFO)
-    file_handler.setLevel(logging.INFO)
-    app.logger.addHandler(file_handler)
-    app.logger.info('errors')
-
 # ----------------------------------------------------------------------------#
 # Launch.
 # ----------------------------------------------------------------------------#
 
 # Default port:
 if __name__ == '__main__':
-    app.run()
+    create_app().run()
 
 # Or specify port manually:
 '''
 if __name__ == '__main__':
     port = int(os.environ.get('PORT', 5000))
-    app.run(host='0.0.0.0', port=port)
+    create_app().run(host='0.0.0.0', port=port)
 '''
@@ -0,0 +1,216 @@
+from flask import Blueprint, render_template, request, flash, redirect, url_for, current_app, abort
+from sqlalchemy import func
+from sqlalchemy.orm import joinedload
+
+from cache import page_cache, cached_page, add_cache_tags
+from models import db, showTable, artistGenreTable, Venue, Artist
+from queries import get_genres, genre_member_ids, keyset_page, search_names, invalidate_search_index, \
+    refresh_typeahead, upcoming_show_counts, split_shows, details_with_shows
+from replicas import read_only
+
+# ----------------------------------------------------------------------------#
+# Artists.
+# ----------------------------------------------------------------------------#
+
+bp = Blueprint('artists', __name__)
+
+# Artists: In this page all the artists will be listed
+@bp.route('/artists')
+@cached_page('artists')
+def artists():
+    data = []
+    # Get one page of the artists from db
+    page_artists, pager = keyset_page(db.session.query(Artist.id, Artist.name), [Artist.id])
+    for artist in page_artists:
+        data.append({'id': artist.id, 'name': artist.name})
+    return render_template('pages/artists.html', artists=data, pager=pager)
+
+# Artists by genre: the artists page with only the artists having the genre
+@bp.route('/artists/genres/<genre>')
+@cached_page('artists')
+def artists_by_genre(genre):
+    data = []
+    query = db.session.query(Artist.id, Artist.name)\
+        .filter(Artist.id.in_(genre_member_ids(artistGenreTable, artistGenreTable.c.artist_id, genre)))
+    page_artists, pager = keyset_page(query, [Artist.id])
+    for artist in page_artists:
+        data.append({'id': artist.id, 'name': artist.name})
+    return render_template('pages/artists.html', artists=data, pager=pager, genre=genre)
+
+# Search artists: Search on artists with partial string search. It is case-insensitive.
+@bp.route('/artists/search', methods=['POST'])
+@read_only
+def search_artists():
+    search_word = request.form['search_term']
+    # Get all the results that match the search word from db
+    results = search_names(Artist, search_word)
+    # Get upcoming show counts of all the results at once
+    upcoming_shows = upcoming_show_counts(Artist, [result_id for result_id, _ in results])
+    data = []
+    for result_id, result_name in results:
+        # Update data list with the matched artists
+        data.append({'id': result_id, 'name': result_name, 'num_upcoming_shows': upcoming_shows[result_id]})
+    response = {
+        "count": len(results),
+        "data": data
+    }
+    return render_template('pages/search_artists.html', results=response,
+                           search_term=request.form.get('search_term', ''))
+
+# The details of an artist shown by its page, None when there is no such artist
+def artist_details(artist_id):
+    # The genres come with the same statement
+    required_artist = Artist.query.options(joinedload(Artist.genres)).get(artist_id)
+    if required_artist is None:
+        return None
+    return {
+        'id': required_artist.id,
+        'name': required_artist.name,
+        "genres": [genre.name for genre in required_artist.genres],
+        "city": required_artist.city,
+        "state": required_artist.state,
+        "phone": required_artist.phone,
+        "website": required_artist.website,
+        "facebook_link": required_artist.facebook_link,
+        "seeking_venue": required_artist.seeking_venue,
+        "seeking_description": required_artist.seeking_description,
+        "image_link": required_artist.image_link
+    }
+
+# Artist Page: In this page all the information of the selected Artist is shown
+@bp.route('/artists/<int:artist_id>')
+@cached_page('artist:{artist_id}')
+def show_artist(artist_id):
+    # Get the required artist with its id and its shows, split into upcoming and past by the database
+    # Only the first shows of each section are loaded, the two reads run at the same time with PARALLEL_QUERIES
+    data, sections = details_with_shows(lambda: artist_details(artist_id), showTable.c.artist_id, artist_id,
+                                        Venue, showTable.c.venue_id, limit=current_app.config['DETAIL_SHOWS_LIMIT'])
+    if data is None:
+        abort(404)
+    upcoming_shows, upcoming_count = sections['upcoming']
+    past_shows, past_count = sections['past']
+    # The page shows the venues names and images so it changes with them
+    add_cache_tags(*{f"venue:{show['venue_id']}" for show in upcoming_shows + past_shows})
+    # Update the data dictionary with the shows information
+    data.update({"past_shows": past_shows})
+    data.update({"upcoming_shows": upcoming_shows})
+    data.update({"past_shows_count": past_count})
+    data.update({"upcoming_shows_count": upcoming_count})
+    data.update({"shows_limit": current_app.config['DETAIL_SHOWS_LIMIT']})
+
+    return render_template('pages/show_artist.html', artist=data)
+
+
+# Load more: the next tiles of a section of the artist page, fetched by the "Load more" button
+@bp.route('/artists/<int:artist_id>/shows/<any(upcoming, past):section>')
+@cached_page('artist:{artist_id}')
+def artist_shows(artist_id, section):
+    limit = current_app.config['DETAIL_SHOWS_LIMIT']
+    sections = split_shows(showTable.c.artist_id, artist_id, Venue, showTable.c.venue_id,
+                           limit=limit, offset=request.args.get('offset', 0, type=int), section=section)
+    add_cache_tags(*{f"venue:{show['venue_id']}" for show in sections[section][0]})
+    return render_template('pages/venue_tiles.html', shows=sections[section][0])
+
+
+#  Create Artist
+#  ----------------------------------------------------------------
+#   1- GET method implement artist page
+@bp.route('/artists/create', methods=['GET'])
+def create_artist_form():
+    from forms import ArtistForm
+    form = ArtistForm()
+    return render_template('forms/new_artist.html', form=form)
+
+#   2- POST method submit the form entry
+@bp.route('/artists/create', methods=['POST'])
+def create_artist_submission():
+    error = False
+    try:
+        # Get the data from the form to save it in the database
+        artist = Artist(
+            name=request.form['name'],
+            city=request.form['city'],
+            state=request.form['state'],
+            phone=request.form['phone'],
+            genres=get_genres(request.form.getlist('genres')),
+            facebook_link=request.form['facebook_link']
+        )
+        # Add the Artist Object to the db session
+        db.session.add(artist)
+        db.session.commit()
+        invalidate_search_index(Artist)
+        refresh_typeahead(Artist, artist.id, artist.name)
+        page_cache.invalidate('artists')
+    except:
+        # Error handling by flash a warning message
+        error = True
+        db.session.rollback()
+        flash(f"An error occurred. Artist {request.form['name']} could not be listed.", 'info')
+    finally:
+        # Close the session to be used with other processs
+        db.session.close()
+
+    # Flash success message after correct database insertion
+    if not error:
+        flash(f"Artist {request.form['name']} was successfully listed!", 'info')
+    # Return to the home page
+    return render_template('pages/home.html')
+
+
+#  Update
+#  ----------------------------------------------------------------
+@bp.route('/artists/<int:artist_id>/edit', methods=['GET'])
+def edit_artist(artist_id):
+    from forms import ArtistForm
+    form = ArtistForm()
+    # Get the required artist to show its details with its id
+    # The genres come with the same statement
+    required_artist = Artist.query.options(joinedload(Artist.genres)).get(artist_id)
+    artist = {
+        "id": required_artist.id,
+        "name": required_artist.name,
+        "genres": [genre.name for genre in required_artist.genres],
+        "city": required_artist.city,
+        "state": required_artist.state,
+        "phone": required_artist.phone,
+        "website": required_artist.website,
+        "facebook_link": required_artist.facebook_link,
+        "seeking_venue": required_artist.seeking_venue,
+        "seeking_description":required_artist.seeking_description,
+        "image_link": required_artist.image_link
+    }
+    return render_template('forms/edit_artist.html', form=form, artist=artist)
+
+# Edit Artist
+@bp.route('/artists/<int:artist_id>/edit', methods=['POST'])
+def edit_artist_submission(artist_id):
+    error = False
+    update_artist = Artist.query.get(artist_id)
+    try:
+        # Update artist information from the from entry
+        update_artist.name = request.form['name']
+        update_artist.genres = get_genres(request.form.getlist('genres'))
+        # Changing only the genres does not update the artist row itself
+        update_artist.updated_at = func.now()
+        update_artist.city = request.form['city']
+        update_artist.state = request.form['state']
+        update_artist.phone = request.form['phone']
+        update_artist.facebook_link = request.form['facebook_link']
+        db.session.commit()
+        invalidate_search_index(Artist)
+        refresh_typeahead(Artist, artist_id, request.form['name'])
+        page_cache.invalidate('artists', 'shows', f'artist:{artist_id}')
+    except:
+        # Error handling by flash a warning message
+        error = True
+        db.session.rollback()
+        flash(f"An error occurred. Artist {request.form['name']} could not be updated.", 'info')
+    finally:
+        # Close the session to be used with other processs
+        db.session.close()
+
+    # Flash success message after correct database insertion
+    if not error:
+        flash(f"Artist {request.form['name']} was successfully updated!", 'info')
+
+    return redirect(url_for('artists.show_artist', artist_id=artist_id))
@@ -0,0 +1,199 @@
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+import posixpath
+import re
+
+from flask import request, send_from_directory, url_for
+
+# ----------------------------------------------------------------------------#
+# Static assets.
+# ----------------------------------------------------------------------------#
+
+# The files of static/ concatenated, in order, into each bundle (names and sources relative to static/)
+# A bundle of one file only gets a hashed name, so it can be cached for good as well.
+BUNDLES = {
+    'css/fyyur.css': [
+        'css/bootstrap.min.css',
+        'css/layout.main.css',
+        'css/main.css',
+        'css/main.responsive.css',
+        'css/main.quickfix.css',
+    ],
+    # Run in <head> before the page is parsed
+    'js/head.js': [
+        'js/libs/modernizr-2.8.2.min.js',
+        'js/libs/moment.min.js',
+    ],
+    # Deferred, at the end of the page
+    'js/fyyur.js': [
+        'js/libs/jquery-1.11.1.min.js',
+        'js/libs/bootstrap-3.1.1.min.js',
+        'js/plugins.js',
+        'js/script.js',
+    ],
+    'js/respond.js': ['js/libs/respond-1.4.2.min.js'],
+    'js/delete.js': ['js/delete.js'],
+}
+
+# Folder of static/ the bundles are written to, with the manifest giving the hashed name of each bundle
+DIST_DIR = 'dist'
+MANIFEST = 'manifest.json'
+
+# The hashed files never change, browsers and proxies can keep them for a year without asking again
+IMMUTABLE = 'public, max-age=31536000, immutable'
+
+#  Minification
+#  ----------------------------------------------------------------
+
+# Quoted strings are matched first and kept as they are
+CSS_TOKENS = re.compile(r'''("(?:\\.|[^"\\])*"|'(?:\\.|[^'\\])*')|(/\*.*?\*/)|(\s+)''', re.S)
+CSS_URL = re.compile(r'''url\(\s*(['"]?)([^'")]+)\1\s*\)''')
+CSS_PUNCTUATION = re.compile(r'\s*([{};,>])\s*')
+SOURCE_MAP = re.compile(r'^\s*(//|/\*)# sourceMappingURL=.*$', re.M)
+
+
+def minify_css(text):
+    def token(match):
+        string, comment, space = match.groups()
+        if string:
+            return string
+        return '' if comment else ' '
+    text = CSS_TOKENS.sub(token, text)
+    # Strings were kept whole above, the punctuation inside them is left alone here
+    parts = re.split(r'''("(?:\\.|[^"\\])*"|'(?:\\.|[^'\\])*')''', text)
+    for i in range(0, len(parts), 2):
+        part = CSS_PUNCTUATION.sub(r'\1', parts[i])
+        parts[i] = part.replace(';}', '}').replace(': ', ':')
+    return ''.join(parts).strip()
+
+
+# Conservative: drops the indentation, the blank lines and the lines holding only a // comment
+# The line breaks are kept, our scripts rely on them to end some statements.
+# The libraries shipped already minified (*.min.js) are copied as they are.
+def minify_js(text):
+    lines = []
+    for line in text.splitlines():
+        line = line.strip()
+        if line and not line.startswith('//'):
+            lines.append(line)
+    return '\n'.join(lines)
+
+
+# Point the relative url() of a stylesheet moved from source_dir to out_dir at the same files
+def rebase_css_urls(text, source_dir, out_dir):
+    def rebase(match):
+        quote, url = match.groups()
+        if url.startswith(('/', 'data:', '#')) or '://' in url:
+            return match.group(0)
+        path, sep, suffix = url.partition('?') if '?' in url else url.partition('#')
+        moved = posixpath.relpath(posixpath.normpath(posixpath.join(source_dir, path)), out_dir)
+        return f'url({quote}{moved}{sep}{suffix}{quote})'
+    return CSS_URL.sub(rebase, text)
+
+
+def build_bundle(static_folder, sources):
+    texts = []
+    for source in sources:
+        with open(os.path.join(static_folder, source), encoding='utf-8') as file:
+            text = SOURCE_MAP.sub('', file.read())
+        if source.endswith('.css'):
+            texts.append(minify_css(rebase_css_urls(text, posixpath.dirname(source), DIST_DIR)))
+        else:
+            texts.append(text.strip() if source.endswith('.min.js') else minify_js(text))
+    # The ; ends a script missing its last one before the next file starts
+    return ('\n' if sources[0].endswith('.css') else ';\n').join(texts) + '\n'
+
+
+#  Build
+#  ----------------------------------------------------------------
+
+# Write the bundles to static/dist/ with the hash of their content in their names,
+# each with a .gz and (when the brotli package is installed) a .br variant, then the manifest.
+# The files of the previous builds are kept, pages cached before a deploy still link to them.
+# Return {bundle: path relative to static/}
+def build_assets(static_folder, bundles=None):
+    try:
+        import brotli
+    except ImportError:
+        brotli = None
+    out_folder = os.path.join(static_folder, DIST_DIR)
+    os.makedirs(out_folder, exist_ok=True)
+    manifest = {}
+    for name, sources in (bundles or BUNDLES).items():
+        content = build_bundle(static_folder, sources).encode('utf-8')
+        stem, ext = posixpath.splitext(posixpath.basename(name))
+        filename = f'{stem}.{hashlib.sha256(content).hexdigest()[:12]}{ext}'
+        path = os.path.join(out_folder, filename)
+        variants = [(path, content), (path + '.gz', gzip.compress(content, 9, mtime=0))]
+        if brotli is not None:
+            variants.append((path + '.br', brotli.compress(content, quality=11)))
+        for variant_path, data in variants:
+            if not os.path.exists(variant_path):
+                with open(variant_path, 'wb') as file:
+                    file.write(data)
+        manifest[name] = f'{DIST_DIR}/{filename}'
+    with open(os.path.join(out_folder, MANIFEST), 'w', encoding='utf-8') as file:
+        json.dump(manifest, file, indent=2, sort_keys=True)
+    return manifest
+
+
+# Files of static/dist/ that no bundle of the manifest uses anymore
+def stale_assets(static_folder, manifest):
+    out_folder = os.path.join(static_folder, DIST_DIR)
+    current = {posixpath.basename(path) for path in manifest.values()}
+    return [os.path.join(out_folder, filename) for filename in sorted(os.listdir(out_folder))
+            if filename != MANIFEST and re.sub(r'\.(gz|br)$', '', filename) not in current]
+
+
+#  Serving
+#  ----------------------------------------------------------------
+
+# Templates link the assets with asset_url(name) and asset_urls(name)
+# With ASSETS_BUNDLED and a built manifest they get the hashed bundle, served from static/dist/
+# with the immutable Cache-Control and the pre-compressed variant the browser accepts.
+# Otherwise (development, or `flask build-assets` not run) they get the source files of the bundle.
+class Assets:
+    def __init__(self, app):
+        self.static_folder = app.static_folder
+        self.manifest = {}
+        if app.config['ASSETS_BUNDLED']:
+            try:
+                with open(os.path.join(self.static_folder, DIST_DIR, MANIFEST), encoding='utf-8') as file:
+                    self.manifest = json.load(file)
+            except FileNotFoundError:
+                app.logger.warning('No static/%s/%s, run `flask build-assets`: serving the source assets',
+                                   DIST_DIR, MANIFEST)
+        app.add_template_global(self.asset_url, 'asset_url')
+        app.add_template_global(self.asset_urls, 'asset_urls')
+        app.add_url_rule(f'{app.static_url_path}/{DIST_DIR}/<path:filename>', 'assets', self.send_asset)
+        app.extensions['assets'] = self
+
+    # URLs of the files to include for a bundle: the hashed bundle, or its sources one by one
+    def asset_urls(self, name):
+        if name in self.manifest:
+            return [url_for('static', filename=self.manifest[name])]
+        return [url_for('static', filename=source) for source in BUNDLES.get(name, [name])]
+
+    # URL of a bundle of one file, or of any other file of static/
+    def asset_url(self, name):
+        return self.asset_urls(name)[0]
+
+    def send_asset(self, filename):
+        folder = os.path.join(self.static_folder, DIST_DIR)
+        mimetype = mimetypes.guess_type(filename)[0]
+        encoding = None
+        for candidate, suffix in [('br', '.br'), ('gzip', '.gz')]:
+            if candidate in request.accept_encodings and os.path.isfile(os.path.join(folder, filename + suffix)):
+                encoding = candidate
+                filename += suffix
+                break
+        response = send_from_directory(folder, filename, mimetype=mimetype)
+        if encoding:
+            response.headers['Content-Encoding'] = encoding
+        response.headers['Vary'] = 'Accept-Encoding'
+        if filename != MANIFEST:
+            response.headers['Cache-Control'] = IMMUTABLE
+        return response
@@ -0,0 +1,64 @@
+# Weight of the CSS and JS of a page: the source files linked one by one against the bundles
+#
+#   python benchmarks/assets_benchmark.py
+#
+# Builds the bundles (as `flask build-assets`), then renders / in development (source files) and in
+# production (bundles) and fetches every stylesheet and script of /static/ the page links,
+# as a browser without anything cached, then again as a browser coming back to the page.
+# The sources are sent as they are by the static route, the bundles pre-compressed.
+
+import argparse
+import os
+import re
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+os.environ.setdefault('DATABASE_URL', 'sqlite://')
+
+from app import create_app
+from assets import build_assets
+from config import DevelopmentConfig, ProductionConfig
+from models import db
+
+LINKED = re.compile(r'(?:href|src)="(/static/[^"]+\.(?:css|js))"')
+
+
+def page_assets(app, encoding):
+    client = app.test_client()
+    html = client.get('/').get_data(as_text=True)
+    urls = LINKED.findall(html)
+    sent, revalidated = 0, 0
+    for url in urls:
+        response = client.get(url, headers={'Accept-Encoding': encoding})
+        sent += len(response.get_data())
+        # A browser coming back asks again for what it may not keep without checking
+        if 'immutable' not in response.headers.get('Cache-Control', ''):
+            revalidated += 1
+        response.close()
+    return len(urls), sent, revalidated
+
+
+def main():
+    parser = argparse.ArgumentParser(description='CSS and JS sent for a page, sources against bundles')
+    parser.add_argument('--encoding', default='gzip, deflate, br', help='Accept-Encoding of the browser')
+    args = parser.parse_args()
+
+    sources = create_app(DevelopmentConfig)
+    build_assets(sources.static_folder)
+    bundles = create_app(ProductionConfig)
+    for app in [sources, bundles]:
+        with app.app_context():
+            db.create_all()
+
+    print(f'Accept-Encoding: {args.encoding}')
+    print(f'{"":<10}{"requests":>10}{"KB sent":>10}{"requests on a later visit":>28}')
+    results = {}
+    for name, app in [('sources', sources), ('bundles', bundles)]:
+        requests, sent, revalidated = page_assets(app, args.encoding)
+        results[name] = sent
+        print(f'{name:<10}{requests:>10}{sent / 1024:>10.1f}{revalidated:>28}')
+    print(f'{results["sources"] / results["bundles"]:.1f}x fewer bytes')
+
+
+if __name__ == '__main__':
+    main()
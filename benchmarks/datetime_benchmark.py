@@ -0,0 +1,82 @@
+# Compare the old datetime filter with formatting.format_localized_datetime
+#
+#   python benchmarks/datetime_benchmark.py --values 500 --repeat 20
+#
+# The values are like the show tiles of one page: datetimes read from the database
+# and the same values as strings, as the filter was given before start_time was a timestamp.
+# cold is the first render of the page by a worker, warm the next renders of the same shows.
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+
+import babel.dates
+import dateutil.parser
+from babel import Locale
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from formatting import format_localized_datetime, format_cached, parse_datetime
+
+
+# The filter as it was: the locale, the string and the pattern are parsed on every call
+def legacy_format_datetime(value, format='full'):
+    babel.dates.LC_TIME = Locale.parse('en_US')
+    if isinstance(value, datetime):
+        date = value
+    else:
+        date = dateutil.parser.parse(value)
+    if format == 'full':
+        format = "EEEE MMMM, d, y 'at' h:mma"
+    elif format == 'medium':
+        format = "EE MM, dd, y h:mma"
+    return babel.dates.format_datetime(date, format, locale='en')
+
+
+def timed(function, values, repeat, cold=False):
+    timings = []
+    for _ in range(repeat):
+        if cold:
+            # As the first render of the page in a new worker
+            format_cached.cache_clear()
+            parse_datetime.cache_clear()
+        start = time.perf_counter()
+        for value in values:
+            function(value)
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare the old datetime filter with the cached one')
+    parser.add_argument('--values', type=int, default=500, help='Values formatted per page')
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    now = datetime.now(timezone.utc).replace(microsecond=0)
+    datetimes = [now + timedelta(hours=rng.randint(-365 * 24, 365 * 24)) for _ in range(args.values)]
+    strings = [value.isoformat() for value in datetimes]
+    assert all(legacy_format_datetime(value) == format_localized_datetime(value, tzinfo='UTC') for value in strings)
+
+    cases = [
+        ('datetime', datetimes, lambda value: format_localized_datetime(value)),
+        ('string', strings, lambda value: format_localized_datetime(value)),
+        ('datetime fr_FR Europe/Paris', datetimes,
+         lambda value: format_localized_datetime(value, locale='fr_FR', tzinfo='Europe/Paris')),
+    ]
+    print(f'{"values":<28}{"old ms/page":>14}{"cold ms/page":>14}{"warm ms/page":>14}{"cold":>8}{"warm":>8}')
+    for name, values, new in cases:
+        old_ms = timed(legacy_format_datetime, values, args.repeat)
+        cold_ms = timed(new, values, args.repeat, cold=True)
+        warm_ms = timed(new, values, args.repeat)
+        print(f'{name:<28}{old_ms:>14.2f}{cold_ms:>14.2f}{warm_ms:>14.2f}'
+              f'{old_ms / cold_ms:>7.1f}x{old_ms / warm_ms:>7.1f}x')
+
+
+if __name__ == '__main__':
+    main()
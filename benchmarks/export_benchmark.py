@@ -0,0 +1,53 @@
+# Memory and throughput of the streaming exports
+#
+#   python benchmarks/export_benchmark.py --sizes 10000,100000
+#
+# Seeds each size of shows (see synthetic.py) and downloads /api/v1/export/shows.csv and .jsonl
+# through the test client. The peak memory of the export should stay flat when the size grows.
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app import create_app
+from synthetic import seed
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Memory and throughput of the streaming exports')
+    parser.add_argument('--sizes', default='10000,100000', help='Comma separated numbers of shows')
+    parser.add_argument('--database-uri')
+    args = parser.parse_args()
+
+    app = create_app()
+    app.config['SQLALCHEMY_DATABASE_URI'] = args.database_uri or \
+        'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'export_benchmark.db')
+    client = app.test_client()
+    print(f'{"shows":>10} {"export":<14}{"rows/s":>10}{"MB":>8}{"peak KB":>10}')
+    for size in [int(size) for size in args.sizes.split(',')]:
+        with app.app_context():
+            seed(shows=size, venues=max(size // 20, 1), artists=max(size // 20, 1))
+        for kind, file_format in [('shows', 'csv'), ('shows', 'jsonl'), ('venues', 'csv')]:
+            tracemalloc.start()
+            start = time.perf_counter()
+            response = client.get(f'/api/v1/export/{kind}.{file_format}', buffered=False)
+            rows = written = 0
+            # Read the body as a partner would, without keeping it
+            for chunk in response.iter_encoded():
+                rows += chunk.count(b'\n')
+                written += len(chunk)
+            response.close()
+            elapsed = time.perf_counter() - start
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            print(f'{size:>10} {kind + "." + file_format:<14}{rows / elapsed:>10.0f}'
+                  f'{written / 1e6:>8.1f}{peak / 1024:>10.0f}')
+
+
+if __name__ == '__main__':
+    main()
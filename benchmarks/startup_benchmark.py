@@ -0,0 +1,95 @@
+# Cold start of a worker: importing the app and building it with create_app
+#
+#   python benchmarks/startup_benchmark.py --runs 10 --baseline HEAD~1
+#
+# Each run is a new interpreter started with `python -X importtime`, as a preforked worker or a CLI call.
+# The import times are summed from its report and the slowest top level imports are listed.
+# --baseline runs the same measure on another revision of the repository (exported with git archive),
+# the revisions building the app at import time are measured the same way.
+
+import argparse
+import os
+import re
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+# Works with the revisions with and without create_app
+SNIPPET = '''
+import time
+start = time.perf_counter()
+import app
+if hasattr(app, 'create_app'):
+    app.create_app()
+print(f'{(time.perf_counter() - start) * 1000:.3f}')
+'''
+
+IMPORT_LINE = re.compile(r'import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)')
+
+
+# Start an interpreter in root, return (startup ms of the snippet, wall ms, {top level module: cumulative us})
+def measure(root, env):
+    start = time.perf_counter()
+    process = subprocess.run([sys.executable, '-X', 'importtime', '-c', SNIPPET], cwd=root, env=env,
+                             capture_output=True, text=True, check=True)
+    wall_ms = (time.perf_counter() - start) * 1000
+    # The report lists each module after the ones it imported, the modules imported by app
+    # are the ones one level deeper listed since the previous top level module
+    modules, pending = {}, {}
+    for line in process.stderr.splitlines():
+        match = IMPORT_LINE.match(line)
+        if not match:
+            continue
+        depth = len(match.group(3))
+        if depth == 1:
+            if match.group(4) == 'app':
+                modules = pending
+            pending = {}
+        elif depth == 3:
+            pending[match.group(4)] = int(match.group(2))
+    return float(process.stdout.strip().splitlines()[-1]), wall_ms, modules
+
+
+def report(name, root, runs, env, top):
+    startup, wall, imports = [], [], {}
+    for _ in range(runs):
+        startup_ms, wall_ms, modules = measure(root, env)
+        startup.append(startup_ms)
+        wall.append(wall_ms)
+        for module, us in modules.items():
+            imports.setdefault(module, []).append(us)
+    print(f'{name}: import and create_app {statistics.median(startup):.1f} ms, '
+          f'interpreter {statistics.median(wall):.1f} ms (median of {runs})')
+    slowest = sorted(imports.items(), key=lambda item: -statistics.median(item[1]))[:top]
+    for module, timings in slowest:
+        print(f'    {module:<28}{statistics.median(timings) / 1000:>9.1f} ms')
+    return statistics.median(startup)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Cold start time of the app')
+    parser.add_argument('--runs', type=int, default=10)
+    parser.add_argument('--top', type=int, default=10, help='Slowest imports listed')
+    parser.add_argument('--baseline', help='Git revision to compare with, e.g. HEAD~1')
+    parser.add_argument('--env', default='production', help='FYYUR_ENV of the measured processes')
+    args = parser.parse_args()
+
+    env = dict(os.environ, FYYUR_ENV=args.env, PYTHONDONTWRITEBYTECODE='')
+    # The first run of each tree compiles its .pyc files, it is not measured
+    measure(ROOT, env)
+    current = report('working tree', ROOT, args.runs, env, args.top)
+    if args.baseline:
+        with tempfile.TemporaryDirectory() as baseline_root:
+            archive = subprocess.run(['git', 'archive', args.baseline], cwd=ROOT, capture_output=True, check=True)
+            subprocess.run(['tar', '-x', '-C', baseline_root], input=archive.stdout, check=True)
+            measure(baseline_root, env)
+            baseline = report(args.baseline, baseline_root, args.runs, env, args.top)
+        print(f'{baseline / current:.2f}x faster than {args.baseline}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,76 @@
+# Synthetic venues, artists and shows for the benchmarks
+#
+# seed(shows=10000) recreates the tables and fills them with shows / 10 venues and artists
+# and `shows` shows spread over two years around today, half of them upcoming.
+# The same seed always gives the same data.
+
+import random
+from datetime import datetime, timedelta, timezone
+
+from models import db, Venue, Artist, Genre, showTable, venueGenreTable, artistGenreTable
+from queries import recount_shows
+
+CITIES = [('San Francisco', 'CA'), ('New York', 'NY'), ('Austin', 'TX'), ('Seattle', 'WA'),
+          ('Chicago', 'IL'), ('Nashville', 'TN'), ('Denver', 'CO'), ('Miami', 'FL')]
+GENRES = ['Alternative', 'Blues', 'Classical', 'Country', 'Electronic', 'Folk', 'Funk', 'Hip-Hop',
+          'Heavy Metal', 'Instrumental', 'Jazz', 'Musical Theatre', 'Pop', 'Punk', 'R&B', 'Reggae',
+          'Rock n Roll', 'Soul', 'Other']
+WORDS = ['the', 'blue', 'rock', 'jazz', 'band', 'quartet', 'wild', 'river', 'night', 'ensemble',
+         'echo', 'city', 'hall', 'room', 'lounge', 'garden', 'electric', 'velvet']
+
+CHUNK_SIZE = 5000
+
+
+def name(rng, suffix):
+    return ' '.join(rng.sample(WORDS, 2)).title() + f' {suffix}'
+
+
+def insert(table, rows):
+    for start in range(0, len(rows), CHUNK_SIZE):
+        db.session.execute(table.insert().values(rows[start:start + CHUNK_SIZE]))
+
+
+def seed(shows=10000, venues=None, artists=None, random_seed=42):
+    rng = random.Random(random_seed)
+    venues = venues or max(1, shows // 10)
+    artists = artists or max(1, shows // 10)
+    db.drop_all()
+    db.create_all()
+
+    insert(Genre.__table__, [{'id': index + 1, 'name': genre} for index, genre in enumerate(GENRES)])
+    venue_rows = []
+    for venue_id in range(1, venues + 1):
+        city, state = rng.choice(CITIES)
+        venue_rows.append({'id': venue_id, 'name': name(rng, venue_id), 'city': city, 'state': state,
+                           'address': f'{venue_id} Main Street', 'phone': '555-000-0000',
+                           'image_link': '/static/img/venue.png', 'facebook_link': 'https://www.facebook.com/fyyur',
+                           'seeking_talent': True, 'seeking_description': 'We are on the lookout for a local artist'})
+    insert(Venue.__table__, venue_rows)
+    artist_rows = []
+    for artist_id in range(1, artists + 1):
+        city, state = rng.choice(CITIES)
+        artist_rows.append({'id': artist_id, 'name': name(rng, artist_id), 'city': city, 'state': state,
+                            'phone': '555-000-0000', 'image_link': '/static/img/artist.png',
+                            'facebook_link': 'https://www.facebook.com/fyyur',
+                            'seeking_venue': True, 'seeking_description': 'Looking for shows to perform'})
+    insert(Artist.__table__, artist_rows)
+    for table, key, count in [(venueGenreTable, 'venue_id', venues), (artistGenreTable, 'artist_id', artists)]:
+        insert(table, [{key: record_id, 'genre_id': genre_id}
+                       for record_id in range(1, count + 1)
+                       for genre_id in rng.sample(range(1, len(GENRES) + 1), rng.randint(1, 3))])
+
+    now = datetime.now(timezone.utc).replace(microsecond=0)
+    show_keys = set()
+    while len(show_keys) < shows:
+        start_time = now + timedelta(hours=rng.randint(-365 * 24, 365 * 24))
+        show_keys.add((rng.randint(1, artists), rng.randint(1, venues), start_time))
+    insert(showTable, [{'artist_id': artist_id, 'venue_id': venue_id, 'start_time': start_time}
+                       for artist_id, venue_id, start_time in sorted(show_keys, key=lambda key: key[2])])
+    recount_shows(Venue)
+    recount_shows(Artist)
+    if db.engine.dialect.name == 'postgresql':
+        # The ids were given explicitly so the sequences have to catch up for the next inserts
+        for table in ['genres', 'venues', 'artists']:
+            db.session.execute(f"SELECT setval('{table}_id_seq', (SELECT max(id) FROM {table}))")
+    db.session.commit()
+    return {'venues': venues, 'artists': artists, 'shows': shows}
@@ -0,0 +1,84 @@
+# First requests of a new worker: templates compiled on first hit, loaded from the bytecode cache,
+# or compiled at boot
+#
+#   python benchmarks/templates_benchmark.py --runs 5
+#
+# Each run is a new interpreter, as a worker started by a deploy or a scale up: it builds the app
+# (timed as boot) then renders each page once (timed as the first requests).
+# The bytecode cache folder is emptied for the cold runs and filled by a first run for the others.
+
+import argparse
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+PAGES = ['/', '/venues', '/artists', '/shows', '/venues/create', '/artists/create', '/shows/create']
+
+SNIPPET = '''
+import sys, time
+start = time.perf_counter()
+from app import create_app
+from models import db
+app = create_app('production')
+boot = time.perf_counter() - start
+with app.app_context():
+    db.create_all()
+client = app.test_client()
+start = time.perf_counter()
+for page in sys.argv[1:]:
+    assert client.get(page).status_code == 200, page
+print(f'{boot * 1000:.3f} {(time.perf_counter() - start) * 1000:.3f}')
+'''
+
+# name: (bytecode cache, warm at boot, cache filled before the runs)
+MODES = {
+    'cold': (False, False, False),
+    'bytecode cache': (True, False, True),
+    'warmed at boot': (False, True, False),
+    'cache + warmed': (True, True, True),
+}
+
+
+def run(env):
+    process = subprocess.run([sys.executable, '-c', SNIPPET] + PAGES, cwd=ROOT, env=env,
+                             capture_output=True, text=True, check=True)
+    boot, first = process.stdout.split()
+    return float(boot), float(first)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Latency of the first requests of a new worker')
+    parser.add_argument('--runs', type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        print(f'{"":<16}{"boot ms":>10}{"first requests ms":>20}{"total ms":>10}')
+        for name, (cached, warmed, filled) in MODES.items():
+            cache_dir = os.path.join(work_dir, 'jinja')
+            shutil.rmtree(cache_dir, ignore_errors=True)
+            env = dict(os.environ, DATABASE_URL='sqlite:///' + os.path.join(work_dir, 'fyyur.db'),
+                       FYYUR_CACHE_TYPE='null', FYYUR_ASSETS_BUNDLED='0',
+                       FYYUR_JINJA_CACHE_DIR=cache_dir if cached else '',
+                       FYYUR_WARM_TEMPLATES='1' if warmed else '0')
+            # Compiles the .pyc files, and fills the bytecode cache of the modes using it
+            run(env)
+            if not filled:
+                shutil.rmtree(cache_dir, ignore_errors=True)
+            boots, firsts = [], []
+            for _ in range(args.runs):
+                boot, first = run(env)
+                boots.append(boot)
+                firsts.append(first)
+                if not filled:
+                    shutil.rmtree(cache_dir, ignore_errors=True)
+            boot, first = statistics.median(boots), statistics.median(firsts)
+            print(f'{name:<16}{boot:>10.1f}{first:>20.1f}{boot + first:>10.1f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,62 @@
+# Rendering of the pages made of show tiles, with and without the fragment cache of the tiles
+#
+#   python benchmarks/tiles_benchmark.py --shows 10000 --requests 50
+#
+# The page cache is disabled so every request runs its view. With the fragment cache the first
+# request renders the tiles (not measured), the next ones join the cached tiles.
+
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app import create_app
+from cache import make_cache
+from models import db
+from synthetic import seed
+
+PAGES = ['/shows?per_page=200', '/venues/{venue_id}', '/artists/{artist_id}']
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Latency of the show tiles pages with and without fragment cache')
+    parser.add_argument('--shows', type=int, default=10000)
+    parser.add_argument('--requests', type=int, default=50)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        app = create_app('testing')
+        app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///' + os.path.join(work_dir, 'bench.db')
+        with app.app_context():
+            seed(args.shows)
+            db.session.commit()
+            # The venue and the artist with the most shows
+            venue_id = db.session.execute('SELECT venue_id FROM shows GROUP BY venue_id '
+                                          'ORDER BY count(*) DESC LIMIT 1').scalar()
+            artist_id = db.session.execute('SELECT artist_id FROM shows GROUP BY artist_id '
+                                           'ORDER BY count(*) DESC LIMIT 1').scalar()
+        pages = [page.format(venue_id=venue_id, artist_id=artist_id) for page in PAGES]
+
+        print(f'{"":<24}{"no fragments ms":>17}{"fragments ms":>14}')
+        client = app.test_client()
+        for page in pages:
+            medians = []
+            for cache_type in ['null', 'lru']:
+                app.extensions['fragment_cache'] = make_cache(app.config, cache_type,
+                                                              app.config['FRAGMENT_CACHE_MAX_ENTRIES'], default_ttl=0)
+                client.get(page)
+                timings = []
+                for _ in range(args.requests):
+                    start = time.perf_counter()
+                    assert client.get(page).status_code == 200, page
+                    timings.append((time.perf_counter() - start) * 1000)
+                medians.append(statistics.median(timings))
+            print(f'{page:<24}{medians[0]:>17.2f}{medians[1]:>14.2f}')
+
+
+if __name__ == '__main__':
+    main()
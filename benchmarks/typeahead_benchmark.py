@@ -0,0 +1,98 @@
+# Latency of /search/typeahead against its budget, while the indexes are built and once they are
+#
+#   python benchmarks/typeahead_benchmark.py --names 100000 --budget-ms 10
+#
+# Seeds `names` venues and as many artists (see synthetic.py), then times the endpoint through the
+# test client for prefixes of different selectivity:
+# - on a new worker: the first request starts building the indexes in the background and every
+#   request is answered by the database until they are built,
+# - with the indexes built,
+# - during a rebuild of the indexes, which the requests do not wait for.
+# Exits with an error when a p99 is over the budget.
+
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app import create_app
+from models import db
+from queries import typeahead_builds, typeahead_indexes, typeahead_lock, wait_typeahead_builds
+from synthetic import seed
+
+TERMS = ['b', 'bl', 'blue', 'blue r', 'the', 'velvet ga', 'hall 12', '4242', 'zzq']
+
+
+def timed_get(client, term):
+    start = time.perf_counter()
+    response = client.get('/search/typeahead', query_string={'q': term})
+    assert response.status_code == 200, term
+    return (time.perf_counter() - start) * 1000, response
+
+
+def p99(timings):
+    timings = sorted(timings)
+    return timings[min(len(timings) - 1, int(0.99 * len(timings)))]
+
+
+# Request the terms in turn until the indexes being built are swapped in, the first request starts the builds
+def until_built(client):
+    timings = []
+    while not timings or typeahead_builds:
+        timings.append(timed_get(client, TERMS[len(timings) % len(TERMS)])[0])
+    wait_typeahead_builds()
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Latency of the typeahead endpoint')
+    parser.add_argument('--names', type=int, default=100000, help='Venues and artists each')
+    parser.add_argument('--requests', type=int, default=200, help='Requests per term')
+    parser.add_argument('--budget-ms', type=float, default=10.0)
+    parser.add_argument('--database-uri')
+    args = parser.parse_args()
+
+    app = create_app('production')
+    app.config['SQLALCHEMY_DATABASE_URI'] = args.database_uri or \
+        'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'typeahead_benchmark.db')
+    over_budget = []
+    with app.app_context():
+        seed(shows=1000, venues=args.names, artists=args.names)
+        db.session.commit()
+    client = app.test_client()
+
+    print(f'{"":<20}{"requests":>9}{"p50 ms":>10}{"p99 ms":>10}{"build ms":>10}')
+    for phase in ['new worker', 'rebuild']:
+        if phase == 'rebuild':
+            # As if TYPEAHEAD_REBUILD_SECONDS had passed
+            with typeahead_lock:
+                for state in typeahead_indexes.values():
+                    state['built_at'] -= app.config['TYPEAHEAD_REBUILD_SECONDS'] + 1
+        start = time.perf_counter()
+        timings = until_built(client)
+        elapsed = (time.perf_counter() - start) * 1000
+        print(f'{phase:<20}{len(timings):>9}{statistics.median(timings):>10.2f}{p99(timings):>10.2f}{elapsed:>10.0f}')
+        if p99(timings) > args.budget_ms:
+            over_budget.append(phase)
+    print()
+
+    print(f'{"term":<12}{"matches":>9}{"p50 ms":>10}{"p99 ms":>10}')
+    for term in TERMS:
+        timings = []
+        for _ in range(args.requests):
+            elapsed, response = timed_get(client, term)
+            timings.append(elapsed)
+        matches = sum(len(results) for results in response.get_json().values())
+        print(f'{term:<12}{matches:>9}{statistics.median(timings):>10.2f}{p99(timings):>10.2f}')
+        if p99(timings) > args.budget_ms:
+            over_budget.append(term)
+    if over_budget:
+        sys.exit(f'Over the {args.budget_ms} ms budget: {", ".join(over_budget)}')
+
+
+if __name__ == '__main__':
+    main()
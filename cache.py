@@ -0,0 +1,275 @@
+import hashlib
+import os
+import pickle
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+
+from flask import current_app, g, request, session
+from werkzeug.local import LocalProxy
+
+from filters import request_locale, request_timezone
+from replicas import pinned_to_primary, replica_may_lag
+
+
+# Base of all the cache backends
+# Every entry keeps the version of each of its tags at the time it was stored.
+# Invalidating a tag gives it a new version, so all the entries stored with the old one are missed.
+# The backends only have to load, store and delete pickled values by key.
+class BaseCache:
+    def __init__(self, default_ttl=60):
+        self.default_ttl = default_ttl
+
+    def get(self, key):
+        entry = self._load('entry:' + key)
+        if entry is None:
+            return None
+        expires_at, tag_versions, value = entry
+        if expires_at is not None and expires_at < time.time():
+            self._delete('entry:' + key)
+            return None
+        for tag, version in tag_versions.items():
+            if self._tag_version(tag) != version:
+                return None
+        return value
+
+    # ttl is in seconds, 0 keeps the entry until it is invalidated or evicted
+    # tag_versions are the versions of (some of) the tags read before the value was built, see tag_versions
+    def set(self, key, value, tags=(), ttl=None, tag_versions=None):
+        ttl = self.default_ttl if ttl is None else ttl
+        expires_at = time.time() + ttl if ttl else None
+        versions = dict(tag_versions or {})
+        for tag in tags:
+            if tag not in versions:
+                versions[tag] = self._tag_version(tag)
+        self._store('entry:' + key, (expires_at, versions, value), ttl)
+
+    # The current versions of tags, to read before building a value stored with them:
+    # a tag invalidated while the value is built then no longer matches the stored version
+    def tag_versions(self, tags):
+        return {tag: self._tag_version(tag) for tag in tags}
+
+    def delete(self, key):
+        self._delete('entry:' + key)
+
+    # A version is the time of the invalidation and a random part: 'time:hex'
+    def invalidate(self, *tags):
+        for tag in tags:
+            self._store('tag:' + tag, f'{time.time():.6f}:{os.urandom(4).hex()}', 0)
+
+    # Time of the latest invalidation of tag versions, None when none of them was invalidated
+    @staticmethod
+    def invalidated_at(tag_versions):
+        times = []
+        for version in tag_versions.values():
+            try:
+                times.append(float(str(version).split(':')[0]))
+            except ValueError:
+                pass
+        return max(times, default=None)
+
+    def _tag_version(self, tag):
+        return self._load('tag:' + tag)
+
+    def _load(self, key):
+        raise NotImplementedError
+
+    def _store(self, key, value, ttl):
+        raise NotImplementedError
+
+    def _delete(self, key):
+        raise NotImplementedError
+
+
+# Cache that never keeps anything, used when caching is disabled
+class NullCache(BaseCache):
+    def _load(self, key):
+        return None
+
+    def _store(self, key, value, ttl):
+        pass
+
+    def _delete(self, key):
+        pass
+
+
+# In process cache dropping the least recently used entries above max_entries
+# Tag versions are kept apart so they are never evicted before the entries using them
+class LRUCache(BaseCache):
+    def __init__(self, default_ttl=60, max_entries=1024):
+        super().__init__(default_ttl)
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.tags = {}
+        self.lock = threading.Lock()
+
+    def _load(self, key):
+        with self.lock:
+            if key.startswith('tag:'):
+                return self.tags.get(key)
+            if key not in self.entries:
+                return None
+            self.entries.move_to_end(key)
+            return self.entries[key]
+
+    def _store(self, key, value, ttl):
+        with self.lock:
+            if key.startswith('tag:'):
+                self.tags[key] = value
+                return
+            self.entries[key] = value
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def _delete(self, key):
+        with self.lock:
+            self.entries.pop(key, None)
+
+
+# Cache shared by all the workers of a host through pickled files in a directory
+# The modification time of each entry file is set to its expiry time. Every sweep_every writes a sweep
+# removes the expired entries, then the ones expiring soonest above max_entries.
+# Entries without ttl expire in NO_EXPIRY seconds for the sweep, they are evicted last.
+class FileSystemCache(BaseCache):
+    NO_EXPIRY = 10 * 365 * 24 * 3600
+
+    def __init__(self, cache_dir, default_ttl=60, max_entries=1024, sweep_every=100):
+        super().__init__(default_ttl)
+        self.cache_dir = cache_dir
+        self.max_entries = max_entries
+        self.sweep_every = sweep_every
+        self.writes = 0
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _path(self, key):
+        # Entries and tag versions apart: only the entries are swept
+        prefix = 'tag-' if key.startswith('tag:') else 'entry-'
+        return os.path.join(self.cache_dir, prefix + hashlib.sha1(key.encode()).hexdigest())
+
+    def _load(self, key):
+        try:
+            with open(self._path(key), 'rb') as cache_file:
+                return pickle.load(cache_file)
+        except (OSError, EOFError, pickle.UnpicklingError):
+            return None
+
+    def _store(self, key, value, ttl):
+        # Write to a temporary file first so other workers never read half written entries
+        file_descriptor, temp_path = tempfile.mkstemp(dir=self.cache_dir)
+        with os.fdopen(file_descriptor, 'wb') as cache_file:
+            pickle.dump(value, cache_file, pickle.HIGHEST_PROTOCOL)
+        expires_at = time.time() + (ttl or self.NO_EXPIRY)
+        os.utime(temp_path, (expires_at, expires_at))
+        os.replace(temp_path, self._path(key))
+        self.writes += 1
+        if self.writes % self.sweep_every == 0:
+            self.sweep()
+
+    def _delete(self, key):
+        try:
+            os.remove(self._path(key))
+        except OSError:
+            pass
+
+    # Remove the expired entries, the soonest to expire above max_entries and the temporary files
+    # left by a worker killed while writing. Other workers may sweep at the same time.
+    def sweep(self):
+        now = time.time()
+        entries = []
+        for entry in os.scandir(self.cache_dir):
+            try:
+                if entry.name.startswith('entry-'):
+                    entries.append((entry.stat().st_mtime, entry.path))
+                elif entry.name.startswith('tmp') and entry.stat().st_mtime < now - 60:
+                    os.remove(entry.path)
+            except OSError:
+                pass
+        entries.sort()
+        expired = len([expires_at for expires_at, _ in entries if expires_at < now])
+        for _, path in entries[:max(expired, len(entries) - self.max_entries)]:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+
+# Cache shared by all the hosts through a redis server (or any server speaking its protocol)
+class RedisCache(BaseCache):
+    def __init__(self, url, default_ttl=60, prefix='fyyur:'):
+        super().__init__(default_ttl)
+        # redis is only needed when this backend is used
+        import redis
+        self.client = redis.Redis.from_url(url)
+        self.prefix = prefix
+
+    def _load(self, key):
+        value = self.client.get(self.prefix + key)
+        return None if value is None else pickle.loads(value)
+
+    def _store(self, key, value, ttl):
+        self.client.set(self.prefix + key, pickle.dumps(value, pickle.HIGHEST_PROTOCOL), ex=ttl or None)
+
+    def _delete(self, key):
+        self.client.delete(self.prefix + key)
+
+
+# Create the cache backend chosen by CACHE_TYPE in the app config
+# cache_type, max_entries and default_ttl override the CACHE_* settings of the config
+def make_cache(config, cache_type=None, max_entries=None, default_ttl=None):
+    cache_type = cache_type or config.get('CACHE_TYPE', 'lru')
+    default_ttl = config.get('CACHE_DEFAULT_TTL', 60) if default_ttl is None else default_ttl
+    if cache_type == 'lru':
+        return LRUCache(default_ttl, max_entries or config.get('CACHE_MAX_ENTRIES', 1024))
+    if cache_type == 'filesystem':
+        return FileSystemCache(config['CACHE_DIR'], default_ttl, max_entries or config.get('CACHE_MAX_ENTRIES', 1024))
+    if cache_type == 'redis':
+        return RedisCache(config['CACHE_REDIS_URL'], default_ttl)
+    if cache_type == 'null':
+        return NullCache(default_ttl)
+    raise ValueError(f'Unknown CACHE_TYPE {cache_type}')
+
+
+# Cache of the rendered read only pages of the current app, made by create_app from its config
+page_cache = LocalProxy(lambda: current_app.extensions['page_cache'])
+
+# Cache of the rendered parts of pages (the show tiles, see tiles.py), made by create_app as well
+fragment_cache = LocalProxy(lambda: current_app.extensions['fragment_cache'])
+
+
+# Cache the page rendered by a view under its full path, locale and time zone
+# tags are formatted with the view arguments, e.g. 'venue:{venue_id}'
+# The view can add more tags with add_cache_tags while it is building the page
+# Pages are not cached when they would show flashed messages, nor for the browsers reading from
+# the primary after a write (they would skip the pages the replica renders without it), and the
+# pages read from the replica shortly after one of their tags was invalidated are not stored
+def cached_page(*tags):
+    def decorator(view):
+        @wraps(view)
+        def wrapper(**kwargs):
+            if session.get('_flashes') or pinned_to_primary():
+                return view(**kwargs)
+            # Dates are formatted in the locale and time zone of the request
+            key = f'page:{request_locale()}:{request_timezone()}:{request.full_path}'
+            page = page_cache.get(key)
+            if page is not None:
+                return page
+            g.cache_tags = [tag.format(**kwargs) for tag in tags]
+            # Read before the view queries anything, an invalidation while it runs misses the page
+            g.cache_tag_versions = page_cache.tag_versions(g.cache_tags)
+            page = view(**kwargs)
+            if isinstance(page, str) and not replica_may_lag(page_cache.invalidated_at(g.cache_tag_versions)):
+                page_cache.set(key, page, tags=g.cache_tags, tag_versions=g.cache_tag_versions)
+            return page
+        return wrapper
+    return decorator
+
+
+# The versions of these tags are read when they are added, right after the query naming them
+def add_cache_tags(*tags):
+    g.setdefault('cache_tags', []).extend(tags)
+    if 'cache_tag_versions' in g:
+        new_tags = [tag for tag in tags if tag not in g.cache_tag_versions]
+        g.cache_tag_versions.update(page_cache.tag_versions(new_tags))
@@ -0,0 +1,287 @@
+import csv
+import json
+import os
+import time
+from datetime import timezone
+
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+from sqlalchemy.exc import SQLAlchemyError
+from werkzeug.datastructures import MultiDict
+
+from api import EXPORT_FIELDS, EXPORT_FORMATS, export_records, export_chunks, next_export_since
+from assets import build_assets, stale_assets
+from cache import page_cache
+from filters import str_to_datetime
+from models import db, showTable, venueGenreTable, artistGenreTable, Venue, Artist
+from queries import get_genres, book_shows, recount_shows, roll_over_shows, show_counter_mismatches, \
+    invalidate_search_index, invalidate_typeahead_index
+from templating import warm_templates
+
+# ----------------------------------------------------------------------------#
+# Commands.
+# ----------------------------------------------------------------------------#
+
+# Bulk import: each kind of record has its form for validation (a name in forms.py, imported
+# with the first row), the table it is written to and the association table of its genres
+IMPORT_KINDS = {
+    'venues': ('VenueForm', Venue.__table__, venueGenreTable),
+    'artists': ('ArtistForm', Artist.__table__, artistGenreTable),
+    'shows': ('ShowForm', showTable, None),
+}
+
+# Read the rows of a CSV or JSON lines file one at a time
+# Yield (line number, row, None), or (line number, None, error) for a JSON line that is not an object
+def read_rows(file, file_format):
+    if file_format == 'csv':
+        for line, row in enumerate(csv.DictReader(file), start=2):
+            yield line, row, None
+        return
+    for line, text in enumerate(file, start=1):
+        if not text.strip():
+            continue
+        try:
+            row = json.loads(text)
+        except ValueError as error:
+            yield line, None, f'Invalid JSON: {error}'
+            continue
+        if isinstance(row, dict):
+            yield line, row, None
+        else:
+            yield line, None, f'Expected a JSON object, got {type(row).__name__}'
+
+# Validate a row with the form used by the web pages and convert it to the table columns
+# Return (values, None) or (None, errors)
+def import_values(kind, row):
+    import forms
+    form_name, table, _ = IMPORT_KINDS[kind]
+    formdata = MultiDict()
+    for field, value in row.items():
+        if field == 'genres' and isinstance(value, str):
+            # CSV cells hold the genres as 'Jazz,Rock' or '{Jazz,Rock}'
+            value = [genre.strip() for genre in value.strip('{}').split(',') if genre.strip()]
+        if isinstance(value, list):
+            formdata.setlist(field, [str(item) for item in value])
+        elif value is not None:
+            formdata[field] = str(value)
+    form = getattr(forms, form_name)(formdata=formdata, meta={'csrf': False})
+    if not form.validate():
+        return None, form.errors
+    if kind == 'shows':
+        # The show form fills a missing start_time with today and has no rules for the ids
+        missing = [field for field in ['artist_id', 'venue_id', 'start_time'] if not formdata.get(field)]
+        if missing:
+            return None, {field: ['This field is required.'] for field in missing}
+    # Every row gets all the form columns, a multi row INSERT needs the same columns in each row
+    values = {}
+    for column in table.columns:
+        if column.name not in form._fields:
+            continue
+        if column.name in formdata:
+            values[column.name] = formdata[column.name]
+        elif column.default is not None and column.default.is_scalar:
+            values[column.name] = column.default.arg
+        else:
+            values[column.name] = None
+    if 'genres' in form._fields:
+        # The genres are written to the association table after the record
+        values['genres'] = formdata.getlist('genres')
+    if kind == 'shows':
+        values['start_time'] = form.start_time.data.replace(tzinfo=timezone.utc)
+    return values, None
+
+# Write the (line, values) of a chunk with one multi row INSERT, then their genres with another one
+# Return the (line, error) of the rows refused without failing the others
+def write_rows(kind, chunk):
+    _, table, genre_table = IMPORT_KINDS[kind]
+    rows = [values for _, values in chunk]
+    if kind == 'shows':
+        # Booked as by the API: the shows conflicting with a booked show or an earlier row of the
+        # file (BOOKING_CONFLICT_MINUTES) and the unknown ids are refused
+        return [(line, json.dumps(result.get('errors') or {'conflicts': result['conflicts']}))
+                for (line, _), result in zip(chunk, book_shows(rows)) if result['status'] != 'booked']
+    records = [{column: value for column, value in row.items() if column != 'genres'} for row in rows]
+    if db.engine.dialect.name == 'postgresql':
+        ids = [record.id for record in db.session.execute(table.insert().values(records).returning(table.c.id))]
+    else:
+        # Without RETURNING the rows are inserted one at a time to get their ids
+        ids = [db.session.execute(table.insert().values(record)).inserted_primary_key[0] for record in records]
+    genres = get_genres([name for row in rows for name in row['genres']])
+    db.session.flush()
+    genre_ids = {genre.name: genre.id for genre in genres}
+    key = genre_table.c.keys()[0]
+    links = [{key: record_id, 'genre_id': genre_ids[name]}
+             for record_id, row in zip(ids, rows) for name in dict.fromkeys(row['genres'])]
+    if links:
+        db.session.execute(genre_table.insert().values(links))
+    return []
+
+# Insert a chunk in one transaction
+# If the chunk fails in the database its rows are inserted one by one to find the bad ones.
+# Return the (line, error) of the rows that could not be inserted
+def insert_chunk(kind, chunk):
+    try:
+        errors = write_rows(kind, chunk)
+        db.session.commit()
+        return errors
+    except SQLAlchemyError:
+        db.session.rollback()
+    errors = []
+    for line, values in chunk:
+        try:
+            errors.extend(write_rows(kind, [(line, values)]))
+            db.session.commit()
+        except SQLAlchemyError as error:
+            db.session.rollback()
+            errors.append((line, str(error.orig if hasattr(error, 'orig') else error).strip()))
+    return errors
+
+@click.command('import')
+@click.argument('kind', type=click.Choice(list(IMPORT_KINDS)))
+@click.argument('file', type=click.File('r', encoding='utf-8'))
+@click.option('--format', 'file_format', type=click.Choice(['csv', 'jsonl']),
+              help='File format, guessed from the file extension by default.')
+@click.option('--chunk-size', default=1000, show_default=True, help='Rows written by each INSERT.')
+@click.option('--errors', 'errors_file', type=click.File('w', encoding='utf-8'),
+              help='Write the rejected rows report to this CSV file instead of the console.')
+@with_appcontext
+def import_command(kind, file, file_format, chunk_size, errors_file):
+    """Import venues, artists or shows from a CSV or JSON lines file."""
+    file_format = file_format or ('csv' if file.name.endswith('.csv') else 'jsonl')
+    imported = 0
+    rejected = []
+    chunk = []
+    start = time.perf_counter()
+    # The forms need a request context to be created
+    with current_app.test_request_context():
+        for line, row, error in read_rows(file, file_format):
+            if error:
+                rejected.append((line, error))
+                continue
+            values, errors = import_values(kind, row)
+            if errors:
+                rejected.append((line, json.dumps(errors)))
+                continue
+            chunk.append((line, values))
+            if len(chunk) >= chunk_size:
+                chunk_errors = insert_chunk(kind, chunk)
+                imported += len(chunk) - len(chunk_errors)
+                rejected.extend(chunk_errors)
+                chunk = []
+        if chunk:
+            chunk_errors = insert_chunk(kind, chunk)
+            imported += len(chunk) - len(chunk_errors)
+            rejected.extend(chunk_errors)
+    elapsed = time.perf_counter() - start
+
+    # The imported records are not in the cached pages nor the search indexes yet
+    if kind == 'venues':
+        invalidate_search_index(Venue)
+        invalidate_typeahead_index(Venue)
+    elif kind == 'artists':
+        invalidate_search_index(Artist)
+        invalidate_typeahead_index(Artist)
+    page_cache.invalidate('venues', 'artists', 'shows')
+
+    rejected.sort()
+    if errors_file:
+        writer = csv.writer(errors_file)
+        writer.writerow(['line', 'errors'])
+        writer.writerows(rejected)
+    else:
+        for line, errors in rejected:
+            click.echo(f'line {line}: {errors}', err=True)
+    click.echo(f'{imported} {kind} imported, {len(rejected)} rejected in {elapsed:.2f}s '
+               f'({(imported + len(rejected)) / elapsed if elapsed else 0:.0f} rows/s)')
+
+@click.command('export')
+@click.argument('kind', type=click.Choice(list(EXPORT_FIELDS)))
+@click.argument('file', type=click.File('w', encoding='utf-8'), default='-')
+@click.option('--format', 'file_format', type=click.Choice(list(EXPORT_FORMATS)),
+              help='File format, guessed from the file extension by default.')
+@click.option('--since', help='Only the venues and artists updated, or the shows added, since this timestamp.')
+@with_appcontext
+def export_command(kind, file, file_format, since):
+    """Export venues, artists or shows to a CSV or JSON lines file (stdout by default)."""
+    file_format = file_format or ('csv' if file.name.endswith('.csv') else 'jsonl')
+    try:
+        since = str_to_datetime(since) if since else None
+    except (ValueError, OverflowError):
+        raise click.BadParameter('must be a timestamp like 2020-05-21T21:30:00Z', param_hint='--since')
+    next_since = next_export_since()
+    for chunk in export_chunks(kind, export_records(kind, since), file_format):
+        file.write(chunk)
+    click.echo(f'Exported {kind}, use --since {next_since.isoformat()} for the next incremental export', err=True)
+
+@click.command('roll-shows')
+@click.option('--every', type=int, default=0,
+              help='Keep running and roll over every this many seconds, e.g. as a worker process.')
+@with_appcontext
+def roll_shows_command(every):
+    """Move the shows that started from the upcoming to the past show counters."""
+    while True:
+        updated = roll_over_shows()
+        db.session.commit()
+        if updated:
+            # The venues listing shows the upcoming counts
+            page_cache.invalidate('venues')
+        click.echo(f'{updated} venues and artists rolled over')
+        if not every:
+            break
+        time.sleep(every)
+
+@click.command('check-show-counters')
+@click.option('--fix', is_flag=True, help='Recount the records whose counters are wrong.')
+@with_appcontext
+def check_show_counters_command(fix):
+    """Compare the venues and artists show counters with the shows table."""
+    wrong = 0
+    for model in [Venue, Artist]:
+        mismatches = show_counter_mismatches(model)
+        wrong += len(mismatches)
+        for record_id, stored, actual in mismatches:
+            click.echo(f'{model.__name__} {record_id}: stored {stored}, actual {actual}', err=True)
+        if fix and mismatches:
+            recount_shows(model, model.id.in_([record_id for record_id, _, _ in mismatches]))
+    if fix and wrong:
+        db.session.commit()
+        page_cache.invalidate('venues')
+        click.echo(f'{wrong} venues and artists recounted')
+    elif wrong:
+        raise click.ClickException(f'{wrong} venues and artists have wrong show counters')
+    else:
+        click.echo('All the show counters are right')
+
+@click.command('build-assets')
+@click.option('--clean', is_flag=True,
+              help='Delete the bundles of the previous builds, once no cached page links to them.')
+@with_appcontext
+def build_assets_command(clean):
+    """Bundle, minify, hash and compress the CSS and JS of static/ into static/dist/."""
+    manifest = build_assets(current_app.static_folder)
+    for name, path in sorted(manifest.items()):
+        click.echo(f'{name} -> {path}')
+    if clean:
+        for path in stale_assets(current_app.static_folder, manifest):
+            os.remove(path)
+            click.echo(f'Deleted {os.path.relpath(path, current_app.static_folder)}')
+
+@click.command('warm-templates')
+@click.option('--top', default=5, show_default=True, help='Slowest templates listed.')
+@with_appcontext
+def warm_templates_command(top):
+    """Compile all the templates into the Jinja bytecode cache, e.g. before the workers start."""
+    timings = warm_templates(current_app)
+    cache_dir = current_app.config['JINJA_BYTECODE_CACHE_DIR']
+    click.echo(f'{len(timings)} templates compiled in {sum(timings.values()):.1f} ms'
+               + (f', cached in {cache_dir}' if cache_dir else ', no bytecode cache configured'))
+    for name, ms in sorted(timings.items(), key=lambda item: -item[1])[:top]:
+        click.echo(f'    {name:<32}{ms:>8.1f} ms')
+
+# ----------------------------------------------------------------------------#
+
+
+# Registered on the app by create_app
+COMMANDS = [import_command, export_command, roll_shows_command, check_show_counters_command,
+            build_assets_command, warm_templates_command]
@@ -0,0 +1,50 @@
+from datetime import timezone
+
+from flask import current_app, g, has_request_context, request
+
+from formatting import format_localized_datetime, get_timezone, parse_datetime
+
+# ----------------------------------------------------------------------------#
+# Filters.
+# ----------------------------------------------------------------------------#
+
+
+# Locale of the current request: the locale cookie, else the best Accept-Language match
+def request_locale():
+    if not has_request_context():
+        return current_app.config['DEFAULT_LOCALE']
+    if 'locale' not in g:
+        supported = current_app.config['SUPPORTED_LOCALES']
+        locale = request.cookies.get('locale')
+        g.locale = locale if locale in supported else \
+            request.accept_languages.best_match(supported, current_app.config['DEFAULT_LOCALE'])
+    return g.locale
+
+# Time zone of the current request when it is a known zone:
+# ?tz= (for the API clients), else the timezone cookie set by script.js
+def request_timezone():
+    if not has_request_context():
+        return current_app.config['DEFAULT_TIMEZONE']
+    if 'timezone' not in g:
+        g.timezone = current_app.config['DEFAULT_TIMEZONE']
+        name = request.args.get('tz') or request.cookies.get('timezone')
+        if name:
+            try:
+                get_timezone(name)
+                g.timezone = name
+            except LookupError:
+                pass
+    return g.timezone
+
+# format_datetime function is used with jijna, create_app registers it as the datetime filter
+# The locale and time zone come from the request, see formatting.py for the formats
+def format_datetime(value, format='full'):
+    return format_localized_datetime(value, format, request_locale(), request_timezone())
+
+# Convert the start_time entered in the show form to a UTC aware datetime
+# Times entered without an offset are considered UTC
+def str_to_datetime(date):
+    start_time = parse_datetime(date)
+    if start_time.tzinfo is None:
+        return start_time.replace(tzinfo=timezone.utc)
+    return start_time.astimezone(timezone.utc)
@@ -0,0 +1,69 @@
+from datetime import datetime, timezone
+from functools import lru_cache
+
+# babel and dateutil are imported on first use, the processes which format no date do not load them
+
+# Named formats of the datetime filter, any other format is used as a Babel pattern
+DATETIME_FORMATS = {
+    'full': "EEEE MMMM, d, y 'at' h:mma",
+    'medium': "EE MM, dd, y h:mma",
+}
+
+
+# Locales, patterns and time zones are parsed once per process and shared by all the requests
+
+@lru_cache(maxsize=64)
+def get_locale(identifier):
+    from babel import Locale
+    return Locale.parse(identifier)
+
+
+@lru_cache(maxsize=256)
+def get_pattern(format):
+    import babel.dates
+    return babel.dates.parse_pattern(DATETIME_FORMATS.get(format, format))
+
+
+# Raise LookupError for an unknown time zone name
+# zoneinfo raises ValueError for the names which are not a key ('', '../etc', absolute paths)
+@lru_cache(maxsize=64)
+def get_timezone(name):
+    import babel.dates
+    try:
+        return babel.dates.get_timezone(name)
+    except ValueError:
+        raise LookupError(f'Unknown time zone {name!r}') from None
+
+
+# Strings still come from old rows and callers, the same ones are formatted again and again
+@lru_cache(maxsize=4096)
+def parse_datetime(value):
+    try:
+        return datetime.fromisoformat(value)
+    except ValueError:
+        import dateutil.parser
+        return dateutil.parser.parse(value)
+
+
+# Format a datetime (or a string holding one) with a named format or a Babel pattern
+# Naive datetimes are UTC. They are shown in tzinfo (a name or a tzinfo), in their own time zone without it
+def format_localized_datetime(value, format='full', locale='en_US', tzinfo=None):
+    if not isinstance(value, datetime):
+        value = parse_datetime(value)
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return format_cached(value, value.utcoffset(), format, locale, tzinfo)
+
+
+# Format a date (the days of the calendars) with a Babel pattern
+def format_localized_date(value, format, locale='en_US'):
+    return get_pattern(format).apply(value, get_locale(locale))
+
+
+# The same shows are on many pages, their formatted dates are kept for the next requests
+# Equal datetimes in other time zones are equal keys, so the offset is part of the key too
+@lru_cache(maxsize=16384)
+def format_cached(value, utcoffset, format, locale, tzinfo):
+    if tzinfo is not None:
+        value = value.astimezone(get_timezone(tzinfo) if isinstance(tzinfo, str) else tzinfo)
+    return get_pattern(format).apply(value, get_locale(locale))
@@ -0,0 +1,39 @@
+from flask import Blueprint, render_template, request, url_for, jsonify, current_app
+
+from models import Venue, Artist
+from queries import search_typeahead
+
+# ----------------------------------------------------------------------------#
+# Home and search.
+# ----------------------------------------------------------------------------#
+
+bp = Blueprint('main', __name__)
+
+@bp.route('/')
+def index():
+    return render_template('pages/home.html')
+
+
+#  Typeahead
+#  ----------------------------------------------------------------
+# Suggestions of the navbar search as the user types, from the in memory prefix indexes
+# ?q= is the beginning of any word of the names, ?kind=venues or artists limits the results to one kind
+TYPEAHEAD_KINDS = {
+    'venues': (Venue, 'venues.show_venue', 'venue_id'),
+    'artists': (Artist, 'artists.show_artist', 'artist_id'),
+}
+
+@bp.route('/search/typeahead')
+def typeahead():
+    term = request.args.get('q', '')
+    limit = max(1, min(request.args.get('limit', current_app.config['TYPEAHEAD_LIMIT'], type=int),
+                       current_app.config['TYPEAHEAD_MAX_LIMIT']))
+    kind = request.args.get('kind')
+    data = {}
+    for name, (model, endpoint, key) in TYPEAHEAD_KINDS.items():
+        if kind in TYPEAHEAD_KINDS and kind != name:
+            continue
+        matches = search_typeahead(model, term, limit) if term.strip() else []
+        data[name] = [{'id': record_id, 'name': record_name, 'url': url_for(endpoint, **{key: record_id})}
+                      for record_id, record_name in matches]
+    return jsonify(data)
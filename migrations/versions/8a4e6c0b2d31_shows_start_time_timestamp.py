@@ -0,0 +1,40 @@
+"""shows start_time as timestamp with indexes
+
+Revision ID: 8a4e6c0b2d31
+Revises: 3f1c2a9d7b10
+Create Date: 2020-08-15 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8a4e6c0b2d31'
+down_revision = '3f1c2a9d7b10'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # The stored strings are 'YYYY-MM-DD HH:MM:SS' in UTC, so they are cast in place
+    # SQLite keeps datetimes as text already, only the indexes are needed there
+    if op.get_bind().dialect.name == 'postgresql':
+        op.alter_column('shows', 'start_time',
+                        existing_type=sa.String(length=120),
+                        type_=sa.DateTime(timezone=True),
+                        existing_nullable=False,
+                        postgresql_using="start_time::timestamp AT TIME ZONE 'UTC'")
+    op.create_index('ix_shows_venue_id_start_time', 'shows', ['venue_id', 'start_time'])
+    op.create_index('ix_shows_artist_id_start_time', 'shows', ['artist_id', 'start_time'])
+
+
+def downgrade():
+    op.drop_index('ix_shows_artist_id_start_time', table_name='shows')
+    op.drop_index('ix_shows_venue_id_start_time', table_name='shows')
+    if op.get_bind().dialect.name == 'postgresql':
+        op.alter_column('shows', 'start_time',
+                        existing_type=sa.DateTime(timezone=True),
+                        type_=sa.String(length=120),
+                        existing_nullable=False,
+                        postgresql_using="to_char(start_time AT TIME ZONE 'UTC', 'YYYY-MM-DD HH24:MI:SS')")
@@ -0,0 +1,50 @@
+"""upcoming_count, past_count and next_show_at on venues and artists
+
+Revision ID: a4d7e2b9c631
+Revises: f93a1d7c2e58
+Create Date: 2020-09-05 12:00:00.000000
+
+"""
+from datetime import datetime, timezone
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a4d7e2b9c631'
+down_revision = 'f93a1d7c2e58'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    for table in ['venues', 'artists']:
+        with op.batch_alter_table(table) as batch_op:
+            batch_op.add_column(sa.Column('upcoming_count', sa.Integer(), server_default='0', nullable=False))
+            batch_op.add_column(sa.Column('past_count', sa.Integer(), server_default='0', nullable=False))
+            batch_op.add_column(sa.Column('next_show_at', sa.DateTime(timezone=True), nullable=True))
+            batch_op.create_index(f'ix_{table}_next_show_at', ['next_show_at'])
+
+    # Count the existing shows
+    shows = sa.table('shows', sa.column('venue_id', sa.Integer), sa.column('artist_id', sa.Integer),
+                     sa.column('start_time', sa.DateTime(timezone=True)))
+    now = datetime.now(timezone.utc)
+    for table_name, key in [('venues', shows.c.venue_id), ('artists', shows.c.artist_id)]:
+        table = sa.table(table_name, sa.column('id', sa.Integer), sa.column('upcoming_count', sa.Integer),
+                         sa.column('past_count', sa.Integer), sa.column('next_show_at', sa.DateTime(timezone=True)))
+        upcoming = shows.c.start_time > now
+        op.execute(table.update().values(
+            upcoming_count=sa.select([sa.func.count()]).where(sa.and_(key == table.c.id, upcoming)).as_scalar(),
+            past_count=sa.select([sa.func.count()]).where(sa.and_(key == table.c.id, sa.not_(upcoming))).as_scalar(),
+            next_show_at=sa.select([sa.func.min(shows.c.start_time)])
+            .where(sa.and_(key == table.c.id, upcoming)).as_scalar()))
+
+
+def downgrade():
+    for table in ['artists', 'venues']:
+        with op.batch_alter_table(table) as batch_op:
+            batch_op.drop_index(f'ix_{table}_next_show_at')
+            batch_op.drop_column('next_show_at')
+            batch_op.drop_column('past_count')
+            batch_op.drop_column('upcoming_count')
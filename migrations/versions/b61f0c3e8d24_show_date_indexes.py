@@ -0,0 +1,27 @@
+"""range index on shows.start_time and city index on venues
+
+Revision ID: b61f0c3e8d24
+Revises: a4d7e2b9c631
+Create Date: 2020-09-12 12:00:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'b61f0c3e8d24'
+down_revision = 'a4d7e2b9c631'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Date range and calendar scans, also serves the order of the shows pages
+    op.create_index('ix_shows_start_time', 'shows', ['start_time', 'artist_id', 'venue_id'])
+    # Shows of a city
+    op.create_index('ix_venues_city_state', 'venues', ['city', 'state'])
+
+
+def downgrade():
+    op.drop_index('ix_venues_city_state', table_name='venues')
+    op.drop_index('ix_shows_start_time', table_name='shows')
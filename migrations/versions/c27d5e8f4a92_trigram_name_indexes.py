@@ -0,0 +1,33 @@
+"""trigram indexes on venue and artist names
+
+Revision ID: c27d5e8f4a92
+Revises: 8a4e6c0b2d31
+Create Date: 2020-08-22 12:00:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'c27d5e8f4a92'
+down_revision = '8a4e6c0b2d31'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # pg_trgm lets the name ILIKE searches use a GIN index, other databases use the in memory index
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    op.create_index('ix_venues_name_trgm', 'venues', ['name'],
+                    postgresql_using='gin', postgresql_ops={'name': 'gin_trgm_ops'})
+    op.create_index('ix_artists_name_trgm', 'artists', ['name'],
+                    postgresql_using='gin', postgresql_ops={'name': 'gin_trgm_ops'})
+
+
+def downgrade():
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    op.drop_index('ix_artists_name_trgm', table_name='artists')
+    op.drop_index('ix_venues_name_trgm', table_name='venues')
@@ -0,0 +1,38 @@
+"""updated_at on venues and artists, created_at on shows
+
+Revision ID: e5b8f13a6c47
+Revises: c27d5e8f4a92
+Create Date: 2020-08-29 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e5b8f13a6c47'
+down_revision = 'c27d5e8f4a92'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # SQLite can only add columns with a constant default in place so its tables are copied
+    recreate = 'always' if op.get_bind().dialect.name == 'sqlite' else 'auto'
+    for table in ['venues', 'artists']:
+        with op.batch_alter_table(table, recreate=recreate) as batch_op:
+            batch_op.add_column(sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True))
+            batch_op.create_index(f'ix_{table}_updated_at', ['updated_at'])
+    with op.batch_alter_table('shows', recreate=recreate) as batch_op:
+        batch_op.add_column(sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True))
+        batch_op.create_index('ix_shows_created_at', ['created_at'])
+
+
+def downgrade():
+    with op.batch_alter_table('shows') as batch_op:
+        batch_op.drop_index('ix_shows_created_at')
+        batch_op.drop_column('created_at')
+    for table in ['artists', 'venues']:
+        with op.batch_alter_table(table) as batch_op:
+            batch_op.drop_index(f'ix_{table}_updated_at')
+            batch_op.drop_column('updated_at')
@@ -0,0 +1,78 @@
+"""genres table with venue_genres and artist_genres
+
+Revision ID: f93a1d7c2e58
+Revises: e5b8f13a6c47
+Create Date: 2020-09-05 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f93a1d7c2e58'
+down_revision = 'e5b8f13a6c47'
+branch_labels = None
+depends_on = None
+
+# (entity table, association table, association key column)
+GENRE_TABLES = [('venues', 'venue_genres', 'venue_id'), ('artists', 'artist_genres', 'artist_id')]
+
+
+# The old column holds the text of a postgres array, e.g. {Jazz,"Rock n Roll"}
+def parse_genres(text):
+    return [name.strip().strip('"') for name in (text or '').strip('{}').split(',') if name.strip().strip('"')]
+
+
+def format_genres(names):
+    return '{' + ','.join(f'"{name}"' if ' ' in name else name for name in names) + '}'
+
+
+def upgrade():
+    genres = op.create_table('genres',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('name', sa.String(length=120), nullable=False),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('name')
+    )
+    for table, genre_table, key in GENRE_TABLES:
+        op.create_table(genre_table,
+        sa.Column(key, sa.Integer(), nullable=False),
+        sa.Column('genre_id', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint([key], [f'{table}.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['genre_id'], ['genres.id'], ),
+        sa.PrimaryKeyConstraint(key, 'genre_id')
+        )
+        op.create_index(f'ix_{genre_table}_genre_id_{key}', genre_table, ['genre_id', key])
+
+    # Move the genres of the existing rows to the new tables
+    connection = op.get_bind()
+    genre_ids = {}
+    for table, genre_table, key in GENRE_TABLES:
+        links = []
+        for record_id, text in connection.execute(sa.text(f'SELECT id, genres FROM {table}')):
+            for name in dict.fromkeys(parse_genres(text)):
+                if name not in genre_ids:
+                    genre_ids[name] = connection.execute(genres.insert().values(name=name)).inserted_primary_key[0]
+                links.append({key: record_id, 'genre_id': genre_ids[name]})
+        if links:
+            op.bulk_insert(sa.table(genre_table, sa.column(key), sa.column('genre_id')), links)
+        with op.batch_alter_table(table) as batch_op:
+            batch_op.drop_column('genres')
+
+
+def downgrade():
+    connection = op.get_bind()
+    for table, genre_table, key in GENRE_TABLES:
+        with op.batch_alter_table(table) as batch_op:
+            batch_op.add_column(sa.Column('genres', sa.String(length=120), nullable=True))
+        names = {}
+        for record_id, name in connection.execute(sa.text(
+                f'SELECT {key}, genres.name FROM {genre_table} JOIN genres ON genres.id = genre_id ORDER BY genres.name')):
+            names.setdefault(record_id, []).append(name)
+        for record_id, record_names in names.items():
+            connection.execute(sa.text(f'UPDATE {table} SET genres = :genres WHERE id = :id'),
+                               genres=format_genres(record_names), id=record_id)
+        op.drop_index(f'ix_{genre_table}_genre_id_{key}', table_name=genre_table)
+        op.drop_table(genre_table)
+    op.drop_table('genres')
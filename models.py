@@ -0,0 +1,114 @@
+from sqlalchemy import DDL, event, func
+
+from replicas import RoutingSQLAlchemy
+
+# ----------------------------------------------------------------------------#
+# Models.
+# ----------------------------------------------------------------------------#
+
+# Bound to the app by create_app (see app.py)
+db = RoutingSQLAlchemy()
+
+# The relation ship will be Many-to-Many
+# Show Model As Assoiciation Table
+showTable = db.Table('shows',
+db.Column('artist_id', db.Integer, db.ForeignKey('artists.id'), primary_key=True),
+db.Column('venue_id', db.Integer, db.ForeignKey('venues.id'), primary_key=True),
+db.Column('start_time', db.DateTime(timezone=True), primary_key=True),
+db.Column('created_at', db.DateTime(timezone=True), server_default=func.now(), index=True),
+db.Index('ix_shows_venue_id_start_time', 'venue_id', 'start_time'),
+db.Index('ix_shows_artist_id_start_time', 'artist_id', 'start_time'),
+# Range scans of the shows by time, in the order of the shows pages
+db.Index('ix_shows_start_time', 'start_time', 'artist_id', 'venue_id')
+)
+
+# Genres of the venues and artists as association tables
+# The (genre_id, venue_id) and (genre_id, artist_id) indexes serve the filtering by genre
+venueGenreTable = db.Table('venue_genres',
+db.Column('venue_id', db.Integer, db.ForeignKey('venues.id', ondelete='CASCADE'), primary_key=True),
+db.Column('genre_id', db.Integer, db.ForeignKey('genres.id'), primary_key=True),
+db.Index('ix_venue_genres_genre_id_venue_id', 'genre_id', 'venue_id')
+)
+
+artistGenreTable = db.Table('artist_genres',
+db.Column('artist_id', db.Integer, db.ForeignKey('artists.id', ondelete='CASCADE'), primary_key=True),
+db.Column('genre_id', db.Integer, db.ForeignKey('genres.id'), primary_key=True),
+db.Index('ix_artist_genres_genre_id_artist_id', 'genre_id', 'artist_id')
+)
+
+# Genre Model, one row per genre name
+class Genre(db.Model):
+    __tablename__ = 'genres'
+
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(120), unique=True, nullable=False)
+
+# Venue Model connected with Artist through Show
+class Venue(db.Model):
+    __tablename__ = 'venues'
+    __table_args__ = (
+        db.Index('ix_venues_city_state', 'city', 'state'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String)
+    city = db.Column(db.String(120))
+    state = db.Column(db.String(120))
+    address = db.Column(db.String(120))
+    phone = db.Column(db.String(120))
+    image_link = db.Column(db.String(500), default="/static/img/venue.png")
+    facebook_link = db.Column(db.String(120))
+    website = db.Column(db.String(120))
+    seeking_talent = db.Column(db.Boolean, default=True)
+    seeking_description = db.Column(db.String(500), default="We are on the lookout for a local artist")
+    # Row version used by the API ETag and Last-Modified headers
+    updated_at = db.Column(db.DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), index=True)
+    # Show counters kept up to date on write so the listings do not count the shows (see recount_shows)
+    upcoming_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    past_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    next_show_at = db.Column(db.DateTime(timezone=True), index=True)
+    # relationShip Part
+    # Read only: a venue and an artist can share many shows, the shows rows are written with showTable
+    artists = db.relationship("Artist", secondary=showTable, viewonly=True, sync_backref=False,
+                              backref=db.backref('venues', lazy=True, viewonly=True, sync_backref=False))
+    genres = db.relationship("Genre", secondary=venueGenreTable, order_by=Genre.name, lazy='selectin')
+
+# Artist Model connected with Venue through Show
+class Artist(db.Model):
+    __tablename__ = 'artists'
+
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String)
+    city = db.Column(db.String(120))
+    state = db.Column(db.String(120))
+    phone = db.Column(db.String(120))
+    image_link = db.Column(db.String(500), default="/static/img/artist.png")
+    facebook_link = db.Column(db.String(120))
+    website = db.Column(db.String(120))
+    seeking_venue = db.Column(db.Boolean, default=True)
+    seeking_description = db.Column(db.String(500), default="Looking for shows to perform")
+    # Row version used by the API ETag and Last-Modified headers
+    updated_at = db.Column(db.DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), index=True)
+    # Show counters kept up to date on write so the listings do not count the shows (see recount_shows)
+    upcoming_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    past_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    next_show_at = db.Column(db.DateTime(timezone=True), index=True)
+    # relationShip Part
+    genres = db.relationship("Genre", secondary=artistGenreTable, order_by=Genre.name, lazy='selectin')
+
+
+# Trigram indexes of the names served to the name searches (search_names, search_typeahead) by pg_trgm,
+# created on postgresql only as by the c27d5e8f4a92 migration: the other databases search the names in
+# memory and would only get a b-tree index nothing reads.
+POSTGRESQL_NAME_INDEXES = {'venues': 'ix_venues_name_trgm', 'artists': 'ix_artists_name_trgm'}
+
+event.listen(db.metadata, 'before_create',
+             DDL('CREATE EXTENSION IF NOT EXISTS pg_trgm').execute_if(dialect='postgresql'))
+for table_name, index_name in POSTGRESQL_NAME_INDEXES.items():
+    event.listen(db.metadata.tables[table_name], 'after_create',
+                 DDL(f'CREATE INDEX {index_name} ON {table_name} USING gin (name gin_trgm_ops)')
+                 .execute_if(dialect='postgresql'))
+
+# The autogenerated migrations leave these indexes alone, the models do not declare them (see app.py)
+def include_migrated_object(object, name, type_, reflected, compare_to):
+    return not (type_ == 'index' and name in POSTGRESQL_NAME_INDEXES.values())
@@ -0,0 +1,48 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from flask import copy_current_request_context, current_app, g, has_request_context
+
+# ----------------------------------------------------------------------------#
+# Parallel queries.
+# ----------------------------------------------------------------------------#
+
+# Threads of this process running the independent queries of a request at the same time (PARALLEL_QUERIES)
+# SQLAlchemy 1.3 has no asyncio engine to await them, but a thread waiting on the database releases
+# the GIL just the same, so the request waits for its slowest query instead of the sum of them.
+# Each request can hold up to PARALLEL_QUERY_THREADS connections of the pool (DB_POOL_SIZE).
+class ParallelQueries:
+    def __init__(self, app):
+        self.executor = ThreadPoolExecutor(max_workers=app.config['PARALLEL_QUERY_THREADS'],
+                                           thread_name_prefix='fyyur-query')
+        app.extensions['parallel_queries'] = self
+
+
+def parallel_queries_enabled():
+    return has_request_context() and 'parallel_queries' in current_app.extensions
+
+
+# Call each function (without arguments) and return their results in order
+# With PARALLEL_QUERIES the first one runs in the request thread while the others run at the same time,
+# each in a copy of the request context: on its own session and connection, reading from the database
+# chosen for the request (g.db_bind) and counted by its profile. Otherwise they run one after the other.
+# The exception of the first failing call is raised once all of them are done.
+def run_parallel(first, *calls):
+    if not parallel_queries_enabled():
+        return [first()] + [call() for call in calls]
+    request_globals = dict(g.__dict__)
+
+    def in_request(call):
+        @copy_current_request_context
+        def run():
+            g.__dict__.update(request_globals)
+            return call()
+        return run
+
+    futures = [current_app.extensions['parallel_queries'].executor.submit(in_request(call)) for call in calls]
+    try:
+        results = [first()]
+    finally:
+        # Wait for all of them so no query is still using the request when it ends
+        for future in futures:
+            future.exception()
+    return results + [future.result() for future in futures]
@@ -0,0 +1,122 @@
+import os
+import threading
+import time
+from collections import deque
+
+from flask import jsonify
+from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import event
+from sqlalchemy.exc import TimeoutError
+from sqlalchemy.pool import Pool, QueuePool
+
+from profiling import percentile
+
+
+# QueuePool remembering how long each checkout waited for a connection
+# The wait includes opening a new connection when the pool has none idle.
+class TimedQueuePool(QueuePool):
+    window = 1000
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.wait_ms = deque(maxlen=self.window)
+        self.timeouts = 0
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        except TimeoutError:
+            self.timeouts += 1
+            raise
+        finally:
+            self.wait_ms.append((time.perf_counter() - start) * 1000)
+
+
+# flask_sqlalchemy applying the DB_* pool settings of the config
+# SQLite keeps the pool chosen by flask_sqlalchemy as it has no use for a connection queue.
+class PooledSQLAlchemy(SQLAlchemy):
+    def apply_driver_hacks(self, app, sa_url, options):
+        sa_url, options = super().apply_driver_hacks(app, sa_url, options)
+        if sa_url.drivername == 'sqlite':
+            return sa_url, options
+        TimedQueuePool.window = app.config.get('POOL_METRICS_WINDOW', TimedQueuePool.window)
+        options.update(
+            poolclass=TimedQueuePool,
+            pool_size=app.config['DB_POOL_SIZE'],
+            max_overflow=app.config['DB_MAX_OVERFLOW'],
+            pool_timeout=app.config['DB_POOL_TIMEOUT'],
+            pool_recycle=app.config['DB_POOL_RECYCLE'],
+            pool_pre_ping=app.config['DB_POOL_PRE_PING'],
+        )
+        if sa_url.drivername.startswith('postgresql') and app.config['DB_STATEMENT_TIMEOUT_MS']:
+            connect_args = options.setdefault('connect_args', {})
+            connect_args['options'] = f"-c statement_timeout={app.config['DB_STATEMENT_TIMEOUT_MS']}"
+        return sa_url, options
+
+
+# Connections opened, checked out and invalidated by the pools of this process
+# Listened on all the pools so the ones recreated after a dispose are counted too.
+# The listeners are added once per process: an app created again (tests, benchmarks) shares them.
+pool_counts = {'connects': 0, 'checkouts': 0, 'invalidations': 0}
+pool_counts_lock = threading.Lock()
+
+
+def count_pool_event(name):
+    def listener(*args):
+        with pool_counts_lock:
+            pool_counts[name] += 1
+    return listener
+
+
+POOL_LISTENERS = [
+    ('connect', count_pool_event('connects')),
+    ('checkout', count_pool_event('checkouts')),
+    ('invalidate', count_pool_event('invalidations')),
+]
+
+
+def listen_pools():
+    for identifier, listener in POOL_LISTENERS:
+        if not event.contains(Pool, identifier, listener):
+            event.listen(Pool, identifier, listener)
+
+
+# Pool gauges and counters of this process served as JSON at /debug/pool
+# Each worker has its own pool, the numbers have to be summed over the workers.
+class PoolMetrics:
+    def __init__(self, app=None, db=None):
+        if app is not None:
+            self.init_app(app, db)
+
+    def init_app(self, app, db):
+        self.app = app
+        self.db = db
+        listen_pools()
+        app.add_url_rule('/debug/pool', 'debug_pool', self.report)
+
+    def stats(self):
+        pool = self.db.get_engine(self.app).pool
+        with pool_counts_lock:
+            report = {'pid': os.getpid(), 'pool': type(pool).__name__, **pool_counts}
+        if isinstance(pool, QueuePool):
+            report.update(
+                size=pool.size(),
+                checked_in=pool.checkedin(),
+                checked_out=pool.checkedout(),
+                # Negative while the pool has not opened all its size yet
+                overflow=pool.overflow(),
+                max_overflow=pool._max_overflow,
+            )
+        if isinstance(pool, TimedQueuePool):
+            wait_ms = list(pool.wait_ms)
+            report.update(
+                timeouts=pool.timeouts,
+                wait_p50_ms=percentile(wait_ms, 0.5),
+                wait_p95_ms=percentile(wait_ms, 0.95),
+                wait_max_ms=max(wait_ms, default=None),
+            )
+        return report
+
+    def report(self):
+        return jsonify(self.stats())
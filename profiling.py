@@ -0,0 +1,152 @@
+import threading
+import time
+from collections import defaultdict, deque
+
+from flask import current_app, g, has_app_context, has_request_context, jsonify, request
+from jinja2 import Template
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+
+# Upper bounds in milliseconds of the latency histogram buckets
+HISTOGRAM_BUCKETS = [1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, float('inf')]
+
+
+def percentile(values, fraction):
+    if not values:
+        return None
+    values = sorted(values)
+    return values[min(len(values) - 1, int(fraction * len(values)))]
+
+
+# Templates rendered through this class add their rendering time to the current request
+class ProfiledTemplate(Template):
+    def render(self, *args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return super().render(*args, **kwargs)
+        finally:
+            if has_request_context() and 'profile' in g:
+                with g.profile['lock']:
+                    g.profile['render_ms'] += (time.perf_counter() - start) * 1000
+
+
+# The statements are timed by listeners on all the engines, created lazily by flask_sqlalchemy, and
+# counted by the profiler of the current app if it has one.
+# The listeners are added once per process: an app created again (tests, benchmarks) shares them.
+def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('profile_start', []).append(time.perf_counter())
+
+
+def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    start = conn.info.get('profile_start')
+    if not start:
+        return
+    elapsed = (time.perf_counter() - start.pop()) * 1000
+    profiler = current_app.extensions.get('sql_profiler') if has_app_context() else None
+    if profiler is not None:
+        profiler.record_statement(elapsed, statement, parameters)
+
+
+STATEMENT_LISTENERS = [
+    ('before_cursor_execute', before_cursor_execute),
+    ('after_cursor_execute', after_cursor_execute),
+]
+
+
+def listen_engines():
+    for identifier, listener in STATEMENT_LISTENERS:
+        if not event.contains(Engine, identifier, listener):
+            event.listen(Engine, identifier, listener)
+
+
+# Per request SQL profiler
+# For each request it records the number of statements, the database and rendering times
+# and the slowest statements. The last `window` requests of each endpoint are kept to build
+# their histograms. Statements slower than `slow_query_ms` are logged with their SQL.
+class SQLProfiler:
+    def __init__(self, app=None, window=1000, slow_query_ms=100, slowest=5):
+        self.window = window
+        self.slow_query_ms = slow_query_ms
+        self.slowest = slowest
+        self.samples = defaultdict(lambda: deque(maxlen=self.window))
+        self.slow_statements = defaultdict(list)
+        self.lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.app = app
+        self.window = app.config.get('SQL_PROFILING_WINDOW', self.window)
+        self.slow_query_ms = app.config.get('SLOW_QUERY_MS', self.slow_query_ms)
+        app.jinja_env.template_class = ProfiledTemplate
+        app.extensions['sql_profiler'] = self
+        listen_engines()
+        app.before_request(self.start_request)
+        app.after_request(self.finish_request)
+        app.add_url_rule('/debug/profile', 'debug_profile', self.report)
+
+    # The lock of the profile guards it from the PARALLEL_QUERIES threads of the request, which share it
+    def start_request(self):
+        g.profile = {'start': time.perf_counter(), 'queries': 0, 'db_ms': 0.0, 'render_ms': 0.0, 'statements': [],
+                     'lock': threading.Lock()}
+
+    def record_statement(self, elapsed, statement, parameters):
+        if elapsed >= self.slow_query_ms:
+            self.app.logger.warning('Slow query (%.1f ms) on %s: %s %r', elapsed,
+                                    request.endpoint if has_request_context() else 'cli', statement, parameters)
+        if not has_request_context() or 'profile' not in g:
+            return
+        profile = g.profile
+        with profile['lock']:
+            profile['queries'] += 1
+            profile['db_ms'] += elapsed
+            profile['statements'].append((elapsed, statement))
+
+    def finish_request(self, response):
+        profile = g.pop('profile', None)
+        if profile is None:
+            return response
+        total_ms = (time.perf_counter() - profile['start']) * 1000
+        response.headers['Server-Timing'] = ', '.join([
+            f'db;dur={profile["db_ms"]:.1f};desc="{profile["queries"]} queries"',
+            f'render;dur={profile["render_ms"]:.1f}',
+            f'total;dur={total_ms:.1f}',
+        ])
+        endpoint = request.endpoint or 'unknown'
+        if endpoint == 'debug_profile':
+            return response
+        slowest = sorted(profile['statements'], key=lambda item: item[0], reverse=True)[:self.slowest]
+        with self.lock:
+            self.samples[endpoint].append((total_ms, profile['queries'], profile['db_ms'], profile['render_ms']))
+            statements = self.slow_statements[endpoint] + [(round(ms, 2), sql) for ms, sql in slowest]
+            self.slow_statements[endpoint] = sorted(statements, reverse=True)[:self.slowest]
+        return response
+
+    # Statistics of each endpoint over its last requests
+    def stats(self):
+        with self.lock:
+            samples = {endpoint: list(values) for endpoint, values in self.samples.items()}
+            slow_statements = {endpoint: list(values) for endpoint, values in self.slow_statements.items()}
+        report = {}
+        for endpoint, values in samples.items():
+            totals = [value[0] for value in values]
+            histogram = {str(bound): 0 for bound in HISTOGRAM_BUCKETS}
+            for total in totals:
+                bound = next(bound for bound in HISTOGRAM_BUCKETS if total <= bound)
+                histogram[str(bound)] += 1
+            report[endpoint] = {
+                'requests': len(values),
+                'p50_ms': percentile(totals, 0.5),
+                'p95_ms': percentile(totals, 0.95),
+                'queries_per_request': sum(value[1] for value in values) / len(values),
+                'max_queries': max(value[1] for value in values),
+                'db_ms_per_request': sum(value[2] for value in values) / len(values),
+                'render_ms_per_request': sum(value[3] for value in values) / len(values),
+                'histogram_ms': histogram,
+                'slowest_statements': [{'ms': ms, 'sql': sql} for ms, sql in slow_statements.get(endpoint, [])],
+            }
+        return report
+
+    def report(self):
+        return jsonify(self.stats())
@@ -0,0 +1,591 @@
+import base64
+import json
+import threading
+import time
+from bisect import bisect_left, insort
+from datetime import date, datetime, timedelta, timezone
+from itertools import groupby
+
+from flask import current_app, request
+from sqlalchemy import func, tuple_, and_, or_, not_, case, select, literal, text
+
+from filters import request_timezone, str_to_datetime
+from formatting import get_timezone, parse_datetime
+from models import db, showTable, venueGenreTable, Genre, Venue, Artist
+from parallel import run_parallel
+from search import NgramIndex, PrefixIndex, let_other_threads_run
+
+# ----------------------------------------------------------------------------#
+# Queries.
+# ----------------------------------------------------------------------------#
+
+
+# Current UTC time used to split the shows into upcoming and past ones inside the database
+def utc_now():
+    return datetime.now(timezone.utc)
+
+# Get the Genre rows of the genre names, the missing ones are created
+def get_genres(names):
+    names = list(dict.fromkeys(names))
+    genres = Genre.query.filter(Genre.name.in_(names)).all() if names else []
+    known = {genre.name for genre in genres}
+    for name in names:
+        if name not in known:
+            genre = Genre(name=name)
+            db.session.add(genre)
+            genres.append(genre)
+    return genres
+
+# Get the genre names of many venues or artists with one query
+# table is venueGenreTable or artistGenreTable and key_column its venue_id or artist_id column
+# Return a dictionary of id: [genre names]
+def genre_names(table, key_column, ids):
+    names = {record_id: [] for record_id in ids}
+    if names:
+        records = db.session.query(key_column, Genre.name)\
+            .join(Genre, Genre.id == table.c.genre_id)\
+            .filter(key_column.in_(list(names)))\
+            .order_by(Genre.name).all()
+        for record_id, name in records:
+            names[record_id].append(name)
+    return names
+
+# Ids of the venues or artists having a genre, read from the (genre_id, id) index
+def genre_member_ids(table, key_column, genre):
+    return db.session.query(key_column)\
+        .join(Genre, Genre.id == table.c.genre_id)\
+        .filter(Genre.name == genre)
+
+# Page cursors are the sort key values of the first or last row of a page
+# encoded as url safe base64 json
+def encode_cursor(values):
+    values = [value.isoformat() if isinstance(value, datetime) else value for value in values]
+    return base64.urlsafe_b64encode(json.dumps(values).encode()).decode()
+
+def decode_cursor(cursor, keys):
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        if len(values) != len(keys):
+            return None
+        return [parse_datetime(value) if isinstance(key.type, db.DateTime) else value
+                for key, value in zip(keys, values)]
+    except (ValueError, TypeError):
+        return None
+
+# Get one page of the query ordered by keys, starting after or ending before a cursor
+# The page is found with a range condition on the sort keys so its cost does not grow with the offset
+# Return the page records with the next and previous cursors
+def keyset_page(query, keys):
+    after = decode_cursor(request.args.get('after', ''), keys) if request.args.get('after') else None
+    before = decode_cursor(request.args.get('before', ''), keys) if request.args.get('before') else None
+    page_size = min(request.args.get('per_page', current_app.config['PAGE_SIZE'], type=int), current_app.config['MAX_PAGE_SIZE'])
+    page_size = max(page_size, 1)
+    if before is not None:
+        query = query.filter(tuple_(*keys) < tuple_(*before)).order_by(*[key.desc() for key in keys])
+    else:
+        if after is not None:
+            query = query.filter(tuple_(*keys) > tuple_(*after))
+        query = query.order_by(*keys)
+    records = query.limit(page_size + 1).all()
+    has_more = len(records) > page_size
+    records = records[:page_size]
+    if before is not None:
+        records.reverse()
+    has_next = has_more if before is None else True
+    has_prev = has_more if before is not None else after is not None
+    # args keeps the view arguments and the other query arguments (filters) in the pager links
+    pager = {'next': None, 'prev': None, 'per_page': page_size,
+             'args': dict(request.view_args or {}, **{key: value for key, value in request.args.items()
+                                                       if key not in ('after', 'before', 'per_page')})}
+    if records and has_next:
+        pager['next'] = encode_cursor([getattr(records[-1], key.key) for key in keys])
+    if records and has_prev:
+        pager['prev'] = encode_cursor([getattr(records[0], key.key) for key in keys])
+    return records, pager
+
+# In memory name indexes used by search_names when the database has no pg_trgm
+ngram_indexes = {}
+
+# Drop the in memory name index of a model after its names were changed
+def invalidate_search_index(model):
+    ngram_indexes.pop(model.__tablename__, None)
+
+# Search a model by name with partial, case insensitive matching
+# Return (id, name) of the matches ordered by relevance
+def search_names(model, term):
+    if db.engine.dialect.name == 'postgresql':
+        # ilike is served by the gin_trgm_ops index and similarity ranks the matches
+        return db.session.query(model.id, model.name)\
+            .filter(model.name.ilike(f'%{term}%'))\
+            .order_by(func.similarity(model.name, term).desc(), model.id).all()
+    index = ngram_indexes.get(model.__tablename__)
+    if index is None:
+        index = NgramIndex(db.session.query(model.id, model.name))
+        ngram_indexes[model.__tablename__] = index
+    return index.search(term)
+
+# In memory typeahead indexes of the venue and artist names
+# The writes of this worker update them at once (refresh_typeahead). The names written by the
+# other workers are read from updated_at every TYPEAHEAD_REFRESH_SECONDS, and the indexes are
+# rebuilt every TYPEAHEAD_REBUILD_SECONDS to drop the records they deleted.
+# The builds and the refreshes run in a thread of their own, one at a time for each model: the
+# requests keep searching the current index meanwhile, or the database while the worker has none yet.
+# They work TYPEAHEAD_BUILD_CHUNK_SIZE names at a time and let the requests run between the chunks,
+# so the worker never waits for more than a chunk. typeahead_lock guards the indexes, which are not
+# thread safe.
+typeahead_indexes = {}
+# Table name: {'thread', 'changes' written by this worker meanwhile, replayed on the new names}
+typeahead_builds = {}
+typeahead_lock = threading.Lock()
+
+# Read (id, name) of the records of a query by chunks of chunk_size, for PrefixIndex.built_in_chunks
+# Only a chunk is held at a time, the rows are never freed all at once.
+def read_typeahead_names(query, chunk_size):
+    chunk = []
+    for record in query.yield_per(chunk_size):
+        chunk.append((record.id, record.name))
+        if len(chunk) == chunk_size:
+            yield chunk
+            chunk = []
+            let_other_threads_run()
+    if chunk:
+        yield chunk
+
+# Build the whole index, or with since add the names updated since then to the current one
+# More changed names than a chunk (e.g. an import) are indexed by a new build instead
+def update_typeahead_index(app, model, since=None):
+    name = model.__tablename__
+    chunk_size = app.config['TYPEAHEAD_BUILD_CHUNK_SIZE']
+    try:
+        with app.app_context():
+            started = time.monotonic()
+            # updated_at is set when a transaction starts, the next refresh reads the last minute again
+            # for the slow ones
+            read_at = utc_now() - timedelta(minutes=1)
+            query = db.session.query(model.id, model.name)
+            changed, index = None, None
+            if since is not None:
+                changed = query.filter(model.updated_at > since).limit(chunk_size + 1).all()
+            if changed is None or len(changed) > chunk_size:
+                changed, index = [], PrefixIndex.built_in_chunks(read_typeahead_names(query, chunk_size), chunk_size)
+        with typeahead_lock:
+            if index is not None:
+                state = {'index': index, 'built_at': started, 'checked_at': started}
+            else:
+                # Dropped meanwhile by invalidate_typeahead_index, the next search builds it again
+                state = typeahead_indexes.get(name)
+                if state is None:
+                    return
+            for record in changed:
+                state['index'].add(record.id, record.name)
+            for record_id, record_name in typeahead_builds[name]['changes']:
+                apply_typeahead_change(state['index'], record_id, record_name)
+            state['read_at'] = read_at
+            typeahead_indexes[name] = state
+    except Exception:
+        app.logger.exception(f'The typeahead index of the {name} could not be updated')
+    finally:
+        with typeahead_lock:
+            typeahead_builds.pop(name, None)
+
+# Start building (or refreshing, with since) the typeahead index of a model unless it is being updated
+# typeahead_lock is held
+def start_typeahead_update(model, since=None):
+    if model.__tablename__ in typeahead_builds:
+        return
+    thread = threading.Thread(target=update_typeahead_index, args=(current_app._get_current_object(), model, since),
+                              name=f'fyyur-typeahead-{model.__tablename__}', daemon=True)
+    typeahead_builds[model.__tablename__] = {'thread': thread, 'changes': []}
+    thread.start()
+
+# Wait for the typeahead indexes being built or refreshed (benchmarks, tests)
+def wait_typeahead_builds():
+    with typeahead_lock:
+        threads = [build['thread'] for build in typeahead_builds.values()]
+    for thread in threads:
+        thread.join()
+
+# The typeahead index state of a model, None until it is built
+# Starts the build or the refresh of the index when it is due
+def typeahead_index(model):
+    now = time.monotonic()
+    with typeahead_lock:
+        state = typeahead_indexes.get(model.__tablename__)
+        if state is None or now - state['built_at'] > current_app.config['TYPEAHEAD_REBUILD_SECONDS']:
+            start_typeahead_update(model)
+        elif now - state['checked_at'] > current_app.config['TYPEAHEAD_REFRESH_SECONDS']:
+            state['checked_at'] = now
+            start_typeahead_update(model, state['read_at'])
+        return state
+
+# Get (id, name) of at most limit names of a model having a word starting with the term
+# Until the index of the worker is built the names are matched by postgresql, with the gin_trgm_ops
+# index of the names. The other databases would scan the table, there are no suggestions meanwhile.
+def search_typeahead(model, term, limit):
+    state = typeahead_index(model)
+    if state is not None:
+        with typeahead_lock:
+            return state['index'].search(term, limit)
+    if db.engine.dialect.name != 'postgresql':
+        return []
+    term = ' '.join(term.split()).replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+    starts = model.name.ilike(f'{term}%', escape='\\')
+    return db.session.query(model.id, model.name)\
+        .filter(or_(starts, model.name.ilike(f'% {term}%', escape='\\')))\
+        .order_by(starts.desc(), model.name, model.id).limit(limit).all()
+
+# Add or rename a record in a typeahead index, remove it when name is None
+def apply_typeahead_change(index, record_id, name):
+    if name is None:
+        index.remove(record_id)
+    else:
+        index.add(record_id, name)
+
+# Apply a write of this worker to the typeahead index of its model, and to the names being updated
+def refresh_typeahead(model, record_id, name=None):
+    with typeahead_lock:
+        state = typeahead_indexes.get(model.__tablename__)
+        if state is not None:
+            apply_typeahead_change(state['index'], record_id, name)
+        build = typeahead_builds.get(model.__tablename__)
+        if build is not None:
+            build['changes'].append((record_id, name))
+
+# Drop the typeahead index of a model after many of its names changed, the next search builds it again
+def invalidate_typeahead_index(model):
+    with typeahead_lock:
+        typeahead_indexes.pop(model.__tablename__, None)
+
+# Upcoming show counters of many venues or artists with one primary key lookup
+# Return a dictionary of id: count
+def upcoming_show_counts(model, ids):
+    counts = dict.fromkeys(ids, 0)
+    if counts:
+        counts.update(db.session.query(model.id, model.upcoming_count).filter(model.id.in_(list(counts))).all())
+    return counts
+
+#  Show counters
+#  ----------------------------------------------------------------
+# upcoming_count, past_count and next_show_at of the venues and artists are written with the shows:
+# a new show is added to its venue and artist counters in the same transaction, deleting shows
+# recounts the touched records, and roll_over_shows moves the shows that started to the past ones.
+# `flask check-show-counters` compares them with the shows table.
+SHOW_KEYS = {'Venue': showTable.c.venue_id, 'Artist': showTable.c.artist_id}
+
+# Add one new show to the counters of its venue and artist
+def count_new_show(venue_id, artist_id, start_time):
+    for model, record_id in [(Venue, venue_id), (Artist, artist_id)]:
+        table = model.__table__
+        if start_time > utc_now():
+            start = literal(start_time, table.c.next_show_at.type)
+            values = {'upcoming_count': table.c.upcoming_count + 1,
+                      'next_show_at': case([(or_(table.c.next_show_at.is_(None), table.c.next_show_at > start), start)],
+                                           else_=table.c.next_show_at)}
+        else:
+            values = {'past_count': table.c.past_count + 1}
+        # The counters are not part of the row version used by the API
+        db.session.execute(table.update().where(table.c.id == record_id)
+                           .values(updated_at=table.c.updated_at, **values))
+
+# Count again the shows of the venues (or artists) matching the criteria, all of them without criteria
+# Each record is counted with correlated subqueries on the (venue_id, start_time) or (artist_id, start_time) index
+def recount_shows(model, *criteria):
+    table = model.__table__
+    key = SHOW_KEYS[model.__name__]
+    now = utc_now()
+    upcoming = showTable.c.start_time > now
+    statement = table.update().values(
+        upcoming_count=select([func.count()]).where(and_(key == table.c.id, upcoming)).as_scalar(),
+        past_count=select([func.count()]).where(and_(key == table.c.id, not_(upcoming))).as_scalar(),
+        next_show_at=select([func.min(showTable.c.start_time)]).where(and_(key == table.c.id, upcoming)).as_scalar(),
+        updated_at=table.c.updated_at)
+    for criterion in criteria:
+        statement = statement.where(criterion)
+    return db.session.execute(statement).rowcount
+
+# Recount the venues and artists whose next show has started
+# Return the number of records updated
+def roll_over_shows():
+    now = utc_now()
+    return sum(recount_shows(model, model.__table__.c.next_show_at <= now) for model in [Venue, Artist])
+
+# Records whose counters differ from the shows table as a list of (id, stored, actual)
+# stored and actual are (upcoming_count, past_count, next_show_at)
+def show_counter_mismatches(model):
+    key = SHOW_KEYS[model.__name__]
+    now = utc_now()
+    upcoming = showTable.c.start_time > now
+    actual = {record_id: [0, 0, None] for record_id, in db.session.query(model.id)}
+    for record_id, count, next_show_at in db.session.query(key, func.count(), func.min(showTable.c.start_time))\
+            .filter(upcoming).group_by(key):
+        actual[record_id][0] = count
+        actual[record_id][2] = next_show_at
+    for record_id, count in db.session.query(key, func.count()).filter(not_(upcoming)).group_by(key):
+        actual[record_id][1] = count
+    mismatches = []
+    for record in db.session.query(model.id, model.upcoming_count, model.past_count, model.next_show_at).order_by(model.id):
+        stored = (record.upcoming_count, record.past_count, record.next_show_at)
+        if stored != tuple(actual[record.id]):
+            mismatches.append((record.id, stored, tuple(actual[record.id])))
+    return mismatches
+
+#  Bookings
+#  ----------------------------------------------------------------
+# An artist or a venue can not have two shows starting less than BOOKING_CONFLICT_MINUTES apart.
+# The shows around the booked ones are read with range scans of the (artist_id, start_time) and
+# (venue_id, start_time) indexes. On postgresql the artists and venues being booked are locked
+# until the commit so two bookings can not take the same slot at the same time.
+
+# Ids are integer columns, a larger number can not be sent to the database
+MAX_ID = 2 ** 31 - 1
+
+# Read the ids and the start time of a booking row (a dict or a form)
+# Return (values, None) or (None, errors)
+def booking_values(row):
+    values = {}
+    errors = {}
+    for field in ['artist_id', 'venue_id']:
+        try:
+            values[field] = int(row.get(field))
+        except (TypeError, ValueError):
+            errors[field] = ['Not a valid id.']
+            continue
+        if not 1 <= values[field] <= MAX_ID:
+            errors[field] = ['Not a valid id.']
+    try:
+        values['start_time'] = str_to_datetime(str(row.get('start_time') or ''))
+    except (ValueError, OverflowError):
+        errors['start_time'] = ['Not a valid datetime value.']
+    return (None, errors) if errors else (values, None)
+
+def as_utc(value):
+    return value.replace(tzinfo=timezone.utc) if value.tzinfo is None else value.astimezone(timezone.utc)
+
+def lock_bookings(artist_ids, venue_ids):
+    if db.engine.dialect.name != 'postgresql':
+        return
+    # Always in the same order so two bookings of the same records can not deadlock
+    for key, ids in [(1, artist_ids), (2, venue_ids)]:
+        if ids:
+            db.session.execute(text('SELECT pg_advisory_xact_lock(:key, id) '
+                                    'FROM (SELECT unnest(CAST(:ids AS integer[])) AS id ORDER BY 1) AS ids'),
+                               {'key': key, 'ids': sorted(ids)})
+
+# Insert the rows that are valid and do not conflict with a show already booked or an earlier row
+# The caller commits. Return the result of each row in order:
+# {'index', 'status': 'booked', 'invalid' or 'conflict', the 'artist_id' and 'venue_id' of the booked ones
+# and the 'errors' or 'conflicts' of the rejected ones}
+def book_shows(rows):
+    window = timedelta(minutes=current_app.config['BOOKING_CONFLICT_MINUTES'])
+    results = []
+    bookings = []
+    for index, row in enumerate(rows):
+        values, errors = booking_values(row)
+        if errors:
+            results.append({'index': index, 'status': 'invalid', 'errors': errors})
+        else:
+            results.append({'index': index, 'status': 'booked',
+                            'artist_id': values['artist_id'], 'venue_id': values['venue_id']})
+            bookings.append((index, values))
+    if not bookings:
+        return results
+
+    ids = {'artist': {values['artist_id'] for _, values in bookings},
+           'venue': {values['venue_id'] for _, values in bookings}}
+    lock_bookings(ids['artist'], ids['venue'])
+    # The artists and venues that exist with the start times of their shows around the booked ones
+    first = min(values['start_time'] for _, values in bookings) - window
+    last = max(values['start_time'] for _, values in bookings) + window
+    known = {'artist': set(), 'venue': set()}
+    booked = {}
+    for side, model, key in [('artist', Artist, showTable.c.artist_id), ('venue', Venue, showTable.c.venue_id)]:
+        records = db.session.query(model.id, showTable.c.start_time)\
+            .outerjoin(showTable, and_(key == model.id, showTable.c.start_time >= first, showTable.c.start_time <= last))\
+            .filter(model.id.in_(ids[side]))
+        for record_id, start_time in records:
+            known[side].add(record_id)
+            if start_time is not None:
+                booked.setdefault((side, record_id), []).append(as_utc(start_time))
+    for times in booked.values():
+        times.sort()
+
+    inserted = []
+    for index, values in bookings:
+        start_time = values['start_time']
+        errors = {f'{side}_id': ['Unknown id.'] for side in ['artist', 'venue'] if values[f'{side}_id'] not in known[side]}
+        if errors:
+            results[index] = {'index': index, 'status': 'invalid', 'errors': errors}
+            continue
+        conflicts = []
+        for side in ['artist', 'venue']:
+            times = booked.get((side, values[f'{side}_id']), [])
+            position = bisect_left(times, start_time - window)
+            while position < len(times) and times[position] <= start_time + window:
+                # Shows exactly the window apart are fine, the same start time never is
+                if abs(times[position] - start_time) < window or times[position] == start_time:
+                    conflicts.append({side + '_id': values[f'{side}_id'], 'start_time': times[position].isoformat()})
+                position += 1
+        if conflicts:
+            results[index] = {'index': index, 'status': 'conflict', 'conflicts': conflicts}
+            continue
+        for side in ['artist', 'venue']:
+            insort(booked.setdefault((side, values[f'{side}_id']), []), start_time)
+        inserted.append(values)
+
+    if len(inserted) == 1:
+        db.session.execute(showTable.insert().values(inserted))
+        count_new_show(inserted[0]['venue_id'], inserted[0]['artist_id'], inserted[0]['start_time'])
+    elif inserted:
+        db.session.execute(showTable.insert().values(inserted))
+        recount_shows(Venue, Venue.id.in_({values['venue_id'] for values in inserted}))
+        recount_shows(Artist, Artist.id.in_({values['artist_id'] for values in inserted}))
+    return results
+
+# Get the shows of a venue (or an artist) split into upcoming and past shows with one query
+# entity_column is the showTable column of the page entity, other_model the side shown in the tiles
+# Upcoming shows are ordered soonest first and past shows latest first,
+# each section keeps at most limit shows after skipping offset ones
+# Return a dictionary of section: (shows, total count of the section)
+# With section ('upcoming' or 'past') only that section is read and returned
+def split_shows(entity_column, entity_id, other_model, other_column, limit=None, offset=0, section=None):
+    prefix = other_model.__name__.lower()
+    upcoming = showTable.c.start_time > utc_now()
+    shows = db.session.query(
+        other_column.label(f'{prefix}_id'),
+        other_model.name.label(f'{prefix}_name'),
+        other_model.image_link.label(f'{prefix}_image_link'),
+        showTable.c.start_time,
+        upcoming.label('upcoming'),
+        func.row_number().over(partition_by=upcoming, order_by=showTable.c.start_time).label('upcoming_rank'),
+        func.row_number().over(partition_by=upcoming, order_by=showTable.c.start_time.desc()).label('past_rank'),
+        func.count().over(partition_by=upcoming).label('section_count'))\
+        .join(other_model, other_model.id == other_column)\
+        .filter(entity_column == entity_id)
+    if section is not None:
+        shows = shows.filter(upcoming if section == 'upcoming' else not_(upcoming))
+    shows = shows.subquery()
+    query = db.session.query(shows)
+    if limit:
+        query = query.filter(or_(
+            and_(shows.c.upcoming, shows.c.upcoming_rank > offset, shows.c.upcoming_rank <= offset + limit),
+            and_(not_(shows.c.upcoming), shows.c.past_rank > offset, shows.c.past_rank <= offset + limit)))
+    all_records = query.all()
+    sections = {}
+    for name, rank in [('upcoming', 'upcoming_rank'), ('past', 'past_rank')]:
+        if section is not None and name != section:
+            continue
+        records = sorted((record for record in all_records if bool(record.upcoming) == (name == 'upcoming')),
+                         key=lambda record: getattr(record, rank))
+        count = records[0].section_count if records else 0
+        sections[name] = ([{
+            f'{prefix}_id': getattr(record, f'{prefix}_id'),
+            f'{prefix}_name': getattr(record, f'{prefix}_name'),
+            f'{prefix}_image_link': getattr(record, f'{prefix}_image_link'),
+            'start_time': record.start_time
+        } for record in records], count)
+    return sections
+
+# The details of a venue or artist page (returned by the details function) and the first shows of its two
+# sections, see split_shows. Two statements: the details with their genres, then both sections, which
+# PARALLEL_QUERIES reads at the same time.
+def details_with_shows(details, entity_column, entity_id, other_model, other_column, limit=None):
+    return tuple(run_parallel(details, lambda: split_shows(entity_column, entity_id, other_model, other_column,
+                                                            limit=limit)))
+
+# Group a page of venues by city and state with the upcoming shows count of each venue
+# Everything is fetched with one query, the counts are the upcoming_count counters
+def venue_areas(genre=None):
+    query = db.session.query(Venue.id, Venue.name, Venue.city, Venue.state, Venue.upcoming_count.label('num_upcoming_shows'))
+    if genre is not None:
+        query = query.filter(Venue.id.in_(genre_member_ids(venueGenreTable, venueGenreTable.c.venue_id, genre)))
+    records, pager = keyset_page(query, [Venue.state, Venue.city, Venue.id])
+    data = []
+    for (city, state), area_records in groupby(records, key=lambda record: (record.city, record.state)):
+        venues_data = [{'id': record.id, 'name': record.name, 'num_upcomig_shows': record.num_upcoming_shows}
+                       for record in area_records]
+        data.append({'city': city, 'state': state, 'venues': venues_data})
+    return data, pager
+
+#  Show dates
+#  ----------------------------------------------------------------
+# The date range, city and calendar listings are range scans of ix_shows_start_time,
+# or of the (venue_id | artist_id, start_time) indexes for one venue or artist
+
+SHOW_PAGE_KEYS = [showTable.c.start_time, showTable.c.artist_id, showTable.c.venue_id]
+
+# The shows with the names and images of their venue and artist
+def show_listing():
+    return db.session.query(showTable, Venue.name.label('venue_name'), Venue.image_link.label('venue_image_link'),
+                            Artist.name.label('artist_name'), Artist.image_link.label('artist_image_link'))\
+        .join(Venue, Venue.id == showTable.c.venue_id)\
+        .join(Artist, Artist.id == showTable.c.artist_id)
+
+# Keep the shows starting in [start, end), a missing bound is open
+def shows_between(query, start=None, end=None):
+    if start is not None:
+        query = query.filter(showTable.c.start_time >= start)
+    if end is not None:
+        query = query.filter(showTable.c.start_time < end)
+    return query
+
+# UTC instant of the midnight starting a day in the time zone of the request
+def day_start(day):
+    tz = get_timezone(request_timezone())
+    midnight = datetime.combine(day, datetime.min.time())
+    # pytz zones (older babel) have to localize, zoneinfo ones are simply attached
+    midnight = tz.localize(midnight) if hasattr(tz, 'localize') else midnight.replace(tzinfo=tz)
+    return midnight.astimezone(timezone.utc)
+
+# Today in the time zone of the request
+def local_today():
+    return datetime.now(get_timezone(request_timezone())).date()
+
+# The ?from= and ?to= days (YYYY-MM-DD, both included) as a UTC [start, end) range
+# Raise ValueError when a day is malformed
+def requested_range():
+    start = end = None
+    if request.args.get('from'):
+        start = range_bound(datetime.strptime(request.args['from'], '%Y-%m-%d').date())
+    if request.args.get('to'):
+        end = range_bound(datetime.strptime(request.args['to'], '%Y-%m-%d').date(), days=1)
+    return start, end
+
+# UTC start of a day of a requested range, None for the days at the limits of the dates
+# (0001-01-01, 9999-12-31) which can not be moved to the next day or to UTC: no show is that far
+def range_bound(day, days=0):
+    try:
+        return day_start(day + timedelta(days=days))
+    except OverflowError:
+        return None
+
+# Shows of the venues of a city (and state) from now to the same time next week
+def city_week_shows(city, state=None):
+    start = utc_now()
+    query = shows_between(show_listing().filter(Venue.city == city), start, start + timedelta(days=7))
+    if state:
+        query = query.filter(Venue.state == state)
+    return query
+
+# Month calendar of the shows of a venue (or an artist) in the time zone of the request
+# Return the weeks of the month, Monday first, as lists of (day, shows of the day)
+# with the days of the previous and next months filling the first and last weeks
+def month_shows(entity_column, entity_id, year, month):
+    # Only the calendar pages need the calendar module
+    import calendar
+
+    first_day = date(year, month, 1)
+    next_first_day = date(year + month // 12, month % 12 + 1, 1)
+    records = shows_between(show_listing().filter(entity_column == entity_id),
+                            day_start(first_day), day_start(next_first_day)).order_by(*SHOW_PAGE_KEYS).all()
+    tz = get_timezone(request_timezone())
+    days = {}
+    for record in records:
+        days.setdefault(as_utc(record.start_time).astimezone(tz).date(), []).append(record)
+    return [[(day, days.get(day, [])) for day in week]
+            for week in calendar.Calendar().monthdatescalendar(year, month)]
+
+# (year, month) of the month before and after a month
+def adjacent_months(year, month):
+    previous_month = (year, month - 1) if month > 1 else (year - 1, 12)
+    next_month = (year, month + 1) if month < 12 else (year + 1, 1)
+    return previous_month, next_month
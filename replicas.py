@@ -0,0 +1,99 @@
+import time
+
+from flask import current_app, g, has_request_context, request
+from flask_sqlalchemy import SignallingSession, get_state
+from sqlalchemy import event
+from sqlalchemy.orm import sessionmaker
+
+from pooling import PooledSQLAlchemy
+
+REPLICA_BIND = 'replica'
+READ_METHODS = {'GET', 'HEAD', 'OPTIONS'}
+# Time (epoch seconds) until which the browser reads from the primary
+# A plain cookie, not the session: it only has to be understood by every worker, and a forged one
+# can at most send the reads of its own browser to the primary.
+READ_PRIMARY_COOKIE = 'fyyur_read_primary_until'
+
+
+# The request reads from the primary because its browser wrote less than REPLICA_STICKY_SECONDS ago
+def pinned_to_primary():
+    return has_request_context() and g.get('read_primary', False)
+
+# The request reads from the replica less than REPLICA_STICKY_SECONDS after invalidated_at (epoch
+# seconds, e.g. of a write): the replica may not have the write yet
+def replica_may_lag(invalidated_at):
+    return has_request_context() and g.get('db_bind') == REPLICA_BIND and invalidated_at is not None \
+        and invalidated_at > time.time() - current_app.config['REPLICA_STICKY_SECONDS']
+
+
+# Mark a view reached by POST which only reads (the search forms) so it is served by the replica too
+def read_only(view):
+    view.read_only = True
+    return view
+
+
+# Session sending the statements of read only requests to the replica bind
+# Anything flushed goes to the primary, in case a read only view writes after all.
+class RoutingSession(SignallingSession):
+    def get_bind(self, mapper=None, clause=None):
+        if not self._flushing and has_request_context() and g.get('db_bind') == REPLICA_BIND:
+            return get_state(self.app).db.get_engine(self.app, bind=REPLICA_BIND)
+        return super().get_bind(mapper, clause)
+
+
+# A request which committed on the primary keeps its browser there (ReplicaRouter.remember_write)
+# Listened once per process on all the routing sessions, the apps created again share it.
+def remember_commit(db_session):
+    if has_request_context() and g.get('db_bind') != REPLICA_BIND:
+        g.db_wrote = True
+
+
+class RoutingSQLAlchemy(PooledSQLAlchemy):
+    def create_session(self, options):
+        return sessionmaker(class_=RoutingSession, db=self, **options)
+
+
+# Read/write splitting between the primary database and the replica in SQLALCHEMY_BINDS['replica']
+# GET requests and the views marked read_only read from the replica, the other ones use the primary.
+# After a request committed something, the same browser keeps reading from the primary for
+# REPLICA_STICKY_SECONDS so the page it is redirected to shows its own change despite the replica lag.
+class ReplicaRouter:
+    def __init__(self, app=None, db=None):
+        if app is not None:
+            self.init_app(app, db)
+
+    def init_app(self, app, db):
+        self.app = app
+        self.db = db
+        app.before_request(self.choose_bind)
+        app.after_request(self.remember_write)
+        if not event.contains(RoutingSession, 'after_commit', remember_commit):
+            event.listen(RoutingSession, 'after_commit', remember_commit)
+
+    def replica_enabled(self):
+        return REPLICA_BIND in (self.app.config.get('SQLALCHEMY_BINDS') or {})
+
+    def choose_bind(self):
+        if not self.replica_enabled():
+            return
+        view = self.app.view_functions.get(request.endpoint)
+        reads_only = request.method in READ_METHODS or getattr(view, 'read_only', False)
+        if not reads_only:
+            return
+        if self.read_primary_until() < time.time():
+            g.db_bind = REPLICA_BIND
+        else:
+            g.read_primary = True
+
+    def read_primary_until(self):
+        try:
+            return float(request.cookies.get(READ_PRIMARY_COOKIE, 0))
+        except ValueError:
+            return 0
+
+    def remember_write(self, response):
+        if g.get('db_wrote') and self.replica_enabled():
+            sticky_seconds = self.app.config['REPLICA_STICKY_SECONDS']
+            response.set_cookie(READ_PRIMARY_COOKIE, str(time.time() + sticky_seconds), max_age=sticky_seconds,
+                                httponly=True, samesite='Lax')
+        return response
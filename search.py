@@ -0,0 +1,177 @@
+import heapq
+import time
+from bisect import bisect_left, insort
+from collections import defaultdict
+
+
+# Split a text into its lowercase three character pieces
+def trigrams(text):
+    text = text.lower()
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+# Trigrams of each word padded like pg_trgm does, used to rank the results
+def word_trigrams(text):
+    grams = set()
+    for word in text.lower().split():
+        grams |= trigrams(f'  {word} ')
+    return grams
+
+
+# Similarity between two trigram sets as their shared part (same idea as pg_trgm similarity)
+def similarity(first_grams, second_grams):
+    if not first_grams or not second_grams:
+        return 0.0
+    return len(first_grams & second_grams) / len(first_grams | second_grams)
+
+
+# In memory trigram index on names
+# It is used instead of the pg_trgm index when the database is not postgresql (SQLite for tests)
+class NgramIndex:
+    def __init__(self, records=()):
+        self.names = {}
+        # Padded word trigrams of each name, kept to rank the matches without recomputing them
+        self.rank_grams = {}
+        self.postings = defaultdict(set)
+        for record_id, name in records:
+            self.add(record_id, name)
+
+    # Nothing to do when the name did not change
+    def add(self, record_id, name):
+        name = name or ''
+        if self.names.get(record_id) == name:
+            return
+        self.remove(record_id)
+        self.names[record_id] = name
+        self.rank_grams[record_id] = word_trigrams(name)
+        for gram in trigrams(name):
+            self.postings[gram].add(record_id)
+
+    def remove(self, record_id):
+        name = self.names.pop(record_id, None)
+        if name is None:
+            return
+        del self.rank_grams[record_id]
+        for gram in trigrams(name):
+            self.postings[gram].discard(record_id)
+            if not self.postings[gram]:
+                del self.postings[gram]
+
+    # Get (id, name) of all the names containing the term, case insensitive, best matches first
+    def search(self, term):
+        term = term.lower()
+        grams = trigrams(term)
+        if grams:
+            # Only names having every trigram of the term can contain it
+            postings = sorted((self.postings.get(gram, set()) for gram in grams), key=len)
+            candidates = postings[0].intersection(*postings[1:])
+        else:
+            candidates = self.names.keys()
+        term_grams = word_trigrams(term)
+        rank_grams = self.rank_grams
+        matches = [(-similarity(rank_grams[record_id], term_grams), record_id) for record_id in candidates
+                   if term in self.names[record_id].lower()]
+        matches.sort()
+        return [(record_id, self.names[record_id]) for _, record_id in matches]
+
+
+# Every end of a name starting at a word, e.g. 'the blue note', 'blue note' and 'note'
+def word_suffixes(name):
+    words = name.lower().split()
+    return [' '.join(words[i:]) for i in range(len(words))]
+
+
+# Pause of a thread building an index between two chunks of work
+# Releasing the GIL is not enough (time.sleep(0)): the thread would take it back at once and the
+# waiting requests would have to force a switch, every sys.getswitchinterval() (5 ms).
+def let_other_threads_run():
+    time.sleep(0.0001)
+
+
+# Merge sorted lists into one, letting the other threads run every chunk_size entries
+def merged(lists, chunk_size):
+    entries = []
+    for entry in heapq.merge(*lists):
+        entries.append(entry)
+        if len(entries) % chunk_size == 0:
+            let_other_threads_run()
+    return entries
+
+
+# In memory prefix index on names for the typeahead
+# Names are found by the beginning of any of their words, names starting with the term first.
+# The keys are kept sorted so a lookup is a binary search followed by reading at most `limit` entries.
+class PrefixIndex:
+    def __init__(self, records=()):
+        self.names = {}
+        # (whole name, id) and (end of the name from its second word, id), sorted
+        self.starts = []
+        self.inner = []
+        for record_id, name in records:
+            self.names[record_id] = name or ''
+        for record_id, name in self.names.items():
+            suffixes = word_suffixes(name)
+            self.starts.extend((suffix, record_id) for suffix in suffixes[:1])
+            self.inner.extend((suffix, record_id) for suffix in suffixes[1:])
+        self.starts.sort()
+        self.inner.sort()
+
+    # The same index built from chunks of records: each chunk is sorted apart, then the chunks are
+    # merged. A thread building it (see update_typeahead_index) never holds the GIL for long, where
+    # the sorts of the whole lists would stop the requests of the worker meanwhile.
+    @classmethod
+    def built_in_chunks(cls, chunks, chunk_size=500):
+        index = cls()
+        starts, inner = [], []
+        for chunk in chunks:
+            chunk_starts, chunk_inner = [], []
+            for record_id, name in chunk:
+                name = index.names[record_id] = name or ''
+                suffixes = word_suffixes(name)
+                chunk_starts.extend((suffix, record_id) for suffix in suffixes[:1])
+                chunk_inner.extend((suffix, record_id) for suffix in suffixes[1:])
+            chunk_starts.sort()
+            chunk_inner.sort()
+            starts.append(chunk_starts)
+            inner.append(chunk_inner)
+            let_other_threads_run()
+        index.starts = merged(starts, chunk_size)
+        index.inner = merged(inner, chunk_size)
+        return index
+
+    # Nothing to do when the name did not change, e.g. the records read again by the refresh of the typeahead
+    def add(self, record_id, name):
+        name = name or ''
+        if self.names.get(record_id) == name:
+            return
+        self.remove(record_id)
+        self.names[record_id] = name
+        suffixes = word_suffixes(name)
+        for suffix in suffixes[:1]:
+            insort(self.starts, (suffix, record_id))
+        for suffix in suffixes[1:]:
+            insort(self.inner, (suffix, record_id))
+
+    def remove(self, record_id):
+        name = self.names.pop(record_id, None)
+        if name is None:
+            return
+        suffixes = word_suffixes(name)
+        for keys, entries in [(suffixes[:1], self.starts), (suffixes[1:], self.inner)]:
+            for key in keys:
+                position = bisect_left(entries, (key, record_id))
+                if position < len(entries) and entries[position] == (key, record_id):
+                    del entries[position]
+
+    # Get (id, name) of at most limit names having a word starting with the term
+    def search(self, term, limit=10):
+        term = ' '.join(term.lower().split())
+        if not term:
+            return []
+        found = {}
+        for entries in [self.starts, self.inner]:
+            position = bisect_left(entries, (term,))
+            while len(found) < limit and position < len(entries) and entries[position][0].startswith(term):
+                found.setdefault(entries[position][1], None)
+                position += 1
+        return [(record_id, self.names[record_id]) for record_id in found]
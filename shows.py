@@ -0,0 +1,134 @@
+from datetime import date
+
+from flask import Blueprint, render_template, request, flash, abort
+
+from cache import page_cache, cached_page, add_cache_tags
+from filters import request_locale, format_datetime
+from formatting import format_localized_date
+from models import db, showTable, Venue, Artist
+from queries import keyset_page, search_names, book_shows, SHOW_PAGE_KEYS, show_listing, shows_between, \
+    requested_range, city_week_shows, local_today, month_shows, adjacent_months
+
+# ----------------------------------------------------------------------------#
+# Shows.
+# ----------------------------------------------------------------------------#
+
+bp = Blueprint('shows', __name__)
+
+# Shows Page: In this page all shows will be listed
+# ?from= and ?to= (YYYY-MM-DD, in the time zone of the request) keep the shows of these days
+@bp.route('/shows')
+@cached_page('shows')
+def shows():
+    try:
+        start, end = requested_range()
+    except ValueError:
+        flash('The dates must be like 2020-05-21')
+        start = end = None
+    # Get one page of the shows ordered by start_time from db
+    page_shows, pager = keyset_page(shows_between(show_listing(), start, end), SHOW_PAGE_KEYS)
+    return render_template('pages/shows.html', shows=page_shows, pager=pager, date_filter=True,
+                           date_from=request.args.get('from', ''), date_to=request.args.get('to', ''))
+
+# City Shows: the shows of a city for the coming week, ?state= when the name is in many states
+@bp.route('/shows/city/<city>')
+@cached_page('shows', 'venues')
+def city_shows(city):
+    state = request.args.get('state')
+    page_shows, pager = keyset_page(city_week_shows(city, state), SHOW_PAGE_KEYS)
+    heading = f'Shows in {city}, {state} this week' if state else f'Shows in {city} this week'
+    return render_template('pages/shows.html', shows=page_shows, pager=pager, heading=heading)
+
+# Create Show: create a show
+@bp.route('/shows/create')
+def create_shows():
+    from forms import ShowForm
+    # renders form. do not touch.
+    form = ShowForm()
+    return render_template('forms/new_show.html', form=form)
+
+# Create Show: create a show from venue page.
+@bp.route('/shows/<int:venue_id>/create/', methods=['POST'])
+def create_shows_from_venue(venue_id):
+    from forms import ShowForm
+    form = ShowForm()
+    data = {}
+    # Update the data dictionary with the show information from venue page
+    data.update({'venue_id':venue_id})
+    search_word = request.form['name']
+    # The best match of the name, not any artist containing it
+    artists = search_names(Artist, search_word)
+    if not artists:
+        flash(f'No artist matches {search_word}, please set the Artist ID', 'info')
+        return render_template('forms/book_artist/create.html', form=form, data=data)
+    data.update({'artist_id': artists[0][0]})
+    # Flash a message to inform the user to enter only the start_time
+    flash('Please Set the Start_time only as the Venue ID and Artist ID are already filled', 'info')
+    return render_template('forms/book_artist/create.html', form= form, data=data)
+
+# POST method submit the form entry
+@bp.route('/shows/create', methods=['POST'])
+def create_show_submission():
+    try:
+        result = book_shows([request.form])[0]
+        if result['status'] == 'booked':
+            db.session.commit()
+            page_cache.invalidate('shows', 'venues', f"venue:{result['venue_id']}", f"artist:{result['artist_id']}")
+        else:
+            db.session.rollback()
+    except:
+        # The booking or its commit failed in the database
+        result = {'status': 'error'}
+        db.session.rollback()
+    finally:
+        # Close the session to be used with other processs
+        db.session.close()
+
+    if result['status'] == 'booked':
+        # Flash success message after correct database insertion
+        flash(f"Show on {request.form['start_time']} was successfully listed!", 'info')
+    elif result['status'] == 'conflict':
+        taken = ', '.join(format_datetime(conflict['start_time']) for conflict in result['conflicts'])
+        flash(f"Show on {request.form['start_time']} could not be listed. "
+              f"The artist or the venue already has a show close to it: {taken}.", 'info')
+    else:
+        # Error handling by flash a warning message, for the invalid ones too
+        flash(f"An error occurred. Show on {request.form['start_time']} could not be listed.", 'info')
+    # Return to the home page
+    return render_template('pages/home.html')
+
+
+#  Calendars
+#  ----------------------------------------------------------------
+# Month calendars of the shows of a venue or an artist, the current month without year and month
+
+def render_calendar(model, entity_column, record_id, year, month):
+    if year is None:
+        today = local_today()
+        year, month = today.year, today.month
+    if not 1 <= month <= 12 or not 1900 <= year <= 2999:
+        abort(404)
+    record = model.query.get_or_404(record_id)
+    weeks = month_shows(entity_column, record_id, year, month)
+    # The calendar shows the names of both sides of the shows
+    add_cache_tags(*{f"artist:{show.artist_id}" for week in weeks for day, day_shows in week for show in day_shows},
+                   *{f"venue:{show.venue_id}" for week in weeks for day, day_shows in week for show in day_shows})
+    previous_month, next_month = adjacent_months(year, month)
+    month_start = date(year, month, 1)
+    locale = request_locale()
+    return render_template('pages/calendar.html', kind=model.__name__.lower(), record=record, weeks=weeks,
+                           month_start=month_start, previous_month=previous_month, next_month=next_month,
+                           month_name=format_localized_date(month_start, 'MMMM y', locale),
+                           day_names=[format_localized_date(day, 'EEE', locale) for day, _ in weeks[0]])
+
+@bp.route('/venues/<int:venue_id>/calendar')
+@bp.route('/venues/<int:venue_id>/calendar/<int:year>/<int:month>')
+@cached_page('venue:{venue_id}', 'shows')
+def venue_calendar(venue_id, year=None, month=None):
+    return render_calendar(Venue, showTable.c.venue_id, venue_id, year, month)
+
+@bp.route('/artists/<int:artist_id>/calendar')
+@bp.route('/artists/<int:artist_id>/calendar/<int:year>/<int:month>')
+@cached_page('artist:{artist_id}', 'shows')
+def artist_calendar(artist_id, year=None, month=None):
+    return render_calendar(Artist, showTable.c.artist_id, artist_id, year, month)
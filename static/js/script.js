@@ -2,3 +2,78 @@ window.parseISOString = function parseISOString(s) {
   const b = s.split(/\D+/);
   return new Date(Date.UTC(b[0], --b[1], b[2], b[3], b[4], b[5], b[6]));
 };
+
+// Load the next tiles of a shows section and append them to the section row
+window.loadMoreShows = function loadMoreShows(button) {
+  const offset = parseInt(button.getAttribute('data-offset'), 10);
+  fetch(`${button.getAttribute('data-url')}?offset=${offset}`)
+    .then((response) => response.text())
+    .then((html) => {
+      const row = button.previousElementSibling;
+      const before = row.children.length;
+      row.insertAdjacentHTML('beforeend', html);
+      const nextOffset = offset + row.children.length - before;
+      button.setAttribute('data-offset', nextOffset);
+      if (nextOffset >= parseInt(button.getAttribute('data-total'), 10) || row.children.length === before) {
+        button.remove();
+      }
+    });
+};
+
+// Send the browser time zone so the show dates are shown in local time from the next page on
+(function rememberTimeZone() {
+  const timeZone = Intl.DateTimeFormat().resolvedOptions().timeZone;
+  if (timeZone && !document.cookie.split('; ').includes(`timezone=${timeZone}`)) {
+    document.cookie = `timezone=${timeZone}; path=/; max-age=31536000; samesite=lax`;
+  }
+}());
+
+// Navbar search suggestions: ask /search/typeahead once the user stops typing for a moment
+// and list the matches under the field. Enter still submits the full search.
+document.querySelectorAll('input[data-typeahead]').forEach((input) => {
+  const list = document.createElement('ul');
+  list.className = 'typeahead';
+  list.hidden = true;
+  input.insertAdjacentElement('afterend', list);
+  const kind = input.getAttribute('data-typeahead');
+  let timer = null;
+  let pending = null;
+
+  const show = (matches) => {
+    list.innerHTML = '';
+    matches.forEach((match) => {
+      const item = document.createElement('li');
+      const link = document.createElement('a');
+      link.href = match.url;
+      link.textContent = match.name;
+      item.appendChild(link);
+      list.appendChild(item);
+    });
+    list.hidden = matches.length === 0;
+  };
+
+  input.addEventListener('input', () => {
+    clearTimeout(timer);
+    const term = input.value.trim();
+    if (!term) {
+      show([]);
+      return;
+    }
+    timer = setTimeout(() => {
+      // Only the answer to the last term is shown
+      if (pending) {
+        pending.abort();
+      }
+      pending = new AbortController();
+      const url = `${input.getAttribute('data-typeahead-url')}?kind=${kind}&q=${encodeURIComponent(term)}`;
+      fetch(url, { signal: pending.signal })
+        .then((response) => response.json())
+        .then((data) => show(data[kind] || []))
+        .catch(() => {});
+    }, 150);
+  });
+  input.addEventListener('blur', () => {
+    // Let a click on a suggestion follow its link first
+    setTimeout(() => { list.hidden = true; }, 200);
+  });
+});
@@ -0,0 +1,46 @@
+import os
+import tempfile
+import time
+
+from jinja2 import FileSystemBytecodeCache
+
+# ----------------------------------------------------------------------------#
+# Templates.
+# ----------------------------------------------------------------------------#
+
+# Jinja bytecode cache in a folder shared by the workers (and by the deploys, the source of a
+# template is part of its key): only the first process to load a template compiles it.
+class SharedBytecodeCache(FileSystemBytecodeCache):
+    def __init__(self, directory):
+        os.makedirs(directory, exist_ok=True)
+        super().__init__(directory)
+
+    def dump_bytecode(self, bucket):
+        # Write to a temporary file first so other workers never read half written bytecode
+        file_descriptor, temp_path = tempfile.mkstemp(dir=self.directory)
+        with os.fdopen(file_descriptor, 'wb') as cache_file:
+            bucket.write_bytecode(cache_file)
+        os.replace(temp_path, self._get_cache_filename(bucket))
+
+
+# Set the Jinja options of the app from its config, before its jinja_env is first used
+# TEMPLATES_AUTO_RELOAD (read by flask) decides whether every render stats the template file.
+def init_templates(app):
+    if app.config['JINJA_BYTECODE_CACHE_DIR']:
+        app.jinja_options = dict(app.jinja_options,
+                                 bytecode_cache=SharedBytecodeCache(app.config['JINJA_BYTECODE_CACHE_DIR']))
+
+
+def is_page_template(name):
+    return name.endswith('.html')
+
+
+# Compile all the templates into the jinja_env of the app (and the bytecode cache)
+# Return {template name: ms to load it}, a syntax error raises TemplateSyntaxError.
+def warm_templates(app):
+    timings = {}
+    for name in app.jinja_env.list_templates(filter_func=is_page_template):
+        start = time.perf_counter()
+        app.jinja_env.get_template(name)
+        timings[name] = (time.perf_counter() - start) * 1000
+    return timings
@@ -0,0 +1,53 @@
+from models import db, Venue
+
+
+def add_venue(name):
+    venue = Venue(name=name, city='Austin', state='TX', address='1 Main Street')
+    db.session.add(venue)
+    db.session.commit()
+    return venue.id
+
+
+# A client having the current version of a venue gets a 304, by its ETag or its date
+def test_detail_answers_304_while_the_venue_is_unchanged(client):
+    venue_id = add_venue('Blue Room')
+    response = client.get(f'/api/v1/venues/{venue_id}')
+    assert response.status_code == 200
+    assert response.get_json()['data']['name'] == 'Blue Room'
+    etag, last_modified = response.headers['ETag'], response.headers['Last-Modified']
+    assert client.get(f'/api/v1/venues/{venue_id}', headers={'If-None-Match': etag}).status_code == 304
+    assert client.get(f'/api/v1/venues/{venue_id}', headers={'If-Modified-Since': last_modified}).status_code == 304
+    assert client.get(f'/api/v1/venues/{venue_id}?fields=id', headers={'If-None-Match': etag}).status_code == 200
+
+
+# Deleting a venue leaves the latest updated_at of the listing as it was, its ETag changes
+# and its date alone is not trusted
+def test_listing_answers_200_after_a_delete(client):
+    venue_id = add_venue('Blue Room')
+    add_venue('Red Room')
+    response = client.get('/api/v1/venues')
+    etag, last_modified = response.headers['ETag'], response.headers['Last-Modified']
+    assert client.get('/api/v1/venues', headers={'If-None-Match': etag}).status_code == 304
+    assert client.delete(f'/venues/{venue_id}').status_code == 200
+    response = client.get('/api/v1/venues', headers={'If-None-Match': etag})
+    assert response.status_code == 200
+    assert [venue['name'] for venue in response.get_json()['data']] == ['Red Room']
+    assert client.get('/api/v1/venues', headers={'If-Modified-Since': last_modified}).status_code == 200
+
+
+# The listings are read by pages after or before a cursor, each row once, in order
+def test_listing_pages_follow_their_cursors(client):
+    names = [f'Venue {n}' for n in range(5)]
+    for name in names:
+        add_venue(name)
+    pages = []
+    response = client.get('/api/v1/venues?fields=name&per_page=2').get_json()
+    pages.append(response)
+    while response['next']:
+        response = client.get(f"/api/v1/venues?fields=name&per_page=2&after={response['next']}").get_json()
+        pages.append(response)
+    assert [[venue['name'] for venue in page['data']] for page in pages] == [names[0:2], names[2:4], names[4:]]
+    assert pages[0]['prev'] is None
+    previous = client.get(f"/api/v1/venues?fields=name&per_page=2&before={pages[2]['prev']}").get_json()
+    assert previous['data'] == pages[1]['data']
+    assert client.get('/api/v1/venues?after=not-a-cursor').status_code == 200
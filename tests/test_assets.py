@@ -0,0 +1,59 @@
+import gzip
+import os
+
+from assets import DIST_DIR, IMMUTABLE, build_assets, minify_css, rebase_css_urls, stale_assets
+
+BUNDLES = {'css/site.css': ['css/a.css', 'css/b.css'], 'js/site.js': ['js/a.js']}
+
+
+def write_sources(static_folder, css_color='red'):
+    for path, text in [('css/a.css', 'body {\n  color: %s;\n}\n/* gone */\n' % css_color),
+                       ('css/b.css', '.logo { background: url("../img/logo.png"); content: "a ; b"; }\n'),
+                       ('js/a.js', '// gone\nfunction f() {\n    return 1\n}\n')]:
+        os.makedirs(os.path.join(static_folder, os.path.dirname(path)), exist_ok=True)
+        with open(os.path.join(static_folder, path), 'w') as file:
+            file.write(text)
+
+
+def test_css_is_minified_and_its_urls_rebased():
+    assert minify_css('a {\n  color: red;\n}\n/* x */ b { content: "x ; y"; }') == 'a{color:red}b{content:"x ; y"}'
+    assert rebase_css_urls('url(../img/logo.png) url(/img/a.png)', 'css', DIST_DIR) == \
+        'url(../img/logo.png) url(/img/a.png)'
+    assert rebase_css_urls("url('fonts/a.woff?v=1')", 'css/libs', DIST_DIR) == "url('../css/libs/fonts/a.woff?v=1')"
+
+
+# The bundles are named by their content, a changed source gives a new name and leaves the old files
+def test_bundles_are_hashed_and_compressed(tmp_path):
+    static_folder = str(tmp_path)
+    write_sources(static_folder)
+    manifest = build_assets(static_folder, BUNDLES)
+    css = os.path.join(static_folder, manifest['css/site.css'])
+    with open(css) as file:
+        assert file.read() == 'body{color:red}\n.logo{background:url("../img/logo.png");content:"a ; b"}\n'
+    with open(css + '.gz', 'rb') as file:
+        assert gzip.decompress(file.read()).decode().startswith('body{color:red}')
+    assert build_assets(static_folder, BUNDLES) == manifest
+    write_sources(static_folder, 'blue')
+    rebuilt = build_assets(static_folder, BUNDLES)
+    assert rebuilt['css/site.css'] != manifest['css/site.css'] and rebuilt['js/site.js'] == manifest['js/site.js']
+    # site.<hash>.css and its compressed variants
+    stale = stale_assets(static_folder, rebuilt)
+    old_hash = os.path.basename(css).split('.')[1]
+    assert css in stale and {os.path.basename(path).split('.')[1] for path in stale} == {old_hash}
+
+
+# The pages link the hashed bundle, served compressed and cached for good
+def test_bundles_are_served_immutable(app, client, tmp_path):
+    static_folder = str(tmp_path)
+    write_sources(static_folder)
+    assets = app.extensions['assets']
+    assets.static_folder, assets.manifest = static_folder, build_assets(static_folder, BUNDLES)
+    with app.test_request_context():
+        url = assets.asset_url('css/site.css')
+        assert assets.asset_urls('css/other.css') == ['/static/css/other.css']
+    assert url == '/static/' + assets.manifest['css/site.css']
+    response = client.get(url, headers={'Accept-Encoding': 'gzip'})
+    assert response.status_code == 200
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert response.headers['Cache-Control'] == IMMUTABLE
+    assert gzip.decompress(response.data).startswith(b'body{color:red}')
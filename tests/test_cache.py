@@ -0,0 +1,55 @@
+import os
+import time
+
+from cache import FileSystemCache, LRUCache, cached_page, page_cache
+
+
+def entry_files(cache_dir):
+    return [name for name in os.listdir(cache_dir) if name.startswith('entry-')]
+
+
+# The files of the entries are swept: the expired ones, then the soonest to expire above max_entries
+def test_filesystem_cache_sweeps_entries(tmp_path):
+    cache = FileSystemCache(str(tmp_path), default_ttl=60, max_entries=20, sweep_every=10)
+    cache.invalidate('venues')
+    for n in range(5):
+        cache.set(f'short{n}', n, ttl=1)
+    time.sleep(1.1)
+    for n in range(100):
+        cache.set(f'page{n}', n, tags=['venues'])
+    cache.sweep()
+    assert len(entry_files(tmp_path)) == 20
+    assert cache.get('short0') is None
+    assert cache.get('page0') is None
+    assert cache.get('page99') == 99
+    # The tag versions are kept
+    cache.set('page100', 100, tags=['venues'])
+    assert cache.get('page100') == 100
+
+
+# A tag invalidated while the value is built leaves the stored value stale
+def test_invalidation_while_building_misses_the_entry(tmp_path):
+    cache = FileSystemCache(str(tmp_path))
+    versions = cache.tag_versions(['artist:1'])
+    cache.invalidate('artist:1')
+    cache.set('page', 'old page', tags=['artist:1'], tag_versions=versions)
+    assert cache.get('page') is None
+
+
+def test_cached_page_reads_the_tag_versions_before_the_view(app, client):
+    app.extensions['page_cache'] = LRUCache()
+    renders = []
+
+    @cached_page('artist:{artist_id}')
+    def page(artist_id):
+        renders.append(artist_id)
+        # A write committed by another request while this page is rendered
+        if len(renders) == 1:
+            page_cache.invalidate(f'artist:{artist_id}')
+        return f'artist {artist_id}'
+
+    app.add_url_rule('/test/artists/<int:artist_id>', 'test_page', page)
+    assert client.get('/test/artists/1').data == b'artist 1'
+    assert client.get('/test/artists/1').data == b'artist 1'
+    assert client.get('/test/artists/1').data == b'artist 1'
+    assert renders == [1, 1]
@@ -0,0 +1,66 @@
+from datetime import datetime, timedelta
+
+import queries
+from models import db, Artist, Venue
+
+
+def add_artist_and_venue():
+    artist = Artist(name='The Blue Band', city='Austin', state='TX')
+    venue = Venue(name='Blue Room', city='Austin', state='TX', address='1 Main Street')
+    db.session.add_all([artist, venue])
+    db.session.commit()
+    return artist.id, venue.id
+
+
+def book(client, artist_id, venue_id, start_time):
+    client.post('/shows/create', data={'artist_id': artist_id, 'venue_id': venue_id,
+                                       'start_time': start_time.strftime('%Y-%m-%d %H:%M:%S')})
+
+
+def counters(model, record_id):
+    db.session.expire_all()
+    record = model.query.get(record_id)
+    return record.upcoming_count, record.past_count
+
+
+def check_show_counters(app):
+    return app.test_cli_runner().invoke(args=['check-show-counters']).output
+
+
+# A booking counts its show as upcoming or past at once
+def test_bookings_update_the_counters(app, client):
+    artist_id, venue_id = add_artist_and_venue()
+    now = datetime.utcnow()
+    book(client, artist_id, venue_id, now + timedelta(days=10))
+    book(client, artist_id, venue_id, now + timedelta(days=20))
+    book(client, artist_id, venue_id, now - timedelta(days=10))
+    assert counters(Venue, venue_id) == (2, 1)
+    assert counters(Artist, artist_id) == (2, 1)
+    assert Venue.query.get(venue_id).next_show_at.replace(tzinfo=None) == (now + timedelta(days=10)).replace(microsecond=0)
+    assert 'All the show counters are right' in check_show_counters(app)
+
+
+# Deleting a venue deletes its shows and recounts their artists
+def test_deleting_a_venue_recounts_its_artists(app, client):
+    artist_id, venue_id = add_artist_and_venue()
+    book(client, artist_id, venue_id, datetime.utcnow() + timedelta(days=10))
+    assert counters(Artist, artist_id) == (1, 0)
+    assert client.delete(f'/venues/{venue_id}').status_code == 200
+    assert counters(Artist, artist_id) == (0, 0)
+    assert 'All the show counters are right' in check_show_counters(app)
+
+
+# roll-shows moves the shows that started meanwhile from the upcoming to the past counters
+def test_roll_shows_moves_the_started_shows(app, client, monkeypatch):
+    artist_id, venue_id = add_artist_and_venue()
+    book(client, artist_id, venue_id, datetime.utcnow() + timedelta(days=10))
+    assert 'All the show counters are right' in check_show_counters(app)
+    # Twenty days later
+    later = queries.utc_now() + timedelta(days=20)
+    monkeypatch.setattr(queries, 'utc_now', lambda: later)
+    assert 'have wrong show counters' in check_show_counters(app)
+    result = app.test_cli_runner().invoke(args=['roll-shows'])
+    assert '2 venues and artists rolled over' in result.output
+    assert counters(Venue, venue_id) == (0, 1)
+    assert counters(Artist, artist_id) == (0, 1)
+    assert 'All the show counters are right' in check_show_counters(app)
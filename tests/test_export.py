@@ -0,0 +1,29 @@
+from datetime import datetime, timedelta
+
+from api import next_export_since
+from models import db, Venue
+
+
+def exported_names(client, since=None):
+    response = client.get('/api/v1/export/venues.jsonl', query_string={'since': since} if since else {})
+    assert response.status_code == 200
+    return response, [line for line in response.get_data(as_text=True).splitlines() if line]
+
+
+# A write whose transaction started before an export and committed after it is in the next export
+def test_incremental_export_keeps_the_writes_committed_during_the_previous_one(client):
+    response, lines = exported_names(client)
+    assert lines == []
+    # updated_at is the start of the transaction, 30 seconds before its commit
+    started = datetime.utcnow() - timedelta(seconds=30)
+    db.session.add(Venue(name='Slow Hall', city='Austin', state='TX', address='1 Main Street', updated_at=started))
+    db.session.commit()
+    _, lines = exported_names(client, response.headers['X-Export-Next-Since'])
+    assert len(lines) == 1 and 'Slow Hall' in lines[0]
+
+
+def test_export_command_prints_the_next_since(app, tmp_path):
+    result = app.test_cli_runner().invoke(args=['export', 'venues', str(tmp_path / 'venues.csv')])
+    assert result.exit_code == 0
+    next_since = datetime.fromisoformat(result.output.split('--since ')[1].split()[0])
+    assert abs(next_since - next_export_since()) < timedelta(seconds=5)
@@ -0,0 +1,20 @@
+import pytest
+
+from formatting import get_timezone
+
+BAD_TIMEZONES = ['../etc', '/etc/passwd', 'Not/A_Zone', 'UTC\x00']
+
+
+@pytest.mark.parametrize('name', BAD_TIMEZONES + [''])
+def test_unknown_timezones_raise_lookup_error(name):
+    with pytest.raises(LookupError):
+        get_timezone(name)
+
+
+# An unusable time zone falls back to the default one instead of failing the page
+@pytest.mark.parametrize('name', BAD_TIMEZONES)
+@pytest.mark.parametrize('url', ['/shows', '/api/v1/shows'])
+def test_unknown_timezones_fall_back_to_the_default(client, url, name):
+    assert client.get(url, query_string={'tz': name}).status_code == 200
+    client.set_cookie('localhost', 'timezone', name)
+    assert client.get(url).status_code == 200
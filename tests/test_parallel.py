@@ -0,0 +1,39 @@
+from datetime import datetime, timedelta
+
+from models import db, showTable, Artist, Venue
+from queries import details_with_shows
+from venues import venue_details
+
+
+def add_venue_with_shows():
+    artist = Artist(name='The Blue Band', city='Austin', state='TX')
+    venue = Venue(name='Blue Room', city='Austin', state='TX', address='1 Main Street')
+    db.session.add_all([artist, venue])
+    db.session.commit()
+    now = datetime.utcnow()
+    db.session.execute(showTable.insert().values([
+        {'artist_id': artist.id, 'venue_id': venue.id, 'start_time': now + timedelta(days=days)}
+        for days in [-30, -20, -10, 10, 20, 30]]))
+    db.session.commit()
+    return venue.id
+
+
+# The venue page reads the same data with two statements, at the same time or one after the other
+def test_parallel_reads_match_the_sequential_ones(app, count_statements):
+    venue_id = add_venue_with_shows()
+
+    def read():
+        with app.test_request_context(f'/venues/{venue_id}'):
+            return details_with_shows(lambda: venue_details(venue_id), showTable.c.venue_id, venue_id,
+                                      Artist, showTable.c.artist_id, limit=2)
+
+    assert 'parallel_queries' in app.extensions
+    with count_statements() as parallel_statements:
+        parallel = read()
+    app.extensions.pop('parallel_queries')
+    with count_statements() as sequential_statements:
+        sequential = read()
+    assert parallel == sequential
+    assert parallel[0]['name'] == 'Blue Room'
+    assert [(len(shows), count) for shows, count in parallel[1].values()] == [(2, 3), (2, 3)]
+    assert parallel_statements.count == sequential_statements.count == 2
@@ -0,0 +1,28 @@
+from app import create_app
+from config import TestingConfig
+from models import db
+from pooling import pool_counts
+
+
+def metrics_app(tmp_path):
+    class Config(TestingConfig):
+        SQLALCHEMY_DATABASE_URI = 'sqlite:///' + str(tmp_path / 'fyyur.db')
+        POOL_METRICS = True
+
+    return create_app(Config)
+
+
+def test_pool_metrics_is_off_by_default(client):
+    assert client.get('/debug/pool').status_code == 404
+
+
+# Each app created in the process must not add its own listeners on the pools
+def test_checkouts_are_counted_once_whatever_the_apps(tmp_path):
+    metrics_app(tmp_path)
+    app = metrics_app(tmp_path)
+    with app.app_context():
+        db.engine.connect().close()
+        checkouts = pool_counts['checkouts']
+        db.engine.connect().close()
+        assert pool_counts['checkouts'] == checkouts + 1
+        assert app.test_client().get('/debug/pool').get_json()['checkouts'] == checkouts + 1
@@ -0,0 +1,30 @@
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app import create_app
+from config import TestingConfig
+from models import db, Venue
+from profiling import after_cursor_execute
+
+
+# Apps created again do not add listeners, each statement is counted once by the profiler of its app,
+# the ones of the PARALLEL_QUERIES threads included
+def test_statements_are_counted_once_per_request(tmp_path):
+    class Config(TestingConfig):
+        SQLALCHEMY_DATABASE_URI = 'sqlite:///' + str(tmp_path / 'fyyur.db')
+        SQL_PROFILING = True
+
+    create_app(Config)
+    app = create_app(Config)
+    assert event.contains(Engine, 'after_cursor_execute', after_cursor_execute)
+    with app.app_context():
+        db.create_all()
+        db.session.add(Venue(name='Blue Room', city='Austin', state='TX', address='1 Main Street'))
+        db.session.commit()
+        venue_id = Venue.query.one().id
+        db.session.remove()
+    response = app.test_client().get(f'/venues/{venue_id}')
+    assert response.status_code == 200
+    assert 'desc="2 queries"' in response.headers['Server-Timing']
+    stats = app.extensions['sql_profiler'].stats()['venues.show_venue']
+    assert stats['requests'] == 1 and stats['max_queries'] == 2
@@ -0,0 +1,96 @@
+import os
+from http.cookies import SimpleCookie
+
+import pytest
+
+from app import create_app
+from cache import make_cache
+from config import TestingConfig
+from models import db, Venue
+from replicas import READ_PRIMARY_COOKIE, REPLICA_BIND
+
+NEW_VENUE = {'name': 'New Hall', 'city': 'Austin', 'state': 'TX', 'address': '3 Main Street',
+             'phone': '', 'genres': ['Jazz'], 'facebook_link': ''}
+
+
+# The settings of one worker, with a primary and a replica on two SQLite files
+def worker_config(tmp_path):
+    class Config(TestingConfig):
+        SECRET_KEY = os.urandom(32)
+        SQLALCHEMY_DATABASE_URI = 'sqlite:///' + str(tmp_path / 'primary.db')
+        SQLALCHEMY_BINDS = {REPLICA_BIND: 'sqlite:///' + str(tmp_path / 'replica.db')}
+
+    return Config
+
+
+# Each database has a venue the other one has not, as if the replica lagged
+# No app context is kept around the requests, each one has its own g as in a worker
+@pytest.fixture
+def app(tmp_path):
+    app = create_app(worker_config(tmp_path))
+    with app.app_context():
+        replica = db.get_engine(app, bind=REPLICA_BIND)
+        db.create_all()
+        db.Model.metadata.create_all(replica)
+        db.session.add(Venue(name='Primary Hall', city='Austin', state='TX', address='1 Main Street'))
+        db.session.commit()
+        replica.execute(Venue.__table__.insert(), name='Replica Hall', city='Austin', state='TX',
+                        address='2 Main Street')
+    return app
+
+
+def test_reads_go_to_the_replica(client):
+    response = client.get('/venues')
+    assert b'Replica Hall' in response.data
+    assert b'Primary Hall' not in response.data
+
+
+def test_read_only_posts_go_to_the_replica(client):
+    response = client.post('/venues/search', data={'search_term': 'Hall'})
+    assert b'Replica Hall' in response.data
+    assert b'Primary Hall' not in response.data
+
+
+def test_writes_go_to_the_primary(app, client):
+    client.post('/venues/create', data=NEW_VENUE)
+    with app.app_context():
+        assert Venue.query.filter_by(name='New Hall').count() == 1
+    replica = db.get_engine(app, bind=REPLICA_BIND)
+    assert replica.execute(Venue.__table__.select().where(Venue.name == 'New Hall')).fetchall() == []
+
+
+# The browser which wrote reads its own write from the primary, the other ones keep reading the replica
+def test_reads_after_a_write_go_to_the_primary(app, client):
+    client.post('/venues/create', data=NEW_VENUE)
+    response = client.get('/venues')
+    assert b'New Hall' in response.data
+    assert b'Replica Hall' not in response.data
+    assert b'Replica Hall' in app.test_client().get('/venues').data
+
+
+# Another worker, with a session key of its own, reads the write of the browser from the primary too
+def test_reads_after_a_write_go_to_the_primary_in_every_worker(client, tmp_path):
+    response = client.post('/venues/create', data=NEW_VENUE)
+    cookie = SimpleCookie(response.headers['Set-Cookie'])[READ_PRIMARY_COOKIE]
+    other_worker = create_app(worker_config(tmp_path)).test_client()
+    other_worker.set_cookie('localhost', READ_PRIMARY_COOKIE, cookie.value)
+    assert b'New Hall' in other_worker.get('/venues').data
+
+    # The apps created again share the commit listener of the sessions
+    with other_worker.application.app_context():
+        assert len(db.session().dispatch.after_commit) == 1
+
+# The page cached from the replica before the write is invalidated by it, the writer's page comes from
+# the primary and is not cached, and the replica pages rendered before it catches up are not cached
+def test_cached_pages_keep_the_reads_of_the_writer(app, client):
+    app.extensions['page_cache'] = make_cache(app.config, 'lru')
+    assert b'Replica Hall' in client.get('/venues').data
+    client.post('/venues/create', data=NEW_VENUE)
+    assert b'New Hall' in client.get('/venues').data
+    other_browser = app.test_client()
+    assert b'New Hall' not in other_browser.get('/venues').data
+    assert b'New Hall' in client.get('/venues').data
+    # The replica caught up
+    db.get_engine(app, bind=REPLICA_BIND).execute(Venue.__table__.insert(), name='New Hall', city='Austin',
+                                                  state='TX', address='3 Main Street')
+    assert b'New Hall' in other_browser.get('/venues').data
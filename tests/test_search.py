@@ -0,0 +1,86 @@
+from datetime import datetime, timedelta
+
+import flask
+import pytest
+from sqlalchemy import inspect
+
+import artists
+import venues
+from models import db, Artist, Venue
+from queries import invalidate_search_index, ngram_indexes, search_names
+
+
+# The indexes are kept by the process, each test starts without any
+@pytest.fixture(autouse=True)
+def no_ngram_indexes():
+    ngram_indexes.clear()
+    yield
+    ngram_indexes.clear()
+
+
+def add_venues(*names):
+    venues = [Venue(name=name, city='Austin', state='TX', address='1 Main Street') for name in names]
+    db.session.add_all(venues)
+    db.session.commit()
+    return [venue.id for venue in venues]
+
+
+# Without pg_trgm the names are searched by the in memory trigram index: the names containing the term,
+# whatever its case, the closest ones first
+def test_search_names_ranks_the_closest_names_first(app):
+    add_venues('The Blue Note Jazz Club', 'Bluegrass Hall', 'Blue', 'Red Room')
+    assert [name for _, name in search_names(Venue, 'BLUE')] == ['Blue', 'Bluegrass Hall', 'The Blue Note Jazz Club']
+    assert [name for _, name in search_names(Venue, 'bl')] == ['Blue', 'Bluegrass Hall', 'The Blue Note Jazz Club']
+    assert [name for _, name in search_names(Venue, 'blue note')] == ['The Blue Note Jazz Club']
+    assert search_names(Venue, 'green') == []
+
+
+# The index is read again once the names changed
+def test_search_names_sees_the_names_after_an_invalidation(app):
+    venue_id, = add_venues('Blue Room')
+    assert search_names(Venue, 'green') == []
+    Venue.query.get(venue_id).name = 'Green Room'
+    db.session.commit()
+    invalidate_search_index(Venue)
+    assert search_names(Venue, 'green') == [(venue_id, 'Green Room')]
+
+
+# The trigram indexes of the names are only created on postgresql
+def test_sqlite_has_no_trigram_indexes(app):
+    indexes = {index['name'] for table in ['venues', 'artists'] for index in inspect(db.engine).get_indexes(table)}
+    assert 'ix_venues_name_trgm' not in indexes and 'ix_artists_name_trgm' not in indexes
+    assert 'ix_venues_city_state' in indexes
+
+
+def search_results(client, monkeypatch, kind, term):
+    module = {'venues': venues, 'artists': artists}[kind]
+    rendered = []
+
+    def render_template(template, **context):
+        rendered.append(context)
+        return flask.render_template(template, **context)
+
+    monkeypatch.setattr(module, 'render_template', render_template)
+    assert client.post(f'/{kind}/search', data={'search_term': term}).status_code == 200
+    return {result['name']: result['num_upcoming_shows'] for result in rendered[0]['results']['data']}
+
+
+# The search results have their upcoming shows counts, read with one statement whatever their number
+def test_search_results_count_their_upcoming_shows(client, monkeypatch, count_statements):
+    blue_room, red_room = add_venues('Blue Room', 'Red Room')
+    artist = Artist(name='The Blue Band', city='Austin', state='TX')
+    db.session.add(artist)
+    db.session.commit()
+    artist_id = artist.id
+    now = datetime.utcnow()
+    for venue_id, days in [(blue_room, 10), (blue_room, 20), (red_room, 30), (red_room, -10)]:
+        client.post('/shows/create', data={'artist_id': artist_id, 'venue_id': venue_id,
+                                           'start_time': (now + timedelta(days=days)).strftime('%Y-%m-%d %H:%M:%S')})
+    assert search_results(client, monkeypatch, 'artists', 'blue') == {'The Blue Band': 3}
+    # The first search reads the names into the in memory index
+    assert search_results(client, monkeypatch, 'venues', 'red') == {'Red Room': 1}
+    with count_statements() as one:
+        assert search_results(client, monkeypatch, 'venues', 'blue') == {'Blue Room': 2}
+    with count_statements() as two:
+        assert search_results(client, monkeypatch, 'venues', 'room') == {'Blue Room': 2, 'Red Room': 1}
+    assert one.count == two.count
@@ -0,0 +1,101 @@
+import csv
+import json
+
+from sqlalchemy.exc import OperationalError
+
+from models import db, showTable, Artist, Venue
+
+
+def add_artist_and_venue():
+    artist = Artist(name='The Blue Band', city='Austin', state='TX')
+    venue = Venue(name='Blue Room', city='Austin', state='TX', address='1 Main Street')
+    db.session.add_all([artist, venue])
+    db.session.commit()
+    return artist.id, venue.id
+
+
+def booked_shows():
+    return db.session.query(showTable).count()
+
+
+# The imported shows are checked as the bookings: against the booked shows and the earlier rows
+def test_import_refuses_conflicting_shows(app, tmp_path):
+    artist_id, venue_id = add_artist_and_venue()
+    shows = tmp_path / 'shows.csv'
+    with open(shows, 'w', newline='') as file:
+        writer = csv.writer(file)
+        writer.writerow(['artist_id', 'venue_id', 'start_time'])
+        writer.writerow([artist_id, venue_id, '2040-01-01 20:00:00'])
+        writer.writerow([artist_id, venue_id, '2040-01-01 20:30:00'])
+        writer.writerow([artist_id, venue_id, '2040-01-02 20:00:00'])
+        writer.writerow([artist_id, 999, '2040-01-03 20:00:00'])
+    result = app.test_cli_runner().invoke(args=['import', 'shows', str(shows)])
+    assert '2 shows imported, 2 rejected' in result.output
+    assert 'line 3: {"conflicts"' in result.output
+    assert 'line 5: {"venue_id"' in result.output
+    assert booked_shows() == 2
+
+
+
+# A JSON line that can not be read is rejected, the lines around it are imported
+def test_import_rejects_unreadable_json_lines(app, tmp_path):
+    artist_id, venue_id = add_artist_and_venue()
+    shows = tmp_path / 'shows.jsonl'
+    shows.write_text('\n'.join([
+        json.dumps({'artist_id': artist_id, 'venue_id': venue_id, 'start_time': '2040-01-01 20:00:00'}),
+        '{"artist_id": 1,',
+        '',
+        json.dumps([artist_id, venue_id]),
+        json.dumps({'artist_id': artist_id, 'venue_id': venue_id, 'start_time': '2040-01-02 20:00:00'}),
+    ]) + '\n')
+    result = app.test_cli_runner().invoke(args=['import', 'shows', str(shows)])
+    assert '2 shows imported, 2 rejected' in result.output
+    assert 'line 2: Invalid JSON' in result.output
+    assert 'line 4: Expected a JSON object, got list' in result.output
+    assert booked_shows() == 2
+
+def test_bulk_booking_refuses_ids_out_of_range(client):
+    artist_id, venue_id = add_artist_and_venue()
+    response = client.post('/api/v1/shows/bulk', json={'shows': [
+        {'artist_id': 2 ** 70, 'venue_id': venue_id, 'start_time': '2040-01-01T20:00:00Z'},
+        {'artist_id': artist_id, 'venue_id': -1, 'start_time': '2040-01-01T20:00:00Z'},
+    ]})
+    assert response.status_code == 200
+    assert [result['status'] for result in response.get_json()['results']] == ['invalid', 'invalid']
+
+
+
+# The pages are invalidated by the ids read from the form and the body, not by their text
+def test_bookings_invalidate_the_pages_of_the_parsed_ids(app, client, monkeypatch):
+    artist_id, venue_id = add_artist_and_venue()
+    tags = set()
+    monkeypatch.setattr(app.extensions['page_cache'], 'invalidate', lambda *invalidated: tags.update(invalidated))
+    client.post('/shows/create', data={'artist_id': f' 0{artist_id}', 'venue_id': f'0{venue_id} ',
+                                       'start_time': '2040-01-01 20:00'})
+    client.post('/api/v1/shows/bulk', json={'shows': [
+        {'artist_id': str(artist_id), 'venue_id': float(venue_id), 'start_time': '2040-02-01T20:00:00Z'}]})
+    assert booked_shows() == 2
+    assert tags == {'shows', 'venues', f'venue:{venue_id}', f'artist:{artist_id}'}
+
+def test_show_submission_flashes_a_failed_commit(client, monkeypatch):
+    artist_id, venue_id = add_artist_and_venue()
+
+    def failing_commit():
+        raise OperationalError('COMMIT', {}, Exception('database is locked'))
+
+    monkeypatch.setattr(db.session, 'commit', failing_commit)
+    response = client.post('/shows/create', data={'artist_id': artist_id, 'venue_id': venue_id,
+                                                  'start_time': '2040-01-01 20:00'})
+    monkeypatch.undo()
+    assert response.status_code == 200
+    assert b'An error occurred' in response.data
+    assert booked_shows() == 0
+
+
+# The days at the limits of the dates leave the range open instead of overflowing
+def test_date_range_at_the_limits_of_the_dates(client):
+    for url in ['/shows', '/api/v1/shows']:
+        for query in [{'to': '9999-12-31'}, {'from': '0001-01-01'},
+                      {'from': '0001-01-01', 'to': '9999-12-31', 'tz': 'America/Los_Angeles'},
+                      {'from': '0001-01-01', 'to': '9999-12-31', 'tz': 'Asia/Tokyo'}]:
+            assert client.get(url, query_string=query).status_code == 200, (url, query)
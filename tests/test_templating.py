@@ -0,0 +1,27 @@
+import os
+
+from app import create_app
+from config import TestingConfig
+from templating import warm_templates
+
+
+# The first worker compiles the templates into the shared bytecode cache, the next ones only load them
+def test_workers_share_the_compiled_templates(tmp_path):
+    class Config(TestingConfig):
+        SQLALCHEMY_DATABASE_URI = 'sqlite:///' + str(tmp_path / 'fyyur.db')
+        JINJA_BYTECODE_CACHE_DIR = str(tmp_path / 'jinja')
+
+    first = create_app(Config)
+    result = first.test_cli_runner().invoke(args=['warm-templates'])
+    assert f'cached in {Config.JINJA_BYTECODE_CACHE_DIR}' in result.output
+    timings = warm_templates(first)
+    assert 'pages/home.html' in timings and 'layouts/main.html' in timings
+    assert len(os.listdir(Config.JINJA_BYTECODE_CACHE_DIR)) >= len(timings)
+    assert not first.jinja_env.auto_reload
+
+    second = create_app(Config)
+    compiled = []
+    compile_source = second.jinja_env.compile
+    second.jinja_env.compile = lambda *args, **kwargs: compiled.append(args) or compile_source(*args, **kwargs)
+    assert warm_templates(second).keys() == timings.keys()
+    assert compiled == []
@@ -0,0 +1,34 @@
+from datetime import datetime, timedelta
+
+from cache import make_cache
+from models import db, showTable, Artist, Venue
+from tiles import TILE_TEMPLATE
+
+
+# The tiles are rendered once then taken from the fragment cache, until a name they show changes
+def test_show_tiles_are_cached_until_a_name_changes(app, client, monkeypatch):
+    app.extensions['fragment_cache'] = make_cache(app.config, 'lru', 100, default_ttl=0)
+    artist = Artist(name='The Blue Band', city='Austin', state='TX')
+    venue = Venue(name='Blue Room', city='Austin', state='TX', address='1 Main Street')
+    db.session.add_all([artist, venue])
+    db.session.commit()
+    db.session.execute(showTable.insert().values(artist_id=artist.id, venue_id=venue.id,
+                                                 start_time=datetime.utcnow() + timedelta(days=10)))
+    db.session.commit()
+    rendered = []
+    get_template = app.jinja_env.get_template
+
+    def counting_get_template(name, *args, **kwargs):
+        if name == TILE_TEMPLATE:
+            rendered.append(name)
+        return get_template(name, *args, **kwargs)
+
+    monkeypatch.setattr(app.jinja_env, 'get_template', counting_get_template)
+    assert b'The Blue Band' in client.get('/shows').data
+    assert b'The Blue Band' in client.get('/shows').data
+    assert len(rendered) == 1
+    artist.name = 'The Red Band'
+    db.session.commit()
+    page = client.get('/shows').data
+    assert b'The Red Band' in page and b'The Blue Band' not in page
+    assert len(rendered) == 2
@@ -0,0 +1,102 @@
+import threading
+
+import pytest
+
+import queries
+from models import db, Venue
+from queries import typeahead_builds, typeahead_indexes, wait_typeahead_builds
+from search import PrefixIndex
+
+
+# The indexes are kept by the process, each test starts without any
+@pytest.fixture(autouse=True)
+def no_typeahead_indexes():
+    wait_typeahead_builds()
+    typeahead_indexes.clear()
+    yield
+    wait_typeahead_builds()
+    typeahead_indexes.clear()
+
+
+# The builds wait for release.set() once they read the names, so the tests see the requests made meanwhile
+@pytest.fixture
+def release(monkeypatch):
+    release = threading.Event()
+
+    class SlowPrefixIndex(PrefixIndex):
+        @classmethod
+        def built_in_chunks(cls, records, chunk_size=500):
+            records = list(records)
+            release.wait(10)
+            return PrefixIndex.built_in_chunks(records, chunk_size)
+
+    monkeypatch.setattr(queries, 'PrefixIndex', SlowPrefixIndex)
+    yield release
+    release.set()
+
+
+def add_venue(name):
+    venue = Venue(name=name, city='Austin', state='TX', address='1 Main Street')
+    db.session.add(venue)
+    db.session.commit()
+    return venue.id
+
+
+def suggestions(client, term):
+    response = client.get('/search/typeahead', query_string={'kind': 'venues', 'q': term})
+    assert response.status_code == 200
+    return sorted(venue['name'] for venue in response.get_json()['venues'])
+
+
+# The first request starts the build and does not wait for it
+# On SQLite there are no suggestions until the index is built, postgresql would match the names meanwhile
+def test_first_request_does_not_wait_for_the_build(client, release):
+    for name in ['The Blue Room', 'Blues Hall', 'Red Room']:
+        add_venue(name)
+    assert suggestions(client, 'blue') == []
+    assert 'venues' in typeahead_builds and 'venues' not in typeahead_indexes
+    release.set()
+    wait_typeahead_builds()
+    assert suggestions(client, 'blue') == ['Blues Hall', 'The Blue Room']
+
+
+# The names written by the worker during the build are in the new index
+def test_writes_during_the_build_are_kept(client, release):
+    add_venue('Red Room')
+    suggestions(client, 'red')
+    client.post('/venues/create', data={'name': 'Green Room', 'city': 'Austin', 'state': 'TX', 'phone': '',
+                                        'address': '2 Main Street', 'genres': ['Jazz'], 'facebook_link': ''})
+    release.set()
+    wait_typeahead_builds()
+    assert suggestions(client, 'green') == ['Green Room']
+    assert typeahead_indexes['venues']['index'].search('green') != []
+
+
+# A rebuild does not hold the requests, they search the previous index until the new one is built
+def test_requests_do_not_wait_for_a_rebuild(app, client, release):
+    release.set()
+    add_venue('Red Room')
+    suggestions(client, 'red')
+    wait_typeahead_builds()
+    release.clear()
+    typeahead_indexes['venues']['built_at'] -= app.config['TYPEAHEAD_REBUILD_SECONDS'] + 1
+    previous = typeahead_indexes['venues']['index']
+    assert suggestions(client, 'red') == ['Red Room']
+    assert 'venues' in typeahead_builds and typeahead_indexes['venues']['index'] is previous
+    release.set()
+    wait_typeahead_builds()
+    assert typeahead_indexes['venues']['index'] is not previous
+
+
+# The names written by the other workers are read by a refresh in the background
+def test_names_of_the_other_workers_are_refreshed(app, client):
+    add_venue('Red Room')
+    suggestions(client, 'red')
+    wait_typeahead_builds()
+    db.session.execute(Venue.__table__.insert().values(name='Red Hall', city='Austin', state='TX',
+                                                       address='2 Main Street'))
+    db.session.commit()
+    typeahead_indexes['venues']['checked_at'] -= app.config['TYPEAHEAD_REFRESH_SECONDS'] + 1
+    suggestions(client, 'red')
+    wait_typeahead_builds()
+    assert suggestions(client, 'red') == ['Red Hall', 'Red Room']
@@ -0,0 +1,65 @@
+from datetime import datetime, timedelta
+
+from models import db, showTable, Artist, Genre, Venue
+
+
+def add_venues(count, start=0):
+    cities = [('San Francisco', 'CA'), ('New York', 'NY'), ('Austin', 'TX')]
+    for n in range(start, start + count):
+        city, state = cities[n % len(cities)]
+        db.session.add(Venue(name=f'Venue {n}', city=city, state=state, address=f'{n} Main Street'))
+    db.session.commit()
+
+
+# The venues listing is built from one grouped query, whatever the number of venues and cities
+def test_venues_query_count_does_not_grow_with_venues(client, count_statements):
+    add_venues(5)
+    with count_statements() as few:
+        assert client.get('/venues').status_code == 200
+    add_venues(45, start=5)
+    with count_statements() as many:
+        response = client.get('/venues')
+    assert response.status_code == 200
+    assert b'Venue 49' in response.data
+    assert many.count == few.count
+
+
+# The venue page reads its first shows with the same statements whatever the number of shows,
+# the next ones are loaded by section
+def test_venue_page_loads_its_shows_by_pages(app, client, count_statements):
+    app.config['DETAIL_SHOWS_LIMIT'] = 2
+    venue = Venue(name='Blue Room', city='Austin', state='TX', address='1 Main Street')
+    artists = [Artist(name=f'Band {n}', city='Austin', state='TX') for n in range(5)]
+    db.session.add_all([venue] + artists)
+    db.session.commit()
+    venue_id, artist_ids = venue.id, [artist.id for artist in artists]
+    now = datetime.utcnow()
+    db.session.execute(showTable.insert().values(artist_id=artist_ids[0], venue_id=venue_id,
+                                                 start_time=now - timedelta(days=1)))
+    db.session.commit()
+    with count_statements() as one_show:
+        assert b'Band 0' in client.get(f'/venues/{venue_id}').data
+    db.session.execute(showTable.insert().values([
+        {'artist_id': artist_id, 'venue_id': venue_id, 'start_time': now + timedelta(days=n + 1)}
+        for n, artist_id in enumerate(artist_ids)]))
+    db.session.commit()
+    with count_statements() as six_shows:
+        page = client.get(f'/venues/{venue_id}').data
+    assert six_shows.count == one_show.count
+    assert b'Band 1' in page and b'Band 2' not in page
+    more = client.get(f'/venues/{venue_id}/shows/upcoming?offset=2').data
+    assert b'Band 2' in more and b'Band 3' in more and b'Band 4' not in more
+    assert b'Band 4' in client.get(f'/venues/{venue_id}/shows/upcoming?offset=4').data
+
+
+# The genres of the submitted venues are shared rows, the genre pages list the venues having them
+def test_venues_are_filtered_by_genre(client):
+    for name, genres in [('Blue Room', ['Jazz', 'Blues']), ('Folk Hall', ['Folk']), ('Jazz Cellar', ['Jazz'])]:
+        client.post('/venues/create', data={'name': name, 'city': 'Austin', 'state': 'TX', 'address': '1 Main Street',
+                                            'phone': '', 'genres': genres, 'facebook_link': ''})
+    assert sorted(genre.name for genre in Genre.query) == ['Blues', 'Folk', 'Jazz']
+    page = client.get('/venues/genres/Jazz').data
+    assert b'Blue Room' in page and b'Jazz Cellar' in page and b'Folk Hall' not in page
+    venues = client.get('/api/v1/venues?fields=name,genres').get_json()['data']
+    assert {venue['name']: venue['genres'] for venue in venues} == {
+        'Blue Room': ['Blues', 'Jazz'], 'Folk Hall': ['Folk'], 'Jazz Cellar': ['Jazz']}
@@ -0,0 +1,44 @@
+import hashlib
+
+from flask import current_app
+from markupsafe import Markup
+
+from cache import fragment_cache
+from filters import request_locale, request_timezone
+
+# ----------------------------------------------------------------------------#
+# Show tiles.
+# ----------------------------------------------------------------------------#
+
+# The macros of templates/pages/show_tile.html rendering each kind of tile:
+# 'show' (artist and venue, /shows), 'artist' (venue pages) and 'venue' (artist pages)
+TILE_TEMPLATE = 'pages/show_tile.html'
+
+# Names and images shown by each kind of tile
+TILE_FIELDS = {
+    'show': ['artist_name', 'artist_image_link', 'venue_name', 'venue_image_link'],
+    'artist': ['artist_name', 'artist_image_link'],
+    'venue': ['venue_name', 'venue_image_link'],
+}
+
+
+# The shows are rows of the show listings or dictionaries of split_shows
+def show_field(show, name):
+    return show.get(name) if isinstance(show, dict) else getattr(show, name, None)
+
+
+# A show tile, rendered once for each locale and time zone then taken from the fragment cache
+# The key is the show (artist_id, venue_id, start_time), the locale and time zone of its date,
+# and a fingerprint of the names and images shown: renaming an artist or a venue or changing its
+# image gives its tiles new keys in every worker, any other change of them keeps the cached tiles.
+def show_tile(kind, show):
+    fingerprint = hashlib.sha1('\0'.join(str(show_field(show, name)) for name in TILE_FIELDS[kind])
+                               .encode()).hexdigest()[:16]
+    key = (f"tile:{kind}:{request_locale()}:{request_timezone()}:{show_field(show, 'artist_id')}:"
+           f"{show_field(show, 'venue_id')}:{show_field(show, 'start_time').isoformat()}:{fingerprint}")
+    tile = fragment_cache.get(key)
+    if tile is None:
+        macro = getattr(current_app.jinja_env.get_template(TILE_TEMPLATE).module, f'{kind}_tile')
+        tile = str(macro(show))
+        fragment_cache.set(key, tile)
+    return Markup(tile)
@@ -0,0 +1,251 @@
+from flask import Blueprint, render_template, request, flash, redirect, url_for, current_app, abort
+from sqlalchemy import func
+from sqlalchemy.orm import joinedload
+
+from cache import page_cache, cached_page, add_cache_tags
+from models import db, showTable, Venue, Artist
+from queries import get_genres, search_names, invalidate_search_index, refresh_typeahead, upcoming_show_counts, \
+    recount_shows, split_shows, details_with_shows, venue_areas
+from replicas import read_only
+
+# ----------------------------------------------------------------------------#
+# Venues.
+# ----------------------------------------------------------------------------#
+
+bp = Blueprint('venues', __name__)
+
+# Venues home page: In this page all venues are listed
+@bp.route('/venues')
+@cached_page('venues')
+def venues():
+    areas, pager = venue_areas()
+    return render_template('pages/venues.html', areas=areas, pager=pager)
+
+
+# Venues by genre: the venues page with only the venues having the genre
+@bp.route('/venues/genres/<genre>')
+@cached_page('venues')
+def venues_by_genre(genre):
+    areas, pager = venue_areas(genre)
+    return render_template('pages/venues.html', areas=areas, pager=pager, genre=genre)
+
+
+# Venues search : This page created to show the results of the search in the navigtion bar
+@bp.route('/venues/search', methods=['POST'])
+@read_only
+def search_venues():
+    # Get the result word and retrieve all the matched results from database
+    # Search is case insensitive
+    search_word = request.form['search_term']
+    results = search_names(Venue, search_word)
+    # Get upcoming show counts of all the results at once
+    upcoming_shows = upcoming_show_counts(Venue, [result_id for result_id, _ in results])
+    data = []
+    for result_id, result_name in results:
+        # Add the result needed data to the data object
+        data.append({'id': result_id, 'name': result_name, 'num_upcoming_shows': upcoming_shows[result_id]})
+    # Create the response with the right way to be rendered
+    response = {
+        "count": len(results),
+        "data": data
+    }
+    return render_template('pages/search_venues.html', results=response,
+                           search_term=request.form.get('search_term', ''))
+
+
+# The details of a venue shown by its page, None when there is no such venue
+def venue_details(venue_id):
+    # The genres come with the same statement
+    required_venue = Venue.query.options(joinedload(Venue.genres)).get(venue_id)
+    if required_venue is None:
+        return None
+    return {
+        'id': required_venue.id,
+        'name': required_venue.name,
+        "genres": [genre.name for genre in required_venue.genres],
+        "address": required_venue.address,
+        "city": required_venue.city,
+        "state": required_venue.state,
+        "phone": required_venue.phone,
+        "website": required_venue.website,
+        "facebook_link": required_venue.facebook_link,
+        "seeking_talent": required_venue.seeking_talent,
+        "seeking_description": required_venue.seeking_description,
+        "image_link": required_venue.image_link
+    }
+
+
+# Venue page: This page will show each venue details data and it's show
+@bp.route('/venues/<int:venue_id>')
+@cached_page('venue:{venue_id}')
+def show_venue(venue_id):
+    from forms import ArtistForm
+    # Use Artist form to show the name input field to search for an artist
+    form = ArtistForm()
+    # Get the required venue with its id and its shows, split into upcoming and past by the database
+    # Only the first shows of each section are loaded, the two reads run at the same time with PARALLEL_QUERIES
+    data, sections = details_with_shows(lambda: venue_details(venue_id), showTable.c.venue_id, venue_id,
+                                        Artist, showTable.c.artist_id, limit=current_app.config['DETAIL_SHOWS_LIMIT'])
+    if data is None:
+        abort(404)
+    upcoming_shows, upcoming_count = sections['upcoming']
+    past_shows, past_count = sections['past']
+    # The page shows the artists names and images so it changes with them
+    add_cache_tags(*{f"artist:{show['artist_id']}" for show in upcoming_shows + past_shows})
+    # Update the data dictionary with the shows information
+    data.update({"past_shows": past_shows})
+    data.update({"upcoming_shows": upcoming_shows})
+    data.update({"past_shows_count": past_count})
+    data.update({"upcoming_shows_count": upcoming_count})
+    data.update({"shows_limit": current_app.config['DETAIL_SHOWS_LIMIT']})
+    return render_template('pages/show_venue.html', venue=data, form=form)
+
+
+# Load more: the next tiles of a section of the venue page, fetched by the "Load more" button
+@bp.route('/venues/<int:venue_id>/shows/<any(upcoming, past):section>')
+@cached_page('venue:{venue_id}')
+def venue_shows(venue_id, section):
+    limit = current_app.config['DETAIL_SHOWS_LIMIT']
+    sections = split_shows(showTable.c.venue_id, venue_id, Artist, showTable.c.artist_id,
+                           limit=limit, offset=request.args.get('offset', 0, type=int), section=section)
+    add_cache_tags(*{f"artist:{show['artist_id']}" for show in sections[section][0]})
+    return render_template('pages/artist_tiles.html', shows=sections[section][0])
+
+
+#  Create Venue: The next two methods
+#   1- GET method implement venue page
+@bp.route('/venues/create', methods=['GET'])
+def create_venue_form():
+    from forms import VenueForm
+    form = VenueForm()
+    return render_template('forms/new_venue.html', form=form)
+
+
+#   2- POST method submit the form entry
+@bp.route('/venues/create', methods=['POST'])
+def create_venue_submission():
+    error = False
+    try:
+        # Get the data from the form to save it in the database
+        venue = Venue(
+            name=request.form['name'],
+            city=request.form['city'],
+            state=request.form['state'],
+            address=request.form['address'],
+            phone=request.form['phone'],
+            genres=get_genres(request.form.getlist('genres')),
+            facebook_link=request.form['facebook_link']
+        )
+        # Add the Venue Object to the db session
+        db.session.add(venue)
+        db.session.commit()
+        invalidate_search_index(Venue)
+        refresh_typeahead(Venue, venue.id, venue.name)
+        page_cache.invalidate('venues')
+    except:
+        # Error handling by flash a warning message
+        error = True
+        db.session.rollback()
+        flash(f"An error occurred. Venue {request.form['name']} could not be listed.", 'warning')
+    finally:
+        # Close the session to be used with other processs
+        db.session.close()
+
+    # Flash success message after correct database insertion
+    if not error:
+        flash(f"Venue {request.form['name']} was successfully listed!", 'info')
+    # Return to the home page
+    return render_template('pages/home.html')
+
+
+#  Delete Venue
+#  ----------------------------------------------------------------
+
+@bp.route('/venues/<venue_id>', methods=['DELETE'])
+def delete_venue(venue_id):
+    error = False
+    try:
+        # Delete venue by id
+        delete_venue = Venue.query.get(venue_id)
+        # Its shows go with it, so the counters of their artists are recounted
+        artist_ids = [artist_id for artist_id, in db.session.query(showTable.c.artist_id)
+                      .filter(showTable.c.venue_id == delete_venue.id).distinct()]
+        db.session.execute(showTable.delete().where(showTable.c.venue_id == delete_venue.id))
+        db.session.delete(delete_venue)
+        db.session.flush()
+        if artist_ids:
+            recount_shows(Artist, Artist.id.in_(artist_ids))
+        db.session.commit()
+        invalidate_search_index(Venue)
+        refresh_typeahead(Venue, int(venue_id))
+        page_cache.invalidate('venues', 'shows', f'venue:{venue_id}',
+                              *[f'artist:{artist_id}' for artist_id in artist_ids])
+    except:
+        # Error handling 
+        error = True
+        db.session.rollback()
+    finally:
+        # Close the session to be used with other processs
+        db.session.close()
+
+    return render_template('pages/home.html')
+
+
+#  Update
+#  ----------------------------------------------------------------
+@bp.route('/venues/<int:venue_id>/edit', methods=['GET'])
+def edit_venue(venue_id):
+    from forms import VenueForm
+    form = VenueForm()
+    # Get the required artist to show its details with its id
+    # The genres come with the same statement
+    required_venue = Venue.query.options(joinedload(Venue.genres)).get(venue_id)
+    venue = {
+        "id": required_venue.id,
+        "name": required_venue.name,
+        "genres": [genre.name for genre in required_venue.genres],
+        "address": required_venue.address,
+        "city": required_venue.city,
+        "state": required_venue.state,
+        "phone": required_venue.phone,
+        "website": required_venue.website,
+        "facebook_link": required_venue.facebook_link,
+        "seeking_talent": required_venue.seeking_talent,
+        "seeking_description":required_venue.seeking_description,
+        "image_link": required_venue.image_link
+    }
+    return render_template('forms/edit_venue.html', form=form, venue=venue)
+
+
+@bp.route('/venues/<int:venue_id>/edit', methods=['POST'])
+def edit_venue_submission(venue_id):
+    error = False
+    update_venue = Venue.query.get(venue_id)
+    try:
+        # Update venue information from the from entry
+        update_venue.name = request.form['name']
+        update_venue.genres = get_genres(request.form.getlist('genres'))
+        # Changing only the genres does not update the venue row itself
+        update_venue.updated_at = func.now()
+        update_venue.city = request.form['city']
+        update_venue.state = request.form['state']
+        update_venue.address = request.form['address']
+        update_venue.phone = request.form['phone']
+        update_venue.facebook_link = request.form['facebook_link']
+        db.session.commit()
+        invalidate_search_index(Venue)
+        refresh_typeahead(Venue, venue_id, request.form['name'])
+        page_cache.invalidate('venues', 'shows', f'venue:{venue_id}')
+    except:
+        # Error handling by flash a warning message
+        error = True
+        db.session.rollback()
+        flash(f"An error occurred. Venue {request.form['name']} could not be updated.", 'info')
+    finally:
+        # Close the session to be used with other processs
+        db.session.close()
+
+    # Flash success message after correct database insertion
+    if not error:
+        flash(f"Venue {request.form['name']} was successfully updated!", 'info')
+    return redirect(url_for('venues.show_venue', venue_id=venue_id))